@@ -0,0 +1,214 @@
+import copy
+import glob
+import io
+import os
+import signal
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Batch mode: render a whole directory (or glob) of tally sheets and
+# manifests in parallel, one bordereau / flattened workbook per input.
+#
+#   *.xlsx, *.xlsm -> borderau2026.excel_to_docx_custom -> <name>_bordereau.docx
+#   *.json         -> json_to_excel.extract_to_excel_write_only -> <name>_flattened.xlsx
+
+TALLY_EXTENSIONS = (".xlsx", ".xlsm")
+MANIFEST_EXTENSIONS = (".json",)
+
+_template_bytes = None
+_templates = {}
+
+
+def _init_worker(template_path):
+    """Read the template once per worker; every job opens it from memory."""
+    global _template_bytes
+    if template_path:
+        with open(template_path, "rb") as f:
+            _template_bytes = f.read()
+
+
+def init_warm_worker(template_paths):
+    """
+    Initializer for long-running pools (watch, service): import the renderers
+    and parse every template once; jobs pick a template by file name and
+    render on a copy of the parsed Document.
+    """
+    # Ctrl+C is handled by the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from docx import Document
+
+    import borderau2026  # noqa: F401
+    import commodity_rules
+    import json_to_excel  # noqa: F401
+
+    for path in template_paths:
+        # A bad template fails at start-up, not on the first job
+        _templates[os.path.basename(path)] = Document(path)
+    commodity_rules.default_classifier()
+
+
+def ping():
+    """No-op job, submitted once per worker to start a pool up front."""
+    return os.getpid()
+
+
+def process_with_template(input_path, output_dir, engine, template_name):
+    """
+    process_file with one of the templates loaded by init_warm_worker (a
+    blank document when template_name is None); KeyError for a template
+    that was not loaded.
+    """
+    template = None if template_name is None else copy.deepcopy(_templates[template_name])
+    return process_file(input_path, output_dir, engine, template=template)
+
+
+def accepts(name):
+    """True for the tally sheets / manifests we can process (not Office lock files)."""
+    return not name.startswith("~$") and name.lower().endswith(TALLY_EXTENSIONS + MANIFEST_EXTENSIONS)
+
+
+def expand_inputs(inputs):
+    """Accept a directory, a glob pattern, a single file or a list of those."""
+    if isinstance(inputs, (str, os.PathLike)):
+        inputs = [inputs]
+    paths = []
+    for item in inputs:
+        item = os.fspath(item)
+        if os.path.isdir(item):
+            candidates = [os.path.join(item, name) for name in sorted(os.listdir(item))]
+        elif os.path.isfile(item):
+            candidates = [item]
+        else:
+            candidates = sorted(glob.glob(item))
+        for path in candidates:
+            # Skip Office lock files (~$book.xlsx) and anything we cannot handle
+            if accepts(os.path.basename(path)) and os.path.isfile(path):
+                paths.append(path)
+    # A file matched twice (folder and glob) is rendered once
+    return list(dict.fromkeys(paths))
+
+
+def output_path_for(input_path, output_dir, tag=""):
+    """<stem><tag>_bordereau.docx or <stem><tag>_flattened.xlsx in output_dir."""
+    stem, ext = os.path.splitext(os.path.basename(input_path))
+    if ext.lower() in MANIFEST_EXTENSIONS:
+        return os.path.join(output_dir, f"{stem}{tag}_flattened.xlsx")
+    return os.path.join(output_dir, f"{stem}{tag}_bordereau.docx")
+
+
+def output_paths(paths, output_dir):
+    """
+    {input: output path} for a batch. Inputs that would write the same file
+    (a.xlsx and a.xlsm, or a.xlsx from two folders) get the extension in
+    the name (a_xlsm_bordereau.docx), then a counter if that still collides.
+    """
+    def key(path):
+        return os.path.normcase(path)
+
+    plain = {path: output_path_for(path, output_dir) for path in paths}
+    counts = {}
+    for output in plain.values():
+        counts[key(output)] = counts.get(key(output), 0) + 1
+
+    outputs = {}
+    taken = {key(o) for o in plain.values() if counts[key(o)] == 1}
+    for path, output in plain.items():
+        if counts[key(output)] > 1:
+            ext = os.path.splitext(path)[1].lstrip(".").lower()
+            output = output_path_for(path, output_dir, f"_{ext}")
+            n = 1
+            while key(output) in taken:
+                n += 1
+                output = output_path_for(path, output_dir, f"_{ext}_{n}")
+            print(f"{path}: same output name as another input, writing {os.path.basename(output)}")
+        taken.add(key(output))
+        outputs[path] = output
+    return outputs
+
+
+def process_file(input_path, output_dir, engine="stamp", template=None, output_path=None):
+    """
+    Render one input (to output_path, else output_path_for in output_dir);
+    returns a summary dict instead of raising.
+    `template` (bytes, or a python-docx Document rendered into) overrides
+    the template read by _init_worker.
+    """
+    start = time.perf_counter()
+    output_path = output_path or output_path_for(input_path, output_dir)
+    result = {"input": input_path, "output": output_path, "seconds": 0.0, "error": None}
+    try:
+        if input_path.lower().endswith(MANIFEST_EXTENSIONS):
+            import json_to_excel
+
+            json_to_excel.extract_to_excel_write_only(input_path, output_path)
+        else:
+            import borderau2026
+
+            template = template if template is not None else _template_bytes
+            if isinstance(template, bytes):
+                template = io.BytesIO(template) if template else None
+            borderau2026.excel_to_docx_custom(
+                input_path, template_path=template, output_docx=output_path, engine=engine,
+            )
+    except Exception as exc:
+        result["error"] = f"{type(exc).__name__}: {exc}"
+        result["traceback"] = traceback.format_exc()
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def run_batch(inputs, output_dir, template_path="template.docx", workers=None, engine="stamp"):
+    """
+    Process every input over a ProcessPoolExecutor (one worker per core by
+    default). A failing file is reported in the summary and does not stop
+    the batch. Returns {"results": [...], "seconds", "ok", "failed"}.
+    """
+    paths = expand_inputs(inputs)
+    # Two workers must never write the same output file
+    outputs = output_paths(paths, output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = []
+
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=_init_worker,
+        initargs=(template_path,),
+    ) as pool:
+        futures = {
+            pool.submit(process_file, path, output_dir, engine, output_path=outputs[path]): path for path in paths
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as exc:
+                # The worker itself died (e.g. killed, out of memory)
+                result = {
+                    "input": futures[future], "output": None, "seconds": 0.0,
+                    "error": f"{type(exc).__name__}: {exc}",
+                }
+            results.append(result)
+            status = "FAILED " + result["error"].splitlines()[0] if result["error"] else "ok"
+            print(f"{result['input']}: {result['seconds']:.2f} s {status}")
+
+    order = {path: i for i, path in enumerate(paths)}
+    results.sort(key=lambda r: order[r["input"]])
+    failed = [r for r in results if r["error"]]
+    summary = {
+        "results": results,
+        "seconds": time.perf_counter() - start,
+        "ok": len(results) - len(failed),
+        "failed": len(failed),
+    }
+    print(f"Batch finished: {summary['ok']} ok, {summary['failed']} failed in {summary['seconds']:.2f} s")
+    return summary
+
+
+if __name__ == "__main__":
+    import sys
+
+    import epj
+
+    # Same options as `epj batch`
+    sys.exit(epj.main(["batch", *sys.argv[1:]]))
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from docx import Document
+
+import borderau2026
+import entry_xml
+
+# Entries/second of the python-docx object model vs the raw-OOXML emitter
+# and the per-layout stamp cache.
+# Only rendering into the body is timed; doc.save costs the same for both.
+
+TYPES = ["big bag", "coil", "CTP", "BEAMS", "PIPES", "WHITE WOOD", "UNITS+PACKAGES", "FIL MACHINE", "", "STEEL"]
+
+
+def make_rows(n):
+    return [
+        {
+            "client": f"SARL CLIENT {i % 97}",
+            "type": TYPES[i % len(TYPES)],
+            "qte": (i * 7) % 900 + 1,
+            "poids": ((i * 13) % 5000) / 7.0,
+            "rec_qty": (i * 3) % 50,
+        }
+        for i in range(n)
+    ]
+
+
+def bench(engine, rows, template_path):
+    doc = Document(template_path)
+    start = time.perf_counter()
+    if engine == "xml":
+        entry_xml.append_entries(doc, (borderau2026.entry_fields(row) for row in rows))
+    elif engine == "stamp":
+        entry_xml.append_stamped_entries(doc, (borderau2026.entry_fields(row) for row in rows))
+    else:
+        for row in rows:
+            borderau2026.format_entry_docx(doc, row)
+    return time.perf_counter() - start
+
+
+def main(n=2000):
+    template_path = os.path.join(ROOT, "template.docx")
+    rows = make_rows(n)
+    print(f"{n} entries")
+    for engine in ("docx", "xml", "stamp"):
+        elapsed = bench(engine, rows, template_path)
+        print(f"{engine:>5}: {elapsed:8.3f} s  {n / elapsed:10.1f} entries/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,50 @@
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+# Peak RSS and rows/sec of the manifest flattening exports on a synthetic
+# manifest (default: 10,000 BLs x 10 roulants = 100k roulants). Each export
+# runs in its own process so ru_maxrss is its own peak.
+
+
+def run(mode, json_path, output_path):
+    import json_to_excel
+
+    start = time.perf_counter()
+    if mode == "dataframe":
+        json_to_excel.extract_to_excel_flattened(json_path, output_path)
+    else:
+        json_to_excel.extract_to_excel_write_only(json_path, output_path)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"RESULT {elapsed} {peak_kb}")
+
+
+def main(n_bls=10000, roulants_per_bl=10):
+    from synth import write_manifest
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = write_manifest(os.path.join(tmp, "manifest.json"), n_bls, roulants_per_bl)
+        rows = n_bls * (roulants_per_bl + 1)
+        print(f"{n_bls} BLs, {n_bls * roulants_per_bl} roulants, {rows} rows")
+        for mode in ("dataframe", "write_only"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--run", mode, json_path, os.path.join(tmp, f"{mode}.xlsx")],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            elapsed, peak_kb = out.split("RESULT ")[1].split()
+            elapsed = float(elapsed)
+            print(f"{mode:>10}: {elapsed:8.2f} s  {rows / elapsed:10.0f} rows/s  peak RSS {int(peak_kb) / 1024:8.1f} MB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        run(*sys.argv[2:5])
+    else:
+        main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+# Re-parsing a manifest vs reloading it from the columnar cache
+# (manifest_cache) on a synthetic mixed call (default 10k BLs). The reload
+# runs in a fresh process, as it would for the next run or another tool.
+
+
+def reload(json_path, cache_dir):
+    import manifest_cache
+
+    start = time.perf_counter()
+    columns = manifest_cache.load(json_path, cache_dir)
+    loaded = time.perf_counter() - start
+    # Touch every column so the mapped pages are really read
+    for name in manifest_cache.TABLES:
+        table = getattr(columns, name)
+        for column in table.kinds:
+            table.array(column).sum()
+    print(f"RESULT {loaded} {time.perf_counter() - start}")
+
+
+def main(n_bls=10000):
+    import json_to_excel
+    import manifest_cache
+    import synth
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "manifest.json")
+        synth.write_mixed_manifest(json_path, n_bls)
+        cache_dir = os.path.join(tmp, "cache")
+        size = os.path.getsize(json_path) / 1e6
+        print(f"{n_bls} BLs, {size:.1f} MB of JSON")
+
+        start = time.perf_counter()
+        rows = sum(1 for _ in json_to_excel.iter_flat_rows(json_path))
+        print(f"{'parse + flatten':>22}: {time.perf_counter() - start:8.3f} s ({rows} rows)")
+
+        start = time.perf_counter()
+        columns = manifest_cache.load(json_path, cache_dir)
+        print(f"{'build cache':>22}: {time.perf_counter() - start:8.3f} s "
+              f"({len(columns.bls)} BLs, {len(columns.roulants)} roulants, {len(columns.conteneurs)} conteneurs)")
+
+        out = subprocess.run(
+            [sys.executable, __file__, "--run", json_path, cache_dir], check=True, capture_output=True, text=True,
+        ).stdout
+        loaded, read = (float(s) for s in out.split("RESULT ")[1].split())
+        print(f"{'reload (new process)':>22}: {loaded * 1000:8.2f} ms, every column read in {read * 1000:.2f} ms")
+
+        start = time.perf_counter()
+        cached_rows = sum(1 for _ in json_to_excel.iter_flat_rows(json_path, cache=True, cache_dir=cache_dir))
+        print(f"{'reload + flatten':>22}: {time.perf_counter() - start:8.3f} s ({cached_rows} rows)")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        reload(*sys.argv[2:4])
+    else:
+        main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,74 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+# Flattening of a synthetic mixed call (default 60k BLs, ~100k roulants +
+# conteneurs): the per-BL loop extract_to_excel_flattened used (flatten_bl
+# of dict_rows over parsed dicts, vehicles only) vs the vectorized normalized_sheets
+# (BLs, vehicles, containers and clients from the manifest columns), then
+# both exports end to end (openpyxl vs sheet_xml), with and without the
+# manifest_cache columns. --no-export skips the end-to-end runs.
+
+
+def timed(label, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>34}: {elapsed:8.3f} s")
+    return result, elapsed
+
+
+def main(n_bls=60000, end_to_end=True):
+    import contextlib
+    import io
+
+    import dict_rows
+    import json_to_excel
+    import manifest_cache
+    import synth
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "manifest.json")
+        synth.write_mixed_manifest(json_path, n_bls)
+        with open(json_path, encoding="utf-8") as f:
+            bls = [bl for escale in json.load(f) for bl in escale["connaissements"]]
+        items = sum(len(bl["roulants"]) + len(bl["conteneurs"]) for bl in bls)
+        print(f"{len(bls)} BLs, {items} roulants + conteneurs")
+
+        def loop():
+            return [row for bl in bls for row in dict_rows.flatten_bl(bl)]
+
+        columns = manifest_cache.load_uncached(json_path)
+
+        def vectorized():
+            sheets = json_to_excel.normalized_sheets(columns)
+            return {name: len(cols[0]) if cols else 0 for name, (headers, cols) in sheets.items()}
+
+        rows, loop_seconds = timed("flatten loop (dicts)", loop)
+        sheets, vector_seconds = timed("normalized_sheets (columns)", vectorized)
+        counts = ", ".join(f"{n} {name}" for name, n in sheets.items())
+        print(f"{'':>34}  {len(rows)} loop rows vs {counts}; x{loop_seconds / vector_seconds:.1f}")
+
+        if end_to_end:
+            cache_dir = os.path.join(tmp, "cache")
+            manifest_cache.load(json_path, cache_dir)
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, flattened = timed("extract_to_excel_flattened", json_to_excel.extract_to_excel_flattened,
+                                     json_path, os.path.join(tmp, "flat.xlsx"), streaming=True)
+                _, normalized = timed("extract_to_excel_normalized", json_to_excel.extract_to_excel_normalized,
+                                      json_path, os.path.join(tmp, "norm.xlsx"))
+                _, cached = timed("extract_to_excel_normalized cached", json_to_excel.extract_to_excel_normalized,
+                                  json_path, os.path.join(tmp, "norm2.xlsx"), cache=True, cache_dir=cache_dir)
+            print(f"{'extract_to_excel_flattened':>34}: {flattened:8.3f} s")
+            print(f"{'extract_to_excel_normalized':>34}: {normalized:8.3f} s")
+            print(f"{'extract_to_excel_normalized cached':>34}: {cached:8.3f} s")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--no-export"]
+    main(*(int(a) for a in args[:1]), end_to_end="--no-export" not in sys.argv)
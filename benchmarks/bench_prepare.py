@@ -0,0 +1,34 @@
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+import borderau2026
+from bench_entries import make_rows
+
+# Row preparation only: per-row Series (iterrows) vs the column-wise stage.
+
+
+def main(n=50000):
+    df = pd.DataFrame(make_rows(n))
+    print(f"{n} rows")
+
+    start = time.perf_counter()
+    rows = [borderau2026.entry_fields(row) for idx, row in df.iterrows()]
+    elapsed = time.perf_counter() - start
+    print(f"iterrows: {elapsed:8.3f} s  {n / elapsed:10.1f} rows/s")
+
+    start = time.perf_counter()
+    prepared = borderau2026.prepare_entries(df)
+    elapsed = time.perf_counter() - start
+    print(f"prepared: {elapsed:8.3f} s  {n / elapsed:10.1f} rows/s")
+
+    assert rows == prepared
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,67 @@
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ROOT))
+
+# Memory per BL of a manifest held in memory: the dicts of json.load vs
+# the slotted, string-interned records of records.load, then the
+# flattened rows built from them (dict per row vs tuple per row).
+# Synthetic mixed call, default 10k BLs.
+
+
+def measure(build):
+    """(result, bytes still allocated by build(), seconds without tracemalloc)."""
+    gc.collect()
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main(n_bls=10000):
+    import dict_rows
+    import json_to_excel
+    import records
+    import synth
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "manifest.json")
+        manifest = synth.write_mixed_manifest(json_path, n_bls)
+        bls = sum(len(e["connaissements"]) for e in manifest)
+        roulants = sum(len(bl["roulants"]) for e in manifest for bl in e["connaissements"])
+        conteneurs = sum(len(bl["conteneurs"]) for e in manifest for bl in e["connaissements"])
+        del manifest
+        print(f"{bls} BLs, {roulants} roulants, {conteneurs} conteneurs")
+
+        def load_dicts():
+            with open(json_path, encoding="utf-8") as f:
+                return [bl for e in json.load(f) for bl in e["connaissements"]]
+
+        def load_records():
+            return [bl for e in records.load(json_path) for bl in e.connaissements]
+
+        for name, load, flatten in (
+            ("dicts", load_dicts, dict_rows.flatten_bl),
+            ("records", load_records, json_to_excel.flatten_bl_rows),
+        ):
+            loaded, size, elapsed = measure(load)
+            print(f"{name:>8}: {size / 1e6:7.1f} MB  {size / bls:7.0f} bytes/BL  loaded in {elapsed:.2f} s")
+            rows, size, elapsed = measure(lambda: [row for bl in loaded for row in flatten(bl)])
+            print(f"{'rows':>8}: {size / 1e6:7.1f} MB  {size / len(rows):7.0f} bytes/row  "
+                  f"({len(rows)} rows in {elapsed:.2f} s)")
+            del loaded, rows
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:2]))
@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from docx import Document
+
+import borderau2026
+import entry_xml
+import tally
+from bench_entries import make_rows
+
+# Sharded rendering (borderau2026.append_sharded_entries) from 1 to N
+# worker processes, against the serial XML emitter. Rows are prepared
+# once; rendering and the ordered merge into the body are timed.
+
+
+def document_xml(doc):
+    return doc.element.xml
+
+
+def main(n=20000, max_workers=None):
+    import pandas as pd
+
+    template_path = os.path.join(ROOT, "template.docx")
+    rows = tally.prepare_frame(pd.DataFrame(make_rows(n)), upper_commodity=True)
+    max_workers = max_workers or os.cpu_count()
+    print(f"{n} entries, 1..{max_workers} workers")
+
+    doc = Document(template_path)
+    start = time.perf_counter()
+    entry_xml.append_entries(doc, map(borderau2026.fields_from_entry, rows))
+    serial = time.perf_counter() - start
+    expected = document_xml(doc)
+    print(f"serial : {serial:8.3f} s  {n / serial:10.1f} entries/s")
+
+    for workers in range(1, max_workers + 1):
+        doc = Document(template_path)
+        start = time.perf_counter()
+        borderau2026.append_sharded_entries(doc, rows, workers)
+        elapsed = time.perf_counter() - start
+        same = "same" if document_xml(doc) == expected else "DIFFERENT"
+        print(f"{workers:>2} proc: {elapsed:8.3f} s  {n / elapsed:10.1f} entries/s  x{serial / elapsed:5.2f}  {same}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else None,
+    )
@@ -0,0 +1,70 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Startup budget of the epj command line: `python -X importtime epj.py
+# <command> --help` must stay under BUDGET_MS of imports and must not load
+# any of the heavy libraries. Exits non-zero when the budget is exceeded,
+# so it can gate a CI job; tests/test_startup.py checks the heavy imports
+# of every command on each test run.
+
+BUDGET_MS = 150
+HEAVY = ("pandas", "numpy", "docx", "lxml", "openpyxl")
+
+# import time: self [us] | cumulative | imported package
+LINE = re.compile(r"import time:\s*(\d+) \|\s*(\d+) \| ( *)(\S+)")
+
+
+def commands():
+    """epj itself and every subcommand of its parser, as argument lists."""
+    sys.path.insert(0, ROOT)
+    import epj
+
+    parser = epj.build_parser()
+    sub = next(a for a in parser._actions if isinstance(a, argparse._SubParsersAction))
+    return [[]] + [[name] for name in sub.choices]
+
+
+def heavy_imports(modules):
+    return sorted(name for name in modules if name.split(".")[0] in HEAVY)
+
+
+def import_profile(args):
+    """Return ({top-level module: cumulative us}, total us) of one CLI run."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.join(ROOT, "epj.py")] + args + ["--help"],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    modules = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match and not match.group(3):
+            # Top-level entries only: their cumulative time includes their children
+            modules[match.group(4)] = int(match.group(2))
+            total += int(match.group(2))
+    return modules, total
+
+
+def main(budget_ms=BUDGET_MS):
+    failures = []
+    for args in commands():
+        modules, total = import_profile(args)
+        heavy = heavy_imports(modules)
+        label = " ".join(["epj"] + args + ["--help"])
+        print(f"{label:<32} {total / 1000:8.1f} ms  {len(modules)} top-level imports")
+        if heavy:
+            failures.append(f"{label}: imports {', '.join(heavy)}")
+        if total / 1000 > budget_ms:
+            failures.append(f"{label}: {total / 1000:.1f} ms > {budget_ms} ms")
+    for failure in failures:
+        print("FAIL", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS))
@@ -0,0 +1,200 @@
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+# Scaling benchmark of the main scripts on synthetic calls (synth.py) of
+# 10 / 1k / 10k / 100k BLs:
+#
+#   flatten       json_to_excel.extract_to_excel_flattened   (manifest -> .xlsx)
+#   borderau2026  borderau2026.excel_to_docx_custom          (tally sheet -> .docx)
+#   brd           brd.excel_to_docx_custom, tables converted to padded text
+#   repbor        repbor.fill_from_excel_using_template      (one .docx per row, zipped;
+#                 at most REPBOR_MAX_ROWS rows)
+#
+# Each (target, scale) runs in its own process so its peak RSS is its own.
+# Wall time, rows/s and peak RSS are appended as one run (with the git
+# commit) to a JSON results file, and compared with the previous run there.
+
+TARGETS = ("flatten", "borderau2026", "brd", "repbor")
+DEFAULT_SCALES = ("10", "1k", "10k")
+REPBOR_MAX_ROWS = 2000
+
+
+def prepare_data(data_dir, scale):
+    """Write (once) the manifest, tally sheet and repbor sheet of one scale."""
+    import synth
+
+    paths = {
+        "manifest": os.path.join(data_dir, f"manifest_{scale}.json"),
+        "tally": os.path.join(data_dir, f"tally_{scale}.xlsx"),
+        "fill": os.path.join(data_dir, f"fill_{scale}.xlsx"),
+        "fill_template": os.path.join(data_dir, "fill_template.docx"),
+        "meta": os.path.join(data_dir, f"meta_{scale}.json"),
+    }
+    if not os.path.exists(paths["meta"]):
+        manifest = synth.write_mixed_manifest(paths["manifest"], synth.SCALES[scale])
+        rows = synth.tally_rows(manifest)
+        synth.write_rows(paths["tally"], rows)
+        synth.write_fill_sheet(paths["fill"], rows[:REPBOR_MAX_ROWS])
+        synth.write_fill_template(paths["fill_template"], os.path.join(ROOT, "template.docx"))
+        bls = [bl for escale in manifest for bl in escale["connaissements"]]
+        meta = {
+            "bls": len(bls),
+            "flat_rows": sum(1 + len(bl["roulants"]) for bl in bls),
+            "tally_rows": len(rows),
+            "fill_rows": min(len(rows), REPBOR_MAX_ROWS),
+        }
+        with open(paths["meta"], "w") as f:
+            json.dump(meta, f)
+    with open(paths["meta"]) as f:
+        paths.update(json.load(f))
+    return paths
+
+
+def run_target(target, data_dir, scale, out_dir):
+    """Child process: run one target and print its RESULT line."""
+    import contextlib
+    import io
+
+    data = prepare_data(data_dir, scale)
+    template = os.path.join(ROOT, "template.docx")
+    start = time.perf_counter()
+    # The scripts print per file/row progress; keep the child's stdout for RESULT
+    with contextlib.redirect_stdout(io.StringIO()):
+        if target == "flatten":
+            import json_to_excel
+
+            json_to_excel.extract_to_excel_flattened(data["manifest"], os.path.join(out_dir, "flat.xlsx"))
+            rows = data["flat_rows"]
+        elif target == "borderau2026":
+            import borderau2026
+
+            borderau2026.excel_to_docx_custom(
+                data["tally"], template_path=template, output_docx=os.path.join(out_dir, "b.docx"), engine="stamp",
+            )
+            rows = data["tally_rows"]
+        elif target == "brd":
+            import brd
+
+            brd.excel_to_docx_custom(
+                data["tally"], sheet_name=0, template_path=template, output_docx=os.path.join(out_dir, "brd.docx"),
+            )
+            rows = data["tally_rows"]
+        elif target == "repbor":
+            import repbor
+
+            repbor.fill_from_excel_using_template(
+                data["fill_template"], data["fill"], output_prefix="filled", bundle=os.path.join(out_dir, "filled.zip"),
+            )
+            rows = data["fill_rows"]
+        else:
+            raise ValueError(f"Unknown target: {target}")
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"RESULT {elapsed} {peak_kb} {rows}")
+
+
+def measure(target, data_dir, scale, timeout):
+    with tempfile.TemporaryDirectory() as out_dir:
+        try:
+            proc = subprocess.run(
+                [sys.executable, __file__, "--run", target, data_dir, scale, out_dir],
+                capture_output=True, text=True, timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return {"target": target, "scale": scale, "status": "timeout", "seconds": timeout}
+    if proc.returncode != 0 or "RESULT " not in proc.stdout:
+        error = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+        return {"target": target, "scale": scale, "status": "error", "error": error}
+    elapsed, peak_kb, rows = proc.stdout.split("RESULT ")[1].split()
+    elapsed, rows = float(elapsed), int(rows)
+    return {
+        "target": target, "scale": scale, "status": "ok", "rows": rows, "seconds": round(elapsed, 4),
+        "rows_per_sec": round(rows / elapsed, 1), "peak_rss_mb": round(int(peak_kb) / 1024, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_runs(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("runs", [])
+
+
+def main(scales=DEFAULT_SCALES, targets=TARGETS, results_path="bench_results.json", data_dir=None, timeout=1800):
+    runs = load_runs(results_path)
+    previous = {(r["target"], r["scale"]): r for r in runs[-1]["results"]} if runs else {}
+    run = {
+        "commit": git_commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+        for scale in scales:
+            start = time.perf_counter()
+            data = prepare_data(data_dir, scale)
+            print(f"--- {scale}: {data['bls']} BLs, {data['flat_rows']} flattened rows "
+                  f"(data ready in {time.perf_counter() - start:.1f} s)")
+            for target in targets:
+                result = measure(target, data_dir, scale, timeout)
+                run["results"].append(result)
+                if result["status"] != "ok":
+                    print(f"{target:>13}: {result['status'].upper()} {result.get('error', '')}")
+                    continue
+                line = (f"{target:>13}: {result['rows']:>7} rows {result['seconds']:9.2f} s "
+                        f"{result['rows_per_sec']:10.1f} rows/s  peak RSS {result['peak_rss_mb']:7.1f} MB")
+                before = previous.get((target, scale))
+                if before and before.get("status") == "ok":
+                    line += f"  ({result['seconds'] / before['seconds']:.2f}x time vs {runs[-1]['commit']})"
+                print(line)
+
+    runs.append(run)
+    with open(results_path, "w", encoding="utf-8") as f:
+        json.dump({"runs": runs}, f, indent=1)
+    print(f"Results appended to {results_path}")
+    return run
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        run_target(*sys.argv[2:6])
+        sys.exit(0)
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scaling benchmark of flatten / borderau2026 / brd / repbor.")
+    parser.add_argument("--scales", default=",".join(DEFAULT_SCALES), help="comma-separated, among 10,1k,10k,100k")
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("-o", "--output", default="bench_results.json", help="JSON results file (runs are appended)")
+    parser.add_argument("--data-dir", default=None, help="keep the generated inputs here for later runs")
+    parser.add_argument("--timeout", type=float, default=1800, help="seconds per target and scale")
+    args = parser.parse_args()
+
+    main(
+        scales=args.scales.split(","), targets=args.targets.split(","), results_path=args.output,
+        data_dir=args.data_dir, timeout=args.timeout,
+    )
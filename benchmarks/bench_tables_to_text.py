@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from docx import Document
+
+import borderau2026
+import entry_xml
+import tables_to_text
+from bench_entries import make_rows
+
+# tables_to_text on a bordereau with N entry tables (default 5000).
+
+
+def main(n=5000):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "tables.docx")
+        doc = Document(os.path.join(ROOT, "template.docx"))
+        entry_xml.append_stamped_entries(doc, (borderau2026.entry_fields(row) for row in make_rows(n)))
+        doc.save(source)
+
+        for mode in ("tabs", "padded"):
+            start = time.perf_counter()
+            count = tables_to_text.convert_docx(source, os.path.join(tmp, f"{mode}.docx"), mode)
+            elapsed = time.perf_counter() - start
+            print(f"{mode:>6}: {count} tables in {elapsed:6.2f} s  {count / elapsed:8.0f} tables/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,48 @@
+# The dict-per-row flattening extract_to_excel_flattened used before
+# json_to_excel.flatten_bl_rows: the reference bench_records.py and
+# bench_normalized.py measure the tuple rows and the columns against.
+
+
+def flatten_bl(bl):
+    """Return the flattened rows of one BL: the BL row, then one row per roulant."""
+    rows = []
+    # Get basic BL info
+    bl_no = bl.get('num_bl')
+    client = bl.get('client_final')
+    description = bl.get('description_marchandise')
+    
+    # Convert Global Weight from KG to Tons (poids_brute / 1000)
+    poids_kg = bl.get('poids_brute')
+    weight_tons = (poids_kg / 1000) if poids_kg is not None else 0
+    
+    # 1. Add the BL Header Row
+    row = {
+        "BL Number": bl_no,
+        "Client": client,
+        "Description": description,
+        "Weight (Tons)": weight_tons,
+        "Quantity": bl.get('nombre_colis'),
+        "Item Type": bl.get('conditionnement'),
+        "Brand": "-",
+        "Model": "-",
+        "Chassis/Serial": "-",
+    }
+    rows.append(row)
+    
+    # 2. Add individual vehicle/unit rows if they exist
+    items = bl.get('roulants', [])
+    if items:
+        for item in items:
+            item_row = {
+                "BL Number": bl_no,
+                "Client": client,
+                "Description": description,
+                "Item Type": item.get('type'),
+                "Quantity": "-",
+                "Weight (Tons)": "-",
+                "Brand": item.get('marque'),
+                "Model": item.get('modele'),
+                "Chassis/Serial": item.get('numero_chassis'),
+            }
+            rows.append(item_row)
+    return rows
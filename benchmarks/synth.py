@@ -0,0 +1,201 @@
+import json
+import random
+
+from openpyxl import Workbook
+
+# Synthetic customs manifests in the input.json schema, and the tally sheets
+# that go with them.
+
+PORTS = ["CNLYG", "CNTXG", "TRMER", "ESVLC", "ITGOA"]
+CLIENTS = [
+    "SAIB SAID SAREPLAST", "SARL EXTRA METAL", "STEEL SOLIDE EURL", "SARL COMBOIS",
+    "SPA SOFINANCE P/C SARL OULMI METAL", "EURL SNT IMPORT EXPORT", "SARL ROYAL TIGRA",
+]
+BRANDS = [("DEVELON", "DX360LCA-7B"), ("SHACMAN", "X3000"), ("HOWO", "TX 400"), ("CATERPILLAR", "320GC")]
+VEHICLE_TYPES = ["PELLE SUR CHENILLE", "CAMION", "TRACTEUR ROUTIER", "CHARGEUSE"]
+
+
+def make_roulant(rng, i):
+    brand, model = rng.choice(BRANDS)
+    return {
+        "matricule": str(2020 + i % 6),
+        "numero_chassis": f"LZG{rng.randrange(10**13):013d}",
+        "modele": model,
+        "poids": rng.randrange(8000, 40000),
+        "volume": None, "surface": None, "hauteur": None,
+        "type": rng.choice(VEHICLE_TYPES),
+        "marque": brand,
+        "indicateur_frigorifique": None, "indicateur_dangereux": None, "classe": None,
+    }
+
+
+def make_bl(rng, escale_no, i, roulants=0):
+    return {
+        "num_bl": f"{escale_no[-5:]}LDJ{i:05d}",
+        "article": str(i + 1),
+        "sous_article": "0",
+        "port_chargement": rng.choice(PORTS),
+        "description_marchandise": "VEHICULES" if roulants else "STEEL COILS",
+        "conditionnement": "COLIS",
+        "indicateur_dangereux": "0",
+        "nombre_colis": roulants or rng.randrange(1, 900),
+        "nombre_tcs": 0,
+        "nif_client_final": f"{rng.randrange(10**19):020d}",
+        "client_final": rng.choice(CLIENTS),
+        "poids_brute": rng.randrange(1000, 3000000),
+        "volume_marchandise": 0,
+        "adresse_client": "ALGER ALGERIE",
+        "marque_roulant": None,
+        "nombre_roulant": roulants or None,
+        "conteneurs": [],
+        "roulants": [make_roulant(rng, j) for j in range(roulants)],
+    }
+
+
+def make_manifest(n_bls, roulants_per_bl=0, escales=1, seed=0):
+    rng = random.Random(seed)
+    manifest = []
+    for e in range(escales):
+        escale_no = f"DJI2025{e:05d}"
+        manifest.append({
+            "numero_escale": escale_no,
+            "nom_navire": "VENETIA",
+            "imo_navire": "9497414",
+            "num_voyage": f"25{e:03d}",
+            "date_manifeste": "2025-12-16 11:33:59",
+            "regime": "import",
+            "connaissements": [make_bl(rng, escale_no, i, roulants_per_bl) for i in range(n_bls)],
+        })
+    return manifest
+
+
+def write_manifest(path, n_bls, roulants_per_bl=0, escales=1, seed=0):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(make_manifest(n_bls, roulants_per_bl, escales, seed), f, ensure_ascii=False)
+    return path
+
+
+# Mixed calls: (weight, description, conditionnement, tally sheet type)
+CARGO = [
+    (18, "BIG BAGS OF PET RESIN", "BIG BAGS", "big bag"),
+    (22, "HOT ROLLED STEEL COILS", "COILS", "coil"),
+    (10, "PLYWOOD PANELS", "CRATES", "PLYWOOD"),
+    (10, "WHITE WOOD SAWN TIMBER", "BUNDLES", "WHITE WOOD"),
+    (8, "STEEL BEAMS", "BUNDLES", "BEAMS"),
+    (6, "SEAMLESS STEEL PIPES", "BUNDLES", "PIPES"),
+    (6, "FIL MACHINE", "ROLLS", "FIL MACHINE"),
+    (12, "VEHICULES", "UNITES", "UNITS+PACKAGES"),
+    (8, "MARCHANDISES DIVERSES", "CONTENEURS", "UNITS+PACKAGES"),
+]
+CARGO_WEIGHTS = [c[0] for c in CARGO]
+CONTAINER_TYPES = [("22G1", 20), ("42G1", 40), ("45G1", 40), ("45R1", 40)]
+OWNERS = ["MSCU", "CMAU", "MAEU", "HLXU", "TGHU"]
+
+# Benchmark scales, in BLs
+SCALES = {"10": 10, "1k": 1000, "10k": 10000, "100k": 100000}
+
+
+def make_conteneur(rng, i):
+    iso, size = rng.choice(CONTAINER_TYPES)
+    return {
+        "numero_conteneur": f"{rng.choice(OWNERS)}{rng.randrange(10**7):07d}",
+        "type_conteneur": iso,
+        "taille": size,
+        "poids": rng.randrange(2000, 28000),
+        "numero_scelle": f"SL{rng.randrange(10**8):08d}",
+        "plein_vide": "P" if i % 10 else "V",
+        "indicateur_frigorifique": "1" if iso == "45R1" else None,
+        "indicateur_dangereux": None,
+    }
+
+
+def make_mixed_bl(rng, escale_no, i):
+    """One BL of a realistic call: bulk commodities, vehicles with chassis numbers or containers."""
+    _, description, packing, _ = rng.choices(CARGO, CARGO_WEIGHTS)[0]
+    bl = make_bl(rng, escale_no, i)
+    bl["description_marchandise"] = description
+    bl["conditionnement"] = packing
+    if packing == "UNITES":
+        roulants = rng.randrange(1, 13)
+        bl["roulants"] = [make_roulant(rng, j) for j in range(roulants)]
+        bl["nombre_colis"] = bl["nombre_roulant"] = roulants
+        bl["marque_roulant"] = bl["roulants"][0]["marque"]
+    elif packing == "CONTENEURS":
+        tcs = rng.randrange(1, 21)
+        bl["conteneurs"] = [make_conteneur(rng, j) for j in range(tcs)]
+        bl["nombre_tcs"] = tcs
+        bl["nombre_colis"] = tcs
+        bl["poids_brute"] = sum(c["poids"] for c in bl["conteneurs"])
+    return bl
+
+
+def make_mixed_manifest(n_bls, escales=1, seed=0):
+    rng = random.Random(seed)
+    manifest = make_manifest(0, escales=escales, seed=seed)
+    for e, escale in enumerate(manifest):
+        count = n_bls // escales + (1 if e < n_bls % escales else 0)
+        escale["connaissements"] = [make_mixed_bl(rng, escale["numero_escale"], i) for i in range(count)]
+    return manifest
+
+
+def tally_rows(manifest, seed=0):
+    """One tally sheet row per BL: most fully received, some short, some not yet."""
+    rng = random.Random(seed)
+    types = {description: tally_type for _, description, _, tally_type in CARGO}
+    rows = []
+    for escale in manifest:
+        for bl in escale["connaissements"]:
+            qty = bl["nombre_colis"]
+            roll = rng.random()
+            received = qty if roll < 0.6 else (rng.randrange(qty + 1) if roll < 0.85 else 0)
+            rows.append({
+                "N° BL": bl["num_bl"],
+                "type": types.get(bl["description_marchandise"], bl["description_marchandise"]),
+                "client": bl["client_final"],
+                "qte": qty,
+                "poids": bl["poids_brute"] / 1000,
+                "rec_qty": received,
+            })
+    return rows
+
+
+def write_mixed_manifest(path, n_bls, escales=1, seed=0):
+    manifest = make_mixed_manifest(n_bls, escales, seed)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    return manifest
+
+
+def write_rows(path, rows, columns=None):
+    """Rows (dicts) to a one-sheet .xlsx, header first (openpyxl write-only)."""
+    if columns is None:
+        columns = list(rows[0]) if rows else []
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(columns)
+    for row in rows:
+        ws.append([row.get(c) for c in columns])
+    wb.save(path)
+    return path
+
+
+def write_fill_sheet(path, rows):
+    """The repbor input (Client, Marchandise, nombre colis, Poids brute) for tally rows."""
+    return write_rows(path, [
+        {"Client": r["client"], "Marchandise": r["type"], "nombre colis": r["qte"], "Poids brute": r["poids"]}
+        for r in rows
+    ])
+
+
+def write_fill_template(path, base_template=None):
+    """A repbor template: the four placeholders, in body paragraphs and in a table."""
+    from docx import Document
+
+    doc = Document(base_template)
+    doc.add_paragraph("Receiver :")
+    doc.add_paragraph("commodity :")
+    table = doc.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "Manifested Quantity :"
+    table.cell(0, 1).text = "tonnage :"
+    doc.save(path)
+    return path
@@ -1,112 +1,67 @@
 import os
 import pandas as pd
 from docx import Document
+from docx.document import Document as DocumentObject
 from docx.shared import Pt, Inches, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
-import math
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import commodity_rules
+import entry_xml
+import instrument
+import tally
+
+# Rows per worker job in append_sharded_entries
+SHARD_SIZE = 500
+
+def describe_commodity(raw_commodity, rec_str):
+    """
+    Return (commodity, received_lines, total_rec_str) for an upper-cased
+    commodity description taken from the `type` column.
+    The rules themselves live in commodity_rules.json.
+    """
+    return commodity_rules.default_classifier().describe(raw_commodity, rec_str)
+
+def fields_from_entry(entry, classified=None):
+    """
+    Return the display strings of one prepared tally.Entry:
+    (client, commodity, manifest_qty_str, tonnage_str, received_lines, total_rec_str)
+    """
+    c = classified or commodity_rules.default_classifier().classify(entry.commodity)
+    total_rec_str = f"{c.total_prefix}{entry.rec_str}{c.total_suffix}"
+    return entry.client, c.commodity, entry.qty_str, entry.tonnage_str, c.received_lines, total_rec_str
+
+def entry_fields(row):
+    """Display strings of one dict-like row (see fields_from_entry)."""
+    return fields_from_entry(tally.prepare_row(row, upper_commodity=True))
+
+def classify_entries(entries):
+    """entry_fields tuples of prepared tally.Entry rows, classifying each distinct commodity once."""
+    # Manifests repeat the same few descriptions
+    classifier = commodity_rules.default_classifier()
+    classified = {}
+    for e in entries:
+        c = classified.get(e.commodity)
+        if c is None:
+            c = classified[e.commodity] = classifier.classify(e.commodity)
+        yield fields_from_entry(e, c)
+
+def prepare_entries(df):
+    """Column-wise preparation of a whole tally sheet into entry_fields tuples."""
+    return list(classify_entries(tally.prepare_frame(df, upper_commodity=True)))
 
 def format_entry_docx(doc, row):
-    client = str(row.get("client", "")).strip()
-    # Initial commodity from excel
-    raw_commodity = str(row.get("type", "")).strip().upper() 
-
-    nb_colis = row.get("qte") or 0
-    tonnage = row.get("poids") or 0.0
-    rec_qty = row.get("rec_qty") or 0
-    # nb_colis =   0     if pd.notna(row.get("nb_colis")) else  row.get("nb_colis")
-    # tonnage  =   0.0   if pd.notna(row.get("tonnage"))  else  row.get("tonnage")
-    #rec_qty  =0 if pd.notna(row.get("rec_qty"))  else  row.get("rec_qty")
-
-        
-    # print(f"client------{client}")
-    
-    if rec_qty is None or (isinstance(rec_qty, float) and math.isnan(rec_qty)):
-        rec_qty = 0
+    """`row` is either a dict-like row or an entry_fields tuple."""
+    fields = row if isinstance(row, tuple) else entry_fields(row)
+    client, commodity, manifest_qty_str, tonnage_str, received_lines, total_rec_str = fields
 
     # Create table
     table = doc.add_table(rows=5, cols=2)
     table.autofit = True
     table.alignment = WD_TABLE_ALIGNMENT.CENTER
 
-    tonnage_str = f"{tonnage:.2f}".lstrip("0") if tonnage < 1 else f"{tonnage:.2f}"
-    manifest_qty_str = f"{int(nb_colis):02d}"
-    rec_str = f"{int(rec_qty):02d}"
-    
-    
-    # Define lines based on type
-    # Logic to adjust Commodity name based on type
-    # Initialize defaults
-    commodity = raw_commodity
-    received_lines = []
-    total_rec_str=rec_str
-    
-    # Logic to adjust Commodity name and Define Lines based on type
-    if "BIG BAG" in raw_commodity:
-        commodity = "Big Bags"
-        total_rec_str=f"{rec_str}  Big Bags"
-        received_lines = [
-            "BIG BAGS FOUND TORN ON BOARD",
-            "BIG BAGS FOUND BROKEN ON BOARD",
-            "EMPTY BAG ON BOARD"
-        ]
-
-    elif any(x in raw_commodity for x in ["PLYWOOD", "MDF", "CTP"]):
-        commodity = raw_commodity
-        received_lines = [
-            f"Crates of {commodity} Found Dismembered on board",
-            f"Crates of {commodity} wet on board (Packing and/or Contents)",
-            f"Crates of {commodity} moldy on board (Packing and/or Contents)"
-        ]
-        total_rec_str=f"{rec_str}  Crates of {commodity}"
-
-    elif "PIPES" in raw_commodity:
-        commodity = "Pipes"
-        received_lines = ["Pipes.", "Pipes Damaged on board"]
-        total_rec_str=f"{rec_str}  {commodity}"
-
-    elif "BEAMS" in raw_commodity:
-        commodity = "Bundles of Beams"
-        received_lines = ["Bundles of Beams.", "Bundles of Beams Found Dismembered on board"]
-        total_rec_str=f"{rec_str}  {commodity}"
-
-    elif "FIL MACHINE" in raw_commodity:
-        commodity = "FIL MACHINE"
-        received_lines = ["RLX FOUND DISMEMBERED ON BOARD"]
-        total_rec_str=f"{rec_str}  {commodity}"
-
-    elif "COIL" in raw_commodity:
-        commodity = "Coils"
-        received_lines = ["Coils Found Rusty on board", "Coils Packaging damaged on board"]
-
-    elif any(wood in raw_commodity for wood in ["WHITE WOOD", "BEECH WOOD", "RED WOOD"]):
-        # Keeping raw_commodity (e.g., "WHITE WOOD") as the name
-        commodity = "Bundles" 
-        received_lines = [
-            f"Bundles of {raw_commodity} Found Dismembered on board",
-            f"Bundles of {raw_commodity} wet on board (Packing and/or Contents)",
-            f"Bundles of {raw_commodity} moldy on board (Packing and/or Contents)"
-        ]
-        total_rec_str=f"{rec_str}  Bundles of {raw_commodity}"
-
-
-    elif "UNIT" in raw_commodity or "PACKAGE" in raw_commodity:
-        commodity = "Units + Packages"
-        received_lines = ["Units", "Units Damaged on board"]
-        total_rec_str=f"{rec_str}  {commodity}"
-
-    elif not raw_commodity:
-        commodity = "Units + Package"
-        received_lines = ["Packaging damaged on board"]
-        total_rec_str=f"{rec_str}  {commodity}"
-
-    else:
-        # Final Fallback
-        commodity = raw_commodity if raw_commodity else "General Cargo"
-        received_lines = ["Packaging damaged on board"]
-        total_rec_str=f"{rec_str}  {commodity}"
-
-
     # Row 0: Receiver / Commodity
     row0 = table.rows[0].cells
     row0[0].width = Cm(9)
@@ -189,29 +144,190 @@ def format_entry_docx(doc, row):
     run_sep = p_sep.add_run("=*"*29)
     run_sep.bold = True
 
-def excel_to_docx_custom(input_excel, sheet_name=0, template_path=None, output_docx="output.docx"):
-    df = pd.read_excel(input_excel, sheet_name=sheet_name, engine="openpyxl",header=0)
-    
-    doc = Document(template_path) if template_path else Document()
+def iter_entries(input_excel, sheet_name=0):
+    """Stream entry_fields tuples straight from the workbook (openpyxl read-only)."""
+    for entry in tally.iter_entries(input_excel, sheet_name, upper_commodity=True):
+        yield fields_from_entry(entry)
+
+def render_entry_xml(entry, grid_w):
+    """XML of one prepared tally.Entry, for render_cache."""
+    return entry_xml.entry_xml(fields_from_entry(entry), grid_w)
+
+def append_cached_entries(doc, input_excel, sheet_name, template_path, cache, streaming=False):
+    """
+    Append the entries through render_cache: rows whose values, commodity
+    rules and template are unchanged since a previous run reuse their XML.
+    `cache` is a cache file path or an open render_cache.RenderCache.
+    Returns the number of entries.
+    """
+    import render_cache
+
+    if streaming:
+        rows = tally.iter_entries(input_excel, sheet_name, upper_commodity=True)
+    else:
+        df = pd.read_excel(input_excel, sheet_name=sheet_name, engine="openpyxl",header=0)
+        rows = tally.prepare_frame(df, upper_commodity=True)
+
+    owned = not isinstance(cache, render_cache.RenderCache)
+    if owned:
+        cache = render_cache.RenderCache(cache)
+    try:
+        template_key = render_cache.file_digest(template_path)
+        count = render_cache.append_cached_entries(doc, rows, cache, template_key, render_entry_xml)
+        print(cache.stats_line())
+        return count
+    finally:
+        if owned:
+            cache.close()
+
+def render_shard(entries, grid_w):
+    """Worker side of append_sharded_entries: the joined XML of a run of tally.Entry rows."""
+    return "".join(entry_xml.entry_xml(fields_from_entry(e), grid_w) for e in entries)
+
+def append_sharded_entries(doc, rows, workers, shard_size=SHARD_SIZE):
+    """
+    Split the prepared rows into consecutive shards, render each shard's XML
+    in a worker process and insert the shards in their original order; the
+    body is the same as with a serial engine.
+    """
+    grid_w = entry_xml.grid_width(doc)
+    shards = (rows[i:i + shard_size] for i in range(0, len(rows), shard_size))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map yields in submission order: shard k is inserted while later ones render
+        for fragment in pool.map(render_shard, shards, itertools.repeat(grid_w)):
+            entry_xml.insert_fragments(doc, [fragment])
+    return len(rows)
+
+def new_document(template_path=None):
+    """
+    The template (or a blank document) with the bordereau base font;
+    template_path may also be an opened Document, which is used as is.
+    """
+    if isinstance(template_path, DocumentObject):
+        doc = template_path
+    else:
+        doc = Document(template_path) if template_path else Document()
 
     style = doc.styles["Normal"]
     font = style.font
     font.name = "Calibri (Corps)"
     font.size = Pt(12)
+    return doc
+
+def append_fields(doc, entries, engine="docx"):
+    """Append entry_fields tuples with one of the engines of excel_to_docx_custom; returns how many."""
+    if engine == "xml":
+        return entry_xml.append_entries(doc, entries)
+    if engine == "stamp":
+        return entry_xml.append_stamped_entries(doc, entries)
+    if engine == "docx":
+        count = 0
+        for count, fields in enumerate(entries, 1):
+            format_entry_docx(doc, fields)
+        return count
+    raise ValueError(f"Unknown engine: {engine}")
+
+def save_document(doc, output_docx):
+    style = doc.styles["Normal"]
+    with instrument.stage("post-process"):
+        style.paragraph_format.space_after = Pt(0)
+        style.paragraph_format.line_spacing = 1.0 #
 
-    for idx, row in df.iterrows():
-        format_entry_docx(doc, row)
-    
-    style.paragraph_format.space_after = Pt(0)
-    style.paragraph_format.line_spacing = 1.0 #
-
-    if os.path.exists(output_docx):
-        os.remove(output_docx)
-        print(f"{output_docx} has been deleted.")
+    with instrument.stage("save"):
+        if os.path.exists(output_docx):
+            os.remove(output_docx)
+            print(f"{output_docx} has been deleted.")
 
-    doc.save(output_docx)
+        doc.save(output_docx)
     print(f"New File {output_docx} Saved")
 
+@instrument.pipeline("borderau2026", "output_docx")
+def excel_to_docx_custom(input_excel, sheet_name=0, template_path=None, output_docx="output.docx", engine="docx", streaming=False, cache=None, workers=1):
+    """
+    engine="docx" builds every entry through the python-docx object model,
+    engine="xml" emits the same tables as raw OOXML fragments and
+    engine="stamp" clones a precompiled table per layout (see entry_xml).
+    streaming=True reads the sheet row by row instead of through pandas.
+    cache (a file path or a render_cache.RenderCache) renders through the
+    XML emitter and only re-renders rows that changed since the last run.
+    workers > 1 renders shards of rows in that many processes (the XML
+    emitter again) and merges them in order into one document.
+    """
+    with instrument.stage("load"):
+        doc = new_document(template_path)
+
+    if cache is not None:
+        # Reading, preparing and rendering happen batch by batch
+        with instrument.stage("render"):
+            count = append_cached_entries(doc, input_excel, sheet_name, template_path, cache, streaming)
+    elif workers and workers > 1:
+        with instrument.stage("load"):
+            if streaming:
+                rows = list(tally.iter_entries(input_excel, sheet_name, upper_commodity=True))
+            else:
+                df = pd.read_excel(input_excel, sheet_name=sheet_name, engine="openpyxl",header=0)
+        if not streaming:
+            with instrument.stage("prepare"):
+                rows = tally.prepare_frame(df, upper_commodity=True)
+        with instrument.stage("render"):
+            count = append_sharded_entries(doc, rows, workers)
+    else:
+        if streaming:
+            # Rows are read and prepared as they are rendered (all in "render")
+            entries = iter_entries(input_excel, sheet_name)
+        else:
+            with instrument.stage("load"):
+                df = pd.read_excel(input_excel, sheet_name=sheet_name, engine="openpyxl",header=0)
+            with instrument.stage("prepare"):
+                entries = prepare_entries(df)
+
+        with instrument.stage("render"):
+            count = append_fields(doc, entries, engine)
+    instrument.count("rows", count)
+    instrument.count_document(doc)
+
+    save_document(doc, output_docx)
+
+@instrument.pipeline("manifest_bordereau", "output_docx")
+def manifest_to_docx(json_path, template_path=None, output_docx="output.docx", tally_excel=None, tally_sheet=0, engine="stamp", where=None):
+    """
+    Bordereau straight from a manifest (input.json schema), without the
+    flattened/tally Excel round trip: one entry per connaissement of every
+    escale, read incrementally (json_to_excel.iter_connaissements).
+    tally_excel (a tally sheet with a BL number column, or a ready
+    {num_bl: qty} dict) supplies the received quantities. json_path may
+    also be a manifest store (manifest_store), read for the BLs selected by
+    `where` (numero_escale, client, since, until...).
+    """
+    import manifest_store
+
+    with instrument.stage("load"):
+        received = tally_excel
+        if tally_excel is not None and not isinstance(tally_excel, dict):
+            received = tally.received_by_bl(tally_excel, tally_sheet)
+        doc = new_document(template_path)
+
+    seen = set()
+
+    def connaissements():
+        for escale, bl in manifest_store.iter_connaissements(json_path, **(where or {})):
+            seen.add(str(bl.get("num_bl")).strip())
+            yield bl
+
+    entries = classify_entries(tally.iter_manifest_entries(connaissements(), received, upper_commodity=True))
+
+    # Parsing, mapping and rendering happen BL by BL
+    with instrument.stage("render"):
+        count = append_fields(doc, entries, engine)
+    instrument.count("rows", count)
+    instrument.count_document(doc)
+    if received:
+        unmatched = len(set(received) - seen)
+        if unmatched:
+            print(f"{unmatched} tally BL(s) not found in {json_path}")
+
+    save_document(doc, output_docx)
+
 if __name__ == "__main__":
     # Ensure book1.xlsx exists in your directory
     # excel_to_docx_custom("book1.xlsx", output_docx="entries.docx")
@@ -4,19 +4,12 @@ from docx.shared import Pt, Inches , Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
 
-def format_entry_docx(doc, row):
-    client = str(row.get("client", "")).strip()
-    commodity = str(row.get("type", "")).strip() or "Units + Package"
-    nb_colis = row.get("qte") or 00
-    tonnage = row.get("poids") or 0.0
-    rec_qty = row.get("rec_qty") or 00
-    
-    # tonnage_str = f"{ tonnage:06.2f}"
-    # tonnage_str = f"{  tonnage}"
-    tonnage_str = f"{tonnage:.2f}".lstrip("0") if tonnage < 1 else f"{tonnage:.2f}"
+import instrument
+import tally
 
-    manifest_qty_str = f"{int(nb_colis):02d}"
-    rec_str = f"{int(rec_qty):02d}"
+def format_entry_docx(doc, entry):
+    # entry is a tally.Entry (client, commodity, qty_str, tonnage_str, rec_str)
+    client, commodity, manifest_qty_str, tonnage_str, rec_str = entry
     damaged_str=str("00")
 
     # tonnage_str = str(tonnage)
@@ -100,19 +93,31 @@ def format_entry_docx(doc, row):
     # blank line after table
     doc.add_paragraph()
 
-def excel_to_docx_custom(input_excel, sheet_name=None, template_path=None, output_docx="output.docx"):
-    df = pd.read_excel(input_excel, sheet_name=sheet_name, engine="openpyxl")
-    doc = Document(template_path) if template_path else Document()
-
-    style = doc.styles["Normal"]
-    font = style.font
-    font.name = "Calibri (Corps)"
-    font.size = Pt(12)
-
-    for idx, row in df.iterrows():
-        format_entry_docx(doc, row)
-
-    doc.save(output_docx)
+@instrument.pipeline("bored", "output_docx")
+def excel_to_docx_custom(input_excel, sheet_name=None, template_path=None, output_docx="output.docx", streaming=False):
+    if streaming:
+        # Read-only openpyxl rows, rendered as they are read
+        entries = tally.iter_entries(input_excel, sheet_name, default_commodity="Units + Package")
+    else:
+        with instrument.stage("load"):
+            df = pd.read_excel(input_excel, sheet_name=sheet_name, engine="openpyxl")
+        with instrument.stage("prepare"):
+            entries = tally.prepare_frame(df, default_commodity="Units + Package")
+    with instrument.stage("load"):
+        doc = Document(template_path) if template_path else Document()
+
+        style = doc.styles["Normal"]
+        font = style.font
+        font.name = "Calibri (Corps)"
+        font.size = Pt(12)
+
+    with instrument.stage("render"):
+        for entry in entries:
+            format_entry_docx(doc, entry)
+    instrument.count_document(doc)
+
+    with instrument.stage("save"):
+        doc.save(output_docx)
     print(f"Saved {output_docx}")
 
 if __name__ == "__main__":
@@ -2,16 +2,16 @@ import pandas as pd
 from docx import Document
 from docx.shared import Pt
 
+import instrument
+import tally
+
 def format_lines(row):
     """Return a list of lines (strings) for one entry, given a dataframe row."""
-    client = str(row.get("Client", "")).strip()
-    commodity = str(row.get("Marchandise", "")).strip()
-    nb_colis = row.get("nombre colis", "")
-    tonnage = row.get("Poids brute", "")
-    
-    # Convert to string, maybe formatting decimals
-    nb_str = str(nb_colis)
-    tonnage_str = str(tonnage)
+    # Missing cells (None when streaming, NaN from pandas) as empty text
+    client = tally.cell_text(row.get("Client"))
+    commodity = tally.cell_text(row.get("Marchandise"))
+    nb_str = tally.cell_text(row.get("nombre colis"))
+    tonnage_str = tally.cell_text(row.get("Poids brute"))
     
     lines = []
     lines.append("=*=*=*=*=*=*=*=*=*=*=*=*=*=*=*=*=*=")
@@ -23,9 +23,17 @@ def format_lines(row):
     lines.append("=*=*=*=*=*=*=*=*=*=*=*=*=*=*=*=*=*=")
     return lines
 
-def excel_to_docx(input_excel, sheet_name=None, output_docx="output.docx"):
+@instrument.pipeline("boredereau", "output_docx")
+def excel_to_docx(input_excel, sheet_name=None, output_docx="output.docx", streaming=False):
     # Load Excel
-    df = pd.read_excel(input_excel, sheet_name=sheet_name)
+    if streaming:
+        # Read-only openpyxl rows (dicts keyed by header), rendered as they are read
+        rows = tally.iter_sheet_rows(input_excel, sheet_name, columns=None)
+    else:
+        with instrument.stage("load"):
+            df = pd.read_excel(input_excel, sheet_name=sheet_name)
+        # Blank rows are skipped, as when streaming
+        rows = (row for idx, row in df.dropna(how="all").iterrows())
     
     # Create Word document
     doc = Document()
@@ -38,18 +46,21 @@ def excel_to_docx(input_excel, sheet_name=None, output_docx="output.docx"):
     font.size = Pt(11)
     
     # For each row, add the entry
-    for idx, row in df.iterrows():
-        lines = format_lines(row)
-        for line in lines:
-            # Add a paragraph for each line
-            p = doc.add_paragraph(line)
-            # Optionally enforce formatting (e.g. no extra spacing)
-            # p.paragraph_format.space_after = Pt(0)
-        # Add a blank paragraph / line between entries
-        doc.add_paragraph("")  
+    with instrument.stage("render"):
+        for row in rows:
+            lines = format_lines(row)
+            for line in lines:
+                # Add a paragraph for each line
+                p = doc.add_paragraph(line)
+                # Optionally enforce formatting (e.g. no extra spacing)
+                # p.paragraph_format.space_after = Pt(0)
+            # Add a blank paragraph / line between entries
+            doc.add_paragraph("")  
+    instrument.count_document(doc)
     
     # Save the document
-    doc.save(output_docx)
+    with instrument.stage("save"):
+        doc.save(output_docx)
     print(f"Saved {output_docx}")
 
 if __name__ == "__main__":
@@ -1,11 +1,17 @@
 import pandas as pd
 from docx import Document
-from docx.shared import Pt, Inches , Cm
+from docx.shared import Pt, Inches , Cm, Emu, Twips
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
 from docx.table import Table
 from docx.document import Document as DocType # Type hinting for clarity
 
+import instrument
+import tally
+
+# A 10pt Courier New character is roughly ~70000 EMUs wide.
+EMUS_PER_CHAR = 70000
+
 # --- New Helper Function for Space Calculation ---
 
 def calculate_char_width(doc: DocType, table: Table, font_name="Courier New", font_size_pt=10):
@@ -19,8 +25,7 @@ def calculate_char_width(doc: DocType, table: Table, font_name="Courier New", fo
     # and a monospaced character is roughly 6-7 points wide at 10pt size.
     # We use a simple divisor to convert width (in EMUs) to character count.
     # 914400 EMUs = 1 Inch. 
-    # A 10pt character is roughly ~70000 EMUs wide.
-    EMUS_PER_CHAR = 70000 
+    # A 10pt character is roughly ~70000 EMUs wide (EMUS_PER_CHAR).
     
     # Get the columns object from the table
     columns = table.columns 
@@ -95,22 +100,16 @@ def convert_and_delete_table(document: DocType, table: Table):
 
 # --- Modified Original Function to Return the Table ---
 
-def format_entry_docx(doc: DocType, row: pd.Series) -> Table:
+def prepare_entries(df: pd.DataFrame) -> list:
+    """Column-wise preparation of the tally sheet into tally.Entry tuples."""
+    return tally.prepare_frame(df, default_commodity="Units + Package", keep_zero_tonnage=True)
+
+def format_entry_docx(doc: DocType, entry: tally.Entry) -> Table:
     """
     Creates a formatted table entry in the document and returns the created Table object.
-    (Content generation logic remains the same)
+    `entry` is a tally.Entry produced by prepare_entries.
     """
-    client = str(row.get("client", "")).strip()
-    commodity = str(row.get("type", "")).strip() or "Units + Package"
-    nb_colis = row.get("qte") or 00
-    tonnage = row.get("poids") or 0.0
-    rec_qty = row.get("rec_qty") or 00
-    
-    tonnage_str = f"{tonnage:.2f}".lstrip("0") if tonnage < 1 and tonnage > 0 else f"{tonnage:.2f}"
-    tonnage_str = f"{tonnage_str}"
-
-    manifest_qty_str = f"{int(nb_colis):02d}"
-    rec_str = f"{int(rec_qty):02d}"
+    client, commodity, manifest_qty_str, tonnage_str, rec_str = entry
     damaged_str=str("00")
 
     # create table with 2 columns for labels/values
@@ -174,28 +173,89 @@ def format_entry_docx(doc: DocType, row: pd.Series) -> Table:
     return table # Return the table object
 
 
-def excel_to_docx_custom(input_excel, sheet_name=None, template_path=None, output_docx="output.docx", convert_tables=True):
+# --- Direct Text Layout (no intermediate table) ---
+
+def text_column_widths(document: DocType, cols=2):
+    """
+    Character widths calculate_char_width would find on a freshly added
+    table: python-docx splits the block width evenly over the columns.
+    """
+    width_emus = Twips(Emu(document._block_width // cols).twips)
+    return [max(int(width_emus / EMUS_PER_CHAR), 10)] * cols
+
+def entry_cell_texts(entry: tally.Entry) -> list:
+    """The stripped cell texts of the table format_entry_docx builds, row by row."""
+    client, commodity, manifest_qty_str, tonnage_str, rec_str = entry
+    damaged_str=str("00")
+    return [
+        [f"Receiver : {client}".strip(), f"Commodity : {commodity}".strip()],
+        [f"Manifested Quantity : {manifest_qty_str} UNIT + PACKAGE".strip(), f"Tonnage : {tonnage_str} Mt".strip()],
+        [f"Received:        {damaged_str} Packaging damaged on board".strip(), ""],
+        [f"Total Received:    {rec_str}".strip(), ""],
+        ["The Quantity Will Be confirmed after delivery Cargo.", ""],
+    ]
+
+def format_entry_text(document: DocType, entry: tally.Entry, column_widths: list):
+    """
+    Emits the same padded Courier New paragraphs as format_entry_docx followed
+    by convert_and_delete_table, straight from the entry data.
+    """
+    for cells in entry_cell_texts(entry):
+        final_row_text = "".join(
+            f'{content:<{width}}'[:width] for content, width in zip(cells, column_widths)
+        )
+        if final_row_text.strip():
+            p = document.add_paragraph(final_row_text)
+            run = p.runs[0]
+            run.font.name = "Courier New"
+            run.font.size = Pt(10)
+    document.add_paragraph()
+
+@instrument.pipeline("brd", "output_docx")
+def excel_to_docx_custom(input_excel, sheet_name=None, template_path=None, output_docx="output.docx", convert_tables=True, streaming=False, direct_text=False):
+    """
+    convert_tables=True turns each entry table into space-padded text;
+    direct_text=True produces that same text without building the tables.
+    """
     # Load data and document
-    df = pd.read_excel(input_excel, sheet_name=sheet_name, engine="openpyxl")
-    doc = Document(template_path) if template_path else Document()
+    if streaming:
+        # Read-only openpyxl rows, rendered as they are read
+        entries = tally.iter_entries(input_excel, sheet_name, default_commodity="Units + Package", keep_zero_tonnage=True)
+    else:
+        with instrument.stage("load"):
+            df = pd.read_excel(input_excel, sheet_name=sheet_name, engine="openpyxl")
+        with instrument.stage("prepare"):
+            entries = prepare_entries(df)
+    with instrument.stage("load"):
+        doc = Document(template_path) if template_path else Document()
 
-    # Set base style
-    style = doc.styles["Normal"]
-    font = style.font
-    font.name = "Calibri (Corps)"
-    font.size = Pt(12)
+        # Set base style
+        style = doc.styles["Normal"]
+        font = style.font
+        font.name = "Calibri (Corps)"
+        font.size = Pt(12)
 
     # 1. Loop and process each entry
-    for idx, row in df.iterrows():
-        # Step A: Create the table and get the object reference
-        new_table = format_entry_docx(doc, row)
-        
-        # Step B: Immediately convert the table to space-padded text and delete the table
-        if convert_tables:
-            convert_and_delete_table(doc, new_table)
+    if convert_tables and direct_text:
+        with instrument.stage("render"):
+            column_widths = text_column_widths(doc)
+            for entry in entries:
+                format_entry_text(doc, entry, column_widths)
+    else:
+        for entry in entries:
+            # Step A: Create the table and get the object reference
+            with instrument.stage("render"):
+                new_table = format_entry_docx(doc, entry)
+            
+            # Step B: Immediately convert the table to space-padded text and delete the table
+            if convert_tables:
+                with instrument.stage("post-process"):
+                    convert_and_delete_table(doc, new_table)
+    instrument.count_document(doc)
 
     # 2. Save the document
-    doc.save(output_docx)
+    with instrument.stage("save"):
+        doc.save(output_docx)
     print(f"Saved {output_docx}")
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Commodity classifier for the bordereau entries.
+#
+# The rules live in commodity_rules.json, in priority order: the first rule
+# having any keyword contained in the (upper-cased) `type` column wins, an
+# empty type uses "empty" and anything else "fallback". Templates may use
+# {raw} (the type itself), {commodity} (the resolved name) and, in "total",
+# {rec} (the formatted received quantity).
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "commodity_rules.json")
+
+Commodity = namedtuple("Commodity", "rule commodity received_lines total_prefix total_suffix")
+
+_FIELD = re.compile(r"\{(raw|commodity)\}")
+
+
+def _fill(template, values):
+    return _FIELD.sub(lambda m: values[m.group(1)], template)
+
+
+class CommodityClassifier:
+    def __init__(self, rules):
+        self.rules = rules["rules"]
+        self.empty = rules["empty"]
+        self.fallback = rules["fallback"]
+        self.version = hashlib.sha256(
+            json.dumps(rules, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+
+        # One combined pattern; the lookahead reports a match at every
+        # position, and at each position the alternation tries keywords in
+        # rule order, so the smallest rule index over all matches is the
+        # rule the old if/elif chain would have picked.
+        self._rule_of = {}
+        alternatives = []
+        for index, rule in enumerate(self.rules):
+            for keyword in rule["keywords"]:
+                self._rule_of.setdefault(keyword, index)
+                alternatives.append(re.escape(keyword))
+        self._pattern = re.compile("(?=(%s))" % "|".join(alternatives)) if alternatives else None
+
+        self.classify = lru_cache(maxsize=1024)(self._classify)
+
+    def match(self, raw_commodity):
+        """Return the first rule matching `raw_commodity`, or None."""
+        if self._pattern is None:
+            return None
+        best = None
+        for m in self._pattern.finditer(raw_commodity):
+            index = self._rule_of[m.group(1)]
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return None if best is None else self.rules[best]
+
+    def _classify(self, raw_commodity):
+        """Classify an upper-cased, stripped commodity description."""
+        if not raw_commodity:
+            rule = self.empty
+        else:
+            rule = self.match(raw_commodity) or self.fallback
+
+        values = {"raw": raw_commodity}
+        values["commodity"] = _fill(rule["commodity"], values)
+        received_lines = tuple(_fill(line, values) for line in rule["received"])
+        before, _, after = rule["total"].partition("{rec}")
+        return Commodity(
+            rule["name"], values["commodity"], received_lines,
+            _fill(before, values), _fill(after, values),
+        )
+
+    def describe(self, raw_commodity, rec_str):
+        """Return (commodity, received_lines, total_rec_str) for one entry."""
+        c = self.classify(raw_commodity)
+        return c.commodity, list(c.received_lines), f"{c.total_prefix}{rec_str}{c.total_suffix}"
+
+
+def load_rules(path=RULES_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return CommodityClassifier(json.load(f))
+
+
+_default = None
+
+
+def default_classifier():
+    global _default
+    if _default is None:
+        _default = load_rules()
+    return _default
+
+
+if __name__ == "__main__":
+    import sys
+
+    classifier = default_classifier()
+    print(f"Rules version {classifier.version}")
+    for raw in sys.argv[1:]:
+        commodity, received_lines, total_rec_str = classifier.describe(raw.strip().upper(), "00")
+        print(f"{raw!r} -> {commodity} | {total_rec_str} | {received_lines}")
@@ -0,0 +1,219 @@
+from copy import deepcopy
+from xml.sax.saxutils import escape
+
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.shared import Cm, Emu
+
+# Raw-OOXML emitter for the borderau2026 entries.
+#
+# Produces exactly the XML that borderau2026.format_entry_docx builds through
+# the python-docx object model (table + "=*" separator paragraph), but as text
+# fragments that are parsed in chunks and dropped straight into the body.
+
+ENTRIES_PER_CHUNK = 200
+
+# Bump whenever the emitted XML changes (invalidates render_cache entries)
+FORMAT_VERSION = "1"
+
+JC_LEFT = '<w:pPr><w:jc w:val="left"/></w:pPr>'
+BOLD = '<w:b/>'
+AGENCY_FB = '<w:rFonts w:ascii="Agency FB" w:hAnsi="Agency FB"/>'
+
+W_T = qn("w:t")
+XML_SPACE = qn("xml:space")
+
+CM_5 = Cm(5).twips
+CM_9 = Cm(9).twips
+CM_12 = Cm(12).twips
+CM_25 = Cm(25).twips
+CM_30 = Cm(30).twips
+
+TBL_PR = (
+    '<w:tblPr><w:tblW w:type="auto" w:w="0"/><w:jc w:val="center"/>'
+    '<w:tblLayout w:type="autofit"/>'
+    '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+    'w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>'
+)
+# The fixed runs, as run_xml writes them
+RECEIVED_LABEL = f'<w:r><w:rPr>{BOLD}</w:rPr><w:t xml:space="preserve">Received:    </w:t></w:r>'
+FINAL_LINE = f"<w:p><w:r><w:rPr>{BOLD}</w:rPr><w:t>The Quantity Will Be confirmed after delivery Cargo.</w:t></w:r></w:p>"
+SEPARATOR = f'<w:p><w:pPr><w:jc w:val="center"/></w:pPr><w:r><w:rPr>{BOLD}</w:rPr><w:t>{"=*" * 29}</w:t></w:r></w:p>'
+
+
+def run_xml(text, rpr=""):
+    """Return a <w:r> the way python-docx `add_run(text)` writes it."""
+    content = []
+    buf = []
+    for char in text:
+        if char == "\t" or char in "\r\n":
+            if buf:
+                content.append(t_xml("".join(buf)))
+                buf = []
+            content.append("<w:tab/>" if char == "\t" else "<w:br/>")
+        else:
+            buf.append(char)
+    if buf:
+        content.append(t_xml("".join(buf)))
+    if not rpr and not content:
+        return "<w:r/>"
+    rpr = f"<w:rPr>{rpr}</w:rPr>" if rpr else ""
+    return f"<w:r>{rpr}{''.join(content)}</w:r>"
+
+
+def t_xml(text):
+    if len(text.strip()) < len(text):
+        return f'<w:t xml:space="preserve">{escape(text)}</w:t>'
+    return f"<w:t>{escape(text)}</w:t>"
+
+
+def cell_xml(width, paragraphs):
+    return f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr>{paragraphs}</w:tc>'
+
+
+def grid_width(doc):
+    """Width (twips) python-docx gives each column of a new 2-column table."""
+    return Emu(doc._block_width // 2).twips
+
+
+def entry_xml(fields, grid_w):
+    """
+    Return the <w:tbl> + separator <w:p> of one entry as an XML string.
+    `fields` is the tuple returned by borderau2026.entry_fields.
+    """
+    client, commodity, manifest_qty_str, tonnage_str, received_lines, total_rec_str = fields
+
+    # Row 0: Receiver / Commodity
+    receiver = f"<w:p>{JC_LEFT}{run_xml('Receiver : ', BOLD)}{run_xml(client)}</w:p>"
+    comm = (
+        f"<w:p>{JC_LEFT}{run_xml('Commodity : ', AGENCY_FB + BOLD)}"
+        f"{run_xml(commodity, AGENCY_FB)}</w:p>"
+    )
+    row0 = cell_xml(CM_9, receiver) + cell_xml(CM_9, comm)
+
+    # Row 1: Manifested Quantity / Tonnage
+    manifested = (
+        f"<w:p>{JC_LEFT}{run_xml('Manifested Quantity : ', BOLD)}"
+        f"{run_xml(f'{manifest_qty_str} {commodity}')}</w:p>"
+    )
+    tonnage = f"<w:p>{JC_LEFT}{run_xml('Tonnage : ', BOLD)}{run_xml(f'{tonnage_str} Mt')}</w:p>"
+    row1 = cell_xml(CM_12, manifested) + cell_xml(CM_5, tonnage)
+
+    # Row 2: one "Received:" paragraph per line
+    received = "".join(
+        f"<w:p>{JC_LEFT}{RECEIVED_LABEL}{run_xml(line)}</w:p>" for line in received_lines
+    ) or "<w:p/>"
+    empty = cell_xml(grid_w, "<w:p/>")
+    row2 = cell_xml(CM_30, received) + empty
+
+    # Row 3: Total Received
+    total = f"<w:p>{JC_LEFT}{run_xml('Total Received: ', BOLD)}{run_xml(f' {total_rec_str}')}</w:p>"
+    row3 = cell_xml(CM_12, total) + empty
+
+    # Row 4: Final line
+    row4 = cell_xml(CM_25, FINAL_LINE) + empty
+
+    return (
+        f"<w:tbl>{TBL_PR}<w:tblGrid>"
+        f'<w:gridCol w:w="{grid_w}"/><w:gridCol w:w="{grid_w}"/></w:tblGrid>'
+        f"<w:tr>{row0}</w:tr><w:tr>{row1}</w:tr><w:tr>{row2}</w:tr>"
+        f"<w:tr>{row3}</w:tr><w:tr>{row4}</w:tr></w:tbl>{SEPARATOR}"
+    )
+
+
+def insert_fragments(doc, fragments):
+    """Parse joined XML fragments once and insert them before the body's sectPr."""
+    body = doc.element.body
+    wrapper = parse_xml(f"<w:body {nsdecls('w')}>{''.join(fragments)}</w:body>")
+    sectPr = body.sectPr
+    for element in list(wrapper):
+        if sectPr is not None:
+            sectPr.addprevious(element)
+        else:
+            body.append(element)
+
+
+def append_entries(doc, entries, chunk_size=ENTRIES_PER_CHUNK):
+    """Append one entry per item of `entries` (entry_fields tuples) to `doc`."""
+    grid_w = grid_width(doc)
+    chunk = []
+    count = 0
+    for fields in entries:
+        chunk.append(entry_xml(fields, grid_w))
+        count += 1
+        if len(chunk) >= chunk_size:
+            insert_fragments(doc, chunk)
+            chunk = []
+    if chunk:
+        insert_fragments(doc, chunk)
+    return count
+
+
+class StampCache:
+    """
+    Precompiled entry tables ("stamps"), built once per layout and cloned per row.
+
+    The commodity layouts only differ in text and in the number of "Received:"
+    lines, so a stamp is keyed by that number. Each stamp remembers which
+    <w:t> nodes hold variable text; rendering a row is a deepcopy plus a
+    handful of text assignments.
+    """
+
+    def __init__(self, grid_w):
+        self.grid_w = grid_w
+        self._stamps = {}
+        self._separator = parse_xml(f"<w:body {nsdecls('w')}>{SEPARATOR}</w:body>")[0]
+
+    def stamp(self, n_lines):
+        if n_lines not in self._stamps:
+            slots = [f"@@{i}@@" for i in range(5 + n_lines)]
+            fields = (slots[0], slots[1], slots[2], slots[3], slots[5:], slots[4])
+            tbl = parse_xml(f"<w:body {nsdecls('w')}>{entry_xml(fields, self.grid_w)}</w:body>")[0]
+            positions = {}
+            for i, t in enumerate(tbl.iter(W_T)):
+                positions.setdefault(t.text, []).append(i)
+            # Manifested Quantity reads "@@2@@ @@1@@": the whole run is one slot
+            order = [
+                positions["@@0@@"], positions["@@1@@"], positions["@@2@@ @@1@@"],
+                positions["@@3@@ Mt"], positions[" @@4@@"],
+            ] + [positions[s] for s in slots[5:]]
+            self._stamps[n_lines] = (tbl, [i for (i,) in order])
+        return self._stamps[n_lines]
+
+    def render(self, fields):
+        """Return the (tbl, separator) elements of one entry."""
+        client, commodity, manifest_qty_str, tonnage_str, received_lines, total_rec_str = fields
+        texts = [
+            client, commodity, f"{manifest_qty_str} {commodity}",
+            f"{tonnage_str} Mt", f" {total_rec_str}",
+        ] + list(received_lines)
+        if not all(texts) or any(c in text for text in texts for c in "\t\r\n"):
+            # Empty runs and tabs/breaks change the run structure itself
+            wrapper = parse_xml(f"<w:body {nsdecls('w')}>{entry_xml(fields, self.grid_w)}</w:body>")
+            return wrapper[0], wrapper[1]
+
+        tbl, slots = self.stamp(len(received_lines))
+        tbl = deepcopy(tbl)
+        nodes = list(tbl.iter(W_T))
+        for index, text in zip(slots, texts):
+            t = nodes[index]
+            t.text = text
+            if len(text.strip()) < len(text):
+                t.set(XML_SPACE, "preserve")
+        return tbl, deepcopy(self._separator)
+
+
+def append_stamped_entries(doc, entries):
+    """Same output as append_entries, rendered by cloning per-layout stamps."""
+    body = doc.element.body
+    sectPr = body.sectPr
+    stamps = StampCache(grid_width(doc))
+    count = 0
+    for fields in entries:
+        for element in stamps.render(fields):
+            if sectPr is not None:
+                sectPr.addprevious(element)
+            else:
+                body.append(element)
+        count += 1
+    return count
@@ -0,0 +1,279 @@
+import argparse
+import sys
+
+# Single command line entry point for the scripts of this repository:
+#
+#   python epj.py render source.xlsx -o entries.docx -t template.docx
+#   python epj.py render input.json --tally tally.xlsx -o entries.docx
+#   python epj.py batch calls/ -o output -w 4
+#   python epj.py flatten input.json -o Manifest_Full_Detail.xlsx --cache
+#   python epj.py flatten input.json -o Manifest_Sheets.xlsx --mode normalized
+#   python epj.py ingest manifests.sqlite calls/*.json
+#   python epj.py query manifests.sqlite --chassis LZG3843601077779
+#   python epj.py render manifests.sqlite --escale DJI202500346 -o entries.docx
+#   python epj.py fill src.docx Book1.xlsx --prefix output
+#   python epj.py tables-to-text entries.docx --mode padded
+#   python epj.py watch inbox -o output
+#   python epj.py serve --port 8080
+#
+# Only argparse is imported at startup: pandas, python-docx and openpyxl
+# are imported by the subcommand that runs, so --help and argument errors
+# answer immediately (see benchmarks/bench_startup.py). --report,
+# --profile and --trace-memory write a per-stage report next to the output
+# (see instrument.py).
+
+LAYOUTS = ("borderau2026", "brd", "bored", "brdfirst", "boredereau")
+
+
+def _sheet(value):
+    return int(value) if value.isdigit() else value
+
+
+def _add_store_filters(p):
+    p.add_argument("--escale", default=None, help="manifest store: only this numero_escale")
+    p.add_argument("--client", default=None, help="manifest store: only this client_final (any case)")
+    p.add_argument("--since", default=None, help="manifest store: date_manifeste from (2025, 2025-06-01...)")
+    p.add_argument("--until", default=None, help="manifest store: date_manifeste before")
+
+
+def _where(args):
+    where = {"numero_escale": args.escale, "client": args.client, "since": args.since, "until": args.until}
+    return {k: v for k, v in where.items() if v is not None} or None
+
+
+def cmd_render(args):
+    import importlib
+
+    import manifest_store
+
+    if args.input.lower().endswith(".json") or manifest_store.is_store(args.input):
+        # Manifest straight to bordereau, received quantities from --tally
+        import borderau2026
+
+        borderau2026.manifest_to_docx(
+            args.input, template_path=args.template, output_docx=args.output,
+            tally_excel=args.tally, tally_sheet=args.sheet, engine=args.engine, where=_where(args),
+        )
+        return
+    module = importlib.import_module(args.layout)
+    if args.layout == "boredereau":
+        module.excel_to_docx(args.input, sheet_name=args.sheet, output_docx=args.output, streaming=args.streaming)
+        return
+    options = {}
+    if args.layout == "borderau2026":
+        options = {"engine": args.engine, "cache": args.cache, "workers": args.workers}
+    elif args.layout == "brd":
+        options = {"direct_text": args.direct_text}
+    module.excel_to_docx_custom(
+        args.input, sheet_name=args.sheet, template_path=args.template,
+        output_docx=args.output, streaming=args.streaming, **options,
+    )
+
+
+def cmd_batch(args):
+    import batch
+
+    summary = batch.run_batch(
+        args.inputs, args.output_dir, template_path=args.template, workers=args.workers, engine=args.engine,
+    )
+    return 1 if summary["failed"] else 0
+
+
+def cmd_flatten(args):
+    import json_to_excel
+
+    if args.mode == "dataframe":
+        json_to_excel.extract_to_excel_flattened(args.input, args.output, streaming=args.streaming)
+    elif args.mode == "normalized":
+        json_to_excel.extract_to_excel_normalized(
+            args.input, args.output, cache=args.cache or bool(args.cache_dir), cache_dir=args.cache_dir,
+        )
+    else:
+        rows = json_to_excel.extract_to_excel_write_only(
+            args.input, args.output, cache=args.cache or bool(args.cache_dir), cache_dir=args.cache_dir,
+            where=_where(args),
+        )
+        print(f"{rows} rows written to {args.output}")
+
+
+def cmd_ingest(args):
+    import manifest_store
+
+    manifest_store.ingest(args.store, args.files, batch_size=args.batch_size)
+
+
+def cmd_query(args):
+    import json
+
+    import manifest_store
+
+    with manifest_store.ManifestStore(args.store) as store:
+        if args.chassis:
+            rows = store.find_chassis(args.chassis)
+        elif args.tonnage:
+            rows = store.tonnage_by_client(**(_where(args) or {}))
+        elif args.escales:
+            rows = store.escales()
+        else:
+            rows = store.find_bls(num_bl=args.bl, **(_where(args) or {}))
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=1))
+        return
+    if rows:
+        print("\t".join(rows[0]))
+        for row in rows:
+            print("\t".join("" if v is None else str(v) for v in row.values()))
+    print(f"{len(rows)} row(s)")
+
+
+def cmd_fill(args):
+    import repbor
+
+    repbor.fill_from_excel_using_template(
+        args.template, args.excel, output_prefix=args.prefix, workers=args.workers, bundle=args.bundle,
+    )
+
+
+def cmd_tables_to_text(args):
+    import tables_to_text
+
+    results = tables_to_text.convert_files(args.files, mode=args.mode, in_place=args.in_place, workers=args.workers)
+    return 1 if any(r["error"] for r in results) else 0
+
+
+def cmd_watch(args):
+    import watch
+
+    watch.watch(
+        args.inbox, args.output_dir, templates=args.template or watch.DEFAULT_TEMPLATES,
+        workers=args.workers, engine=args.engine, settle=args.settle, poll_interval=args.poll,
+        use_inotify=not args.no_inotify, log_path=args.log,
+    )
+
+
+def cmd_serve(args):
+    import asyncio
+
+    import service
+
+    options = {"workers": args.workers, "max_queue": args.max_queue, "timeout": args.timeout}
+    if args.template:
+        options["templates"] = args.template
+    try:
+        asyncio.run(service.serve(args.host, args.port, **options))
+    except KeyboardInterrupt:
+        print("Stopped")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="epj", description="Bordereau and manifest tools.")
+    parser.add_argument("--report", action="store_true",
+                        help="write <output>.report.json with per-stage timings and counts")
+    parser.add_argument("--profile", default="", metavar="STAGES",
+                        help="comma-separated stages (load,prepare,render,post-process,save) to run under cProfile")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also record tracemalloc peaks per stage in the report (slows the run down)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("render", help="render a tally sheet (.xlsx), a manifest (.json) or a manifest store into a bordereau .docx")
+    p.add_argument("input")
+    p.add_argument("-o", "--output", default="entries.docx")
+    p.add_argument("--tally", default=None, help="manifest input: tally sheet with N° BL and rec_qty columns")
+    p.add_argument("-t", "--template", default=None, help="template .docx (default: blank document)")
+    p.add_argument("-s", "--sheet", type=_sheet, default=0, help="sheet index or name")
+    p.add_argument("--layout", choices=LAYOUTS, default="borderau2026")
+    p.add_argument("--engine", choices=["docx", "xml", "stamp"], default="stamp", help="borderau2026 renderer")
+    p.add_argument("--direct-text", action="store_true", help="brd: write the padded text without building tables")
+    p.add_argument("--streaming", action="store_true", help="read the sheet row by row")
+    p.add_argument("--cache", default=None, help="borderau2026 render cache file")
+    p.add_argument("-w", "--workers", type=int, default=1, help="borderau2026 worker processes")
+    _add_store_filters(p)
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("batch", help="render a directory or glob of tally sheets / manifests over a process pool")
+    p.add_argument("inputs", nargs="+", help="directories, glob patterns or files")
+    p.add_argument("-o", "--output-dir", default="output")
+    p.add_argument("-t", "--template", default="template.docx")
+    p.add_argument("-w", "--workers", type=int, default=None)
+    p.add_argument("--engine", choices=["docx", "xml", "stamp"], default="stamp")
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("flatten", help="flatten a manifest .json (or a manifest store) into an .xlsx")
+    p.add_argument("input")
+    p.add_argument("-o", "--output", default="Manifest_Full_Detail.xlsx")
+    p.add_argument("--mode", choices=["write-only", "dataframe", "normalized"], default="write-only",
+                   help="normalized: BLs, Vehicles, Containers and Clients sheets")
+    p.add_argument("--streaming", action="store_true", help="dataframe mode: parse the json incrementally")
+    p.add_argument("--cache", action="store_true",
+                   help="write-only/normalized modes: reuse the parsed manifest columns (manifest_cache)")
+    p.add_argument("--cache-dir", default=None, help="manifest cache folder (default $EPJ_CACHE_DIR or ~/.cache/epj)")
+    _add_store_filters(p)
+    p.set_defaults(func=cmd_flatten)
+
+    p = sub.add_parser("ingest", help="load manifests (.json) into a manifest store (SQLite)")
+    p.add_argument("store")
+    p.add_argument("files", nargs="+")
+    p.add_argument("--batch-size", type=int, default=1000, help="rows per executemany")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("query", help="look up BLs, vehicles and tonnages across the calls of a manifest store")
+    p.add_argument("store")
+    p.add_argument("--chassis", default=None, help="which call(s) and BL a chassis number came with")
+    p.add_argument("--bl", default=None, help="BLs with this num_bl")
+    p.add_argument("--tonnage", action="store_true", help="BLs and tons per client")
+    p.add_argument("--escales", action="store_true", help="list the calls in the store")
+    p.add_argument("--json", action="store_true", help="print the rows as JSON")
+    _add_store_filters(p)
+    p.set_defaults(func=cmd_query)
+
+    p = sub.add_parser("fill", help="fill a template once per Excel row (repbor)")
+    p.add_argument("template")
+    p.add_argument("excel")
+    p.add_argument("--prefix", default="filled")
+    p.add_argument("-w", "--workers", type=int, default=1)
+    p.add_argument("--bundle", default=None, help="write all documents into this .zip")
+    p.set_defaults(func=cmd_fill)
+
+    p = sub.add_parser("tables-to-text", help="convert all tables of .docx files to text")
+    p.add_argument("files", nargs="+")
+    p.add_argument("--mode", choices=["tabs", "padded"], default="tabs")
+    p.add_argument("--in-place", action="store_true")
+    p.add_argument("-w", "--workers", type=int, default=None)
+    p.set_defaults(func=cmd_tables_to_text)
+
+    p = sub.add_parser("watch", help="render every file dropped into an inbox folder")
+    p.add_argument("inbox")
+    p.add_argument("-o", "--output-dir", default="output")
+    p.add_argument("-t", "--template", action="append", default=None,
+                   help="template kept loaded (repeatable, default: template.docx, template1.docx, template2.docx)")
+    p.add_argument("-w", "--workers", type=int, default=None)
+    p.add_argument("--engine", choices=["docx", "xml", "stamp"], default="stamp")
+    p.add_argument("--settle", type=float, default=1.0, help="seconds a file must stay unchanged")
+    p.add_argument("--poll", type=float, default=1.0, help="polling interval without inotify")
+    p.add_argument("--no-inotify", action="store_true")
+    p.add_argument("--log", default=None, help="append one JSON line per job to this file")
+    p.set_defaults(func=cmd_watch)
+
+    p = sub.add_parser("serve", help="local HTTP service rendering bordereaux and flattened manifests")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("-p", "--port", type=int, default=8080)
+    p.add_argument("-t", "--template", action="append", default=None, help="template kept loaded (repeatable)")
+    p.add_argument("-w", "--workers", type=int, default=None)
+    p.add_argument("--max-queue", type=int, default=8, help="requests allowed to wait for a worker")
+    p.add_argument("--timeout", type=float, default=120.0, help="seconds before answering 504")
+    p.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.report or args.profile or args.trace_memory:
+        import instrument
+
+        instrument.configure(profile=[s for s in args.profile.split(",") if s], trace_memory=args.trace_memory)
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
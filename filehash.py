@@ -0,0 +1,26 @@
+import hashlib
+import io
+import os
+
+CHUNK_SIZE = 1 << 20
+
+
+def file_sha256(path_or_file):
+    """
+    Hex sha256 of a file given as a path or a binary file-like object
+    (read from the start; the position of a file object is kept).
+    """
+    h = hashlib.sha256()
+    if isinstance(path_or_file, (str, os.PathLike)):
+        with open(path_or_file, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                h.update(chunk)
+    elif isinstance(path_or_file, io.BytesIO):
+        h.update(path_or_file.getbuffer())
+    else:
+        position = path_or_file.tell()
+        path_or_file.seek(0)
+        for chunk in iter(lambda: path_or_file.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+        path_or_file.seek(position)
+    return h.hexdigest()
@@ -0,0 +1,213 @@
+import contextlib
+import json
+import os
+import sys
+import time
+
+# Per-stage timings for the pipelines (borderau2026, brd, bored, brdfirst,
+# boredereau, repbor, json_to_excel, tables_to_text).
+#
+# Each entry point runs inside session(pipeline, output) and marks its
+# stages with stage("load") / stage("prepare") / stage("render") /
+# stage("post-process") / stage("save"), and its counts with count().
+# Nothing is recorded unless reporting is switched on, by configure() (the
+# --report / --profile / --trace-memory options of epj.py) or by the
+# environment:
+#
+#   EPJ_REPORT=1            write <output>.report.json next to each output
+#   EPJ_PROFILE=render,save also run those stages under cProfile
+#   EPJ_TRACE_MEMORY=1      also record tracemalloc peaks
+#
+# The report holds wall time and calls per stage, the counts, and the top
+# functions of every profiled stage (the full profile is dumped to
+# <output>.<stage>.prof for snakeviz/pstats). tracemalloc slows allocation
+# heavy stages several times over, so memory peaks are opt-in: timings
+# from a run with trace_memory on are not comparable with the others, and
+# peak_bytes is null when it is off.
+
+PROFILE_TOP = 25
+
+_settings = {
+    "enabled": bool(os.environ.get("EPJ_REPORT")),
+    "profile": {s for s in os.environ.get("EPJ_PROFILE", "").split(",") if s},
+    "trace_memory": bool(os.environ.get("EPJ_TRACE_MEMORY")),
+}
+_active = None
+_null = contextlib.nullcontext()
+
+
+def configure(enabled=True, profile=(), trace_memory=False):
+    """Switch reporting on or off for the sessions started afterwards."""
+    _settings["enabled"] = enabled or bool(profile) or trace_memory
+    _settings["profile"] = set(profile)
+    _settings["trace_memory"] = trace_memory
+
+
+def enabled():
+    return _settings["enabled"] or bool(_settings["profile"]) or _settings["trace_memory"]
+
+
+class Session:
+    def __init__(self, pipeline, output=None, profile=(), trace_memory=False):
+        self.pipeline = pipeline
+        self.output = output if isinstance(output, (str, os.PathLike)) else None
+        self.profile = set(profile)
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.counts = {}
+        self.profiles = {}
+        self.start = None
+        self.report = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        import tracemalloc
+
+        info = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0, "peak_bytes": 0})
+        profiler = None
+        if name in self.profile:
+            import cProfile
+
+            profiler = self.profiles.setdefault(name, cProfile.Profile())
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            info["seconds"] += time.perf_counter() - start
+            info["calls"] += 1
+            if self.trace_memory and tracemalloc.is_tracing():
+                info["peak_bytes"] = max(info["peak_bytes"], tracemalloc.get_traced_memory()[1])
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def __enter__(self):
+        if self.trace_memory:
+            import tracemalloc
+
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        peak = 0
+        if self.trace_memory:
+            import tracemalloc
+
+            peak = max((s["peak_bytes"] for s in self.stages.values()), default=0)
+            if self._started_tracing:
+                tracemalloc.stop()
+        self.report = {
+            "pipeline": self.pipeline,
+            "output": os.fspath(self.output) if self.output else None,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "status": "error" if exc_type else "ok",
+            "error": f"{exc_type.__name__}: {exc}" if exc_type else None,
+            "seconds": round(seconds, 6),
+            "stages": {
+                name: {
+                    "seconds": round(s["seconds"], 6), "calls": s["calls"],
+                    "share": round(s["seconds"] / seconds, 4) if seconds else 0.0,
+                    "peak_bytes": s["peak_bytes"] if self.trace_memory else None,
+                }
+                for name, s in self.stages.items()
+            },
+            "counts": self.counts,
+            "tracemalloc_peak_bytes": peak if self.trace_memory else None,
+            "profiles": {name: self._profile_summary(name, p) for name, p in self.profiles.items()},
+        }
+        if self.output:
+            path = f"{os.fspath(self.output)}.report.json"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.report, f, indent=1)
+            stages = ", ".join(f"{n} {s['seconds']:.2f}s" for n, s in self.report["stages"].items())
+            print(f"Report {path}: {seconds:.2f} s ({stages})")
+        return False
+
+    def _profile_summary(self, name, profiler):
+        import pstats
+
+        if self.output:
+            profiler.dump_stats(f"{os.fspath(self.output)}.{name}.prof")
+        stats = pstats.Stats(profiler)
+        rows = []
+        for (filename, line, function), (cc, nc, tt, ct, _) in stats.stats.items():
+            rows.append({
+                "function": f"{os.path.basename(filename)}:{line}({function})",
+                "calls": nc, "tottime": round(tt, 6), "cumtime": round(ct, 6),
+            })
+        rows.sort(key=lambda r: r["cumtime"], reverse=True)
+        return rows[:PROFILE_TOP]
+
+
+@contextlib.contextmanager
+def session(pipeline, output=None):
+    """
+    Report on the pipeline run inside the block (no-op unless reporting is
+    on, or when a session is already active).
+    """
+    global _active
+    if _active is not None or not enabled():
+        yield _active
+        return
+    _active = Session(pipeline, output, _settings["profile"], _settings["trace_memory"])
+    try:
+        with _active:
+            yield _active
+    finally:
+        _active = None
+
+
+def pipeline(name, *output_args):
+    """
+    Decorator for an entry point: run it inside session(name, output), the
+    output being the first of its `output_args` arguments that is set.
+    """
+    import functools
+    import inspect
+
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is not None or not enabled():
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            output = next((bound.arguments[a] for a in output_args if bound.arguments.get(a)), None)
+            with session(name, output):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def stage(name):
+    """Time a stage of the active session (a shared no-op context otherwise)."""
+    return _null if _active is None else _active.stage(name)
+
+
+def count(name, n=1):
+    if _active is not None:
+        _active.count(name, n)
+
+
+def count_document(doc):
+    """Count the body tables and all paragraphs of a python-docx Document."""
+    if _active is None:
+        return
+    from docx.oxml.ns import qn
+
+    body = doc.element.body
+    _active.count("tables", len(body.findall(qn("w:tbl"))))
+    _active.count("paragraphs", sum(1 for _ in body.iter(qn("w:p"))))
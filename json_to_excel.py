@@ -1,70 +1,456 @@
 import json
-import pandas as pd
+import re
+from openpyxl import Workbook
 
-def extract_to_excel_flattened(json_path, output_path):
-    # Load JSON
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+import instrument
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+_NUMBER_CHARS = frozenset(".eE+-0123456789")
+
+class _IncrementalReader:
+    """
+    Minimal pull parser over a text file: reads it in chunks and decodes one
+    JSON value at a time with the (C-accelerated) json scanner, so only the
+    current value has to fit in memory.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        # Read at least as much as is buffered so large values do not
+        # turn into many small reads and copies.
+        data = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character ('' at end of file)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} at offset {self.pos}, found {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+                # A number at the buffer end may be cut short ("1" of "12",
+                # "1" of "1.5" or "1e3"): read on until something follows it
+                if self.eof or (end < len(self.buf) and self.buf[end] not in _NUMBER_CHARS):
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+def _iter_connaissements_pure(f, chunk_size=CHUNK_SIZE, max_escales=None):
+    reader = _IncrementalReader(f, chunk_size)
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    count = 0
+    while True:
+        escale = {}
+        reader.expect("{")
+        if reader.peek() == "}":
+            reader.pos += 1
+        else:
+            while True:
+                key = reader.value()
+                reader.expect(":")
+                if key == "connaissements" and reader.peek() == "[":
+                    reader.expect("[")
+                    if reader.peek() == "]":
+                        reader.pos += 1
+                    else:
+                        while True:
+                            yield escale, reader.value()
+                            if reader.expect(",]") == "]":
+                                break
+                else:
+                    escale[key] = reader.value()
+                if reader.expect(",}") == "}":
+                    break
+        count += 1
+        if count == max_escales or reader.expect(",]") == "]":
+            break
+
+def _build_ijson_value(events, prefix, event, value):
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    if event not in ("start_map", "start_array"):
+        return builder.value
+    end = "end_map" if event == "start_map" else "end_array"
+    for p, e, v in events:
+        builder.event(e, v)
+        if p == prefix and e == end:
+            break
+    return builder.value
+
+def _iter_connaissements_ijson(f, max_escales=None):
+    events = ijson.parse(f, use_float=True)
+    escale = None
+    key = None
+    count = 0
+    for prefix, event, value in events:
+        if prefix == "item":
+            if event == "start_map":
+                escale = {}
+            elif event == "map_key":
+                key = value
+            elif event == "end_map":
+                count += 1
+                if count == max_escales:
+                    return
+        elif prefix == "item.connaissements.item":
+            yield escale, _build_ijson_value(events, prefix, event, value)
+        elif prefix == "item.connaissements":
+            continue
+        elif prefix == f"item.{key}":
+            escale[key] = _build_ijson_value(events, prefix, event, value)
+
+def iter_connaissements(json_path, chunk_size=CHUNK_SIZE, max_escales=None):
+    """
+    Yield (escale, bl) for every connaissement of every escale in the root
+    array, reading the manifest incrementally: memory stays proportional to
+    one BL (with its roulants/conteneurs) instead of the whole file.
+    `escale` holds the escale header fields read so far (the manifests put
+    "connaissements" last, so that is the full header). max_escales stops
+    after that many escales of the root array, empty ones included.
+
+    Uses ijson's C backend when it is installed, else the json module's
+    scanner on a chunked buffer.
+    """
+    if ijson is not None and ijson.backend in ("yajl2_c", "yajl2_cffi"):
+        with open(json_path, 'rb') as f:
+            yield from _iter_connaissements_ijson(f, max_escales)
+    else:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            yield from _iter_connaissements_pure(f, chunk_size, max_escales)
+
+@instrument.pipeline("flatten", "output_path")
+def extract_to_excel_flattened(json_path, output_path, streaming=False):
+    """
+    streaming=True parses the manifest incrementally (iter_connaissements)
+    and flattens the BLs of every escale, not only the first one.
+
+    BLs are read as compact records (records.py) and rows kept as tuples
+    (flatten_bl_rows), not as one dict per row.
+    """
+    import records
+
+    if streaming:
+        bls = records.iter_records(json_path)
+    else:
+        # The manifest data is in the first element of the root list
+        bls = records.iter_first_escale(json_path)
 
-    # The manifest data is in the first element of the root list
-    connaissements = data[0].get('connaissements', [])
-    
     final_rows = []
 
-    for bl in connaissements:
-        # Get basic BL info
-        bl_no = bl.get('num_bl')
-        client = bl.get('client_final')
-        description = bl.get('description_marchandise')
-        
-        # Convert Global Weight from KG to Tons (poids_brute / 1000)
-        poids_kg = bl.get('poids_brute')
-        weight_tons = (poids_kg / 1000) if poids_kg is not None else 0
-        
-        # 1. Add the BL Header Row
-        row = {
-            "BL Number": bl_no,
-            "Client": client,
-            "Description": description,
-            "Weight (Tons)": weight_tons,
-            "Quantity": bl.get('nombre_colis'),
-            "Item Type": bl.get('conditionnement'),
-            "Brand": "-",
-            "Model": "-",
-            "Chassis/Serial": "-",
-        }
-        final_rows.append(row)
-        
-        # 2. Add individual vehicle/unit rows if they exist
-        items = bl.get('roulants', [])
-        if items:
-            for item in items:
-                item_row = {
-                    "BL Number": bl_no,
-                    "Client": client,
-                    "Description": description,
-                    "Item Type": item.get('type'),
-                    "Quantity": "-",
-                    "Weight (Tons)": "-",
-                    "Brand": item.get('marque'),
-                    "Model": item.get('modele'),
-                    "Chassis/Serial": item.get('numero_chassis'),
-                }
-                final_rows.append(item_row)
-
-    # Create DataFrame and Export
-    df = pd.DataFrame(final_rows)
+    with instrument.stage("prepare"):
+        for bl in bls:
+            final_rows.extend(flatten_bl_rows(bl))
+    instrument.count("rows", len(final_rows))
+
+    # Create DataFrame and Export (pandas is only needed by this export)
+    with instrument.stage("render"):
+        import pandas as pd
+
+        df = pd.DataFrame(final_rows, columns=COLUMNS)
     
     # Optional: Round the Weight column to 3 decimal places for clean display
     # df['Weight (Tons)'] = pd.to_numeric(df['Weight (Tons)'], errors='coerce').round(3)
 
-    df.to_excel(output_path, index=False)
+    with instrument.stage("save"):
+        df.to_excel(output_path, index=False)
     
     print(f"Extraction finished.")
     print(f"Total rows generated: {len(df)}")
     print(f"Weights have been converted to Tons.")
     print(f"Saved to: {output_path}")
 
+COLUMNS = [
+    "BL Number", "Client", "Description", "Weight (Tons)", "Quantity",
+    "Item Type", "Brand", "Model", "Chassis/Serial",
+]
+
+def flatten_bl_rows(bl):
+    """
+    The flattened rows of one BL as tuples in COLUMNS order: the BL row,
+    then one row per roulant, "-" in the columns that do not apply.
+    """
+    bl_no = bl.get('num_bl')
+    client = bl.get('client_final')
+    description = bl.get('description_marchandise')
+    poids_kg = bl.get('poids_brute')
+    weight_tons = (poids_kg / 1000) if poids_kg is not None else 0
+
+    yield (bl_no, client, description, weight_tons, bl.get('nombre_colis'),
+           bl.get('conditionnement'), "-", "-", "-")
+
+    for item in bl.get('roulants') or []:
+        yield (bl_no, client, description, "-", "-", item.get('type'),
+               item.get('marque'), item.get('modele'), item.get('numero_chassis'))
+
+def flatten_bl_typed(bl):
+    """
+    Same rows as flatten_bl_rows, with typed cells: weight as float tons
+    and quantity as int on the BL row, empty (None) where flatten_bl_rows
+    writes "-".
+    """
+    bl_no = bl.get('num_bl')
+    client = bl.get('client_final')
+    description = bl.get('description_marchandise')
+    poids_kg = bl.get('poids_brute')
+    weight_tons = float(poids_kg) / 1000 if poids_kg is not None else 0.0
+    quantity = bl.get('nombre_colis')
+
+    yield (bl_no, client, description, weight_tons,
+           int(quantity) if quantity is not None else None,
+           bl.get('conditionnement'), None, None, None)
+
+    for item in bl.get('roulants') or []:
+        yield (bl_no, client, description, None, None, item.get('type'),
+               item.get('marque'), item.get('modele'), item.get('numero_chassis'))
+
+def flatten_columns(columns):
+    """
+    Same rows as flatten_bl_typed over every BL, read from the columns of a
+    cached manifest (manifest_cache.load) instead of parsed JSON.
+    """
+    bls = columns.bls
+    bl_no = bls.values('num_bl')
+    client = bls.values('client_final')
+    description = bls.values('description_marchandise')
+    poids_kg = bls.values('poids_brute')
+    quantity = bls.values('nombre_colis')
+    packaging = bls.values('conditionnement')
+
+    roulants = columns.roulants
+    offsets = columns.child_offsets("roulants").tolist()
+    # Roulants are stored in BL order, so each BL owns a contiguous slice
+    item_type = roulants.values('type')
+    brand = roulants.values('marque')
+    model = roulants.values('modele')
+    chassis = roulants.values('numero_chassis')
+
+    for i in range(len(bls)):
+        yield (bl_no[i], client[i], description[i],
+               float(poids_kg[i]) / 1000 if poids_kg[i] is not None else 0.0,
+               int(quantity[i]) if quantity[i] is not None else None,
+               packaging[i], None, None, None)
+        for j in range(offsets[i], offsets[i + 1]):
+            yield (bl_no[i], client[i], description[i], None, None, item_type[j],
+                   brand[j], model[j], chassis[j])
+
+def iter_flat_rows(json_path, cache=False, cache_dir=None, where=None):
+    """
+    Typed flattened rows of every BL; cache=True goes through
+    manifest_cache. json_path may also be a manifest store (manifest_store),
+    read for the BLs selected by `where` (numero_escale, client, since...).
+    """
+    if cache:
+        import manifest_cache
+
+        with instrument.stage("load"):
+            columns = manifest_cache.load(json_path, cache_dir)
+        return flatten_columns(columns)
+    import manifest_store
+
+    pairs = manifest_store.iter_connaissements(json_path, **(where or {}))
+    return (row for escale, bl in pairs for row in flatten_bl_typed(bl))
+
+@instrument.pipeline("flatten", "output_path")
+def extract_to_excel_write_only(json_path, output_path, cache=False, cache_dir=None, where=None):
+    """
+    Constant-memory version of extract_to_excel_flattened: BLs are parsed
+    incrementally (all escales) and each row is appended to an openpyxl
+    write-only worksheet as soon as it is produced, so neither the rows nor
+    a DataFrame are ever held in memory.
+
+    cache=True reads the manifest from its columnar cache (manifest_cache),
+    parsing it only the first time. A manifest store as json_path is read
+    for the BLs selected by `where` (see iter_flat_rows).
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(COLUMNS)
+
+    total = 0
+    try:
+        rows = iter_flat_rows(json_path, cache, cache_dir, where)
+        # Parsing, flattening and writing the rows are interleaved
+        with instrument.stage("render"):
+            for row in rows:
+                ws.append(row)
+                total += 1
+    except Exception:
+        # Finish the half-written sheet stream cleanly before re-raising
+        ws.close()
+        raise
+    instrument.count("rows", total)
+
+    with instrument.stage("save"):
+        wb.save(output_path)
+
+    print(f"Extraction finished.")
+    print(f"Total rows generated: {total}")
+    print(f"Saved to: {output_path}")
+    return total
+
+# Normalized workbook: one sheet per kind of record instead of one sheet
+# with "-" placeholders. Each column is (header, table, field), the table
+# being "escale", "bl" or the sheet's own records.
+BL_SHEET = [
+    ("Escale", "escale", "numero_escale"), ("Vessel", "escale", "nom_navire"),
+    ("BL Number", "bl", "num_bl"), ("Client", "bl", "client_final"),
+    ("Description", "bl", "description_marchandise"), ("Packaging", "bl", "conditionnement"),
+    ("Quantity", "bl", "nombre_colis"), ("Weight (Tons)", "bl", "poids_brute"),
+    ("Volume", "bl", "volume_marchandise"), ("Port of Loading", "bl", "port_chargement"),
+]
+VEHICLE_SHEET = [
+    ("BL Number", "bl", "num_bl"), ("Client", "bl", "client_final"),
+    ("Description", "bl", "description_marchandise"), ("Item Type", "roulants", "type"),
+    ("Brand", "roulants", "marque"), ("Model", "roulants", "modele"),
+    ("Chassis/Serial", "roulants", "numero_chassis"), ("Weight (kg)", "roulants", "poids"),
+]
+CONTAINER_SHEET = [
+    ("BL Number", "bl", "num_bl"), ("Client", "bl", "client_final"),
+    ("Container", "conteneurs", "numero_conteneur"), ("Type", "conteneurs", "type_conteneur"),
+    ("Size", "conteneurs", "taille"), ("Weight (kg)", "conteneurs", "poids"),
+    ("Seal", "conteneurs", "numero_scelle"), ("Full/Empty", "conteneurs", "plein_vide"),
+    ("Reefer", "conteneurs", "indicateur_frigorifique"), ("Dangerous", "conteneurs", "indicateur_dangereux"),
+]
+CLIENT_SHEET = ["Client", "BLs", "Vehicles", "Containers", "Weight (Tons)"]
+
+def _sheet_columns(columns, spec, own, bl_rows):
+    """
+    The columns of one sheet as object arrays: fields of the sheet's own
+    table as they are, BL and escale fields taken at bl_rows (each record's
+    parent BL) in one vectorized take.
+    """
+    import numpy as np
+
+    escale_rows = columns.bls.take("escale", bl_rows) if "escale" in columns.bls.kinds else None
+    result = []
+    for header, table, field in spec:
+        if table == "escale":
+            rows = escale_rows.astype(np.int64) if escale_rows is not None else np.zeros(len(bl_rows), dtype=np.int64)
+            values = columns.escales.take(field, rows)
+        elif table == "bl":
+            values = columns.bls.take(field, bl_rows)
+        else:
+            values = own.take(field)
+        if field == "poids_brute":
+            values = np.array([None if v is None else float(v) / 1000 for v in values], dtype=object)
+        result.append(values)
+    return result
+
+def _client_summary(columns):
+    """Rows of the Clients sheet (heaviest first), from per-client bincounts."""
+    import numpy as np
+
+    bls = columns.bls
+    if not len(bls) or "client_final" not in bls.kinds:
+        return []
+    # Missing clients (code -1) land in bucket 0
+    codes = np.asarray(bls.array("client_final")).astype(np.int64) + 1
+    labels = [None] + bls.uniques("client_final").tolist()
+    size = len(labels)
+    weights = np.zeros(len(bls))
+    if "poids_brute" in bls.kinds:
+        weights = np.nan_to_num(np.asarray(bls.array("poids_brute"), dtype=np.float64))
+    counts = np.bincount(codes, minlength=size)
+    tons = np.bincount(codes, weights=weights, minlength=size) / 1000
+    vehicles = np.bincount(codes[columns.child_parents("roulants")], minlength=size)
+    containers = np.bincount(codes[columns.child_parents("conteneurs")], minlength=size)
+    order = np.lexsort((np.arange(size), -tons))
+    return [
+        (labels[i], int(counts[i]), int(vehicles[i]), int(containers[i]), float(tons[i]))
+        for i in order.tolist() if counts[i]
+    ]
+
+def normalized_sheets(columns):
+    """
+    {sheet name: (headers, columns)} of the normalized workbook, from the
+    columns of a manifest (manifest_cache). roulants and conteneurs are
+    exploded with their parent BL index (no loop over BLs), and the BL
+    sheet gets the vehicle and container counts per BL.
+    """
+    import numpy as np
+
+    bl_rows = np.arange(len(columns.bls))
+    bl_columns = _sheet_columns(columns, BL_SHEET, columns.bls, bl_rows)
+    bl_columns.append(columns.child_counts("roulants").astype(object))
+    bl_columns.append(columns.child_counts("conteneurs").astype(object))
+    sheets = {"BLs": ([h for h, _, _ in BL_SHEET] + ["Vehicles", "Containers"], bl_columns)}
+    for name, child, spec in (("Vehicles", "roulants", VEHICLE_SHEET), ("Containers", "conteneurs", CONTAINER_SHEET)):
+        parents = columns.child_parents(child)
+        sheets[name] = ([h for h, _, _ in spec], _sheet_columns(columns, spec, getattr(columns, child), parents))
+    clients = _client_summary(columns)
+    sheets["Clients"] = (CLIENT_SHEET, [list(c) for c in zip(*clients)] or [[] for _ in CLIENT_SHEET])
+    return {name: (headers, [c.tolist() if hasattr(c, "tolist") else c for c in cols])
+            for name, (headers, cols) in sheets.items()}
+
+@instrument.pipeline("flatten", "output_path")
+def extract_to_excel_normalized(json_path, output_path, cache=False, cache_dir=None):
+    """
+    Flatten a manifest (every escale) into one workbook with a BLs,
+    Vehicles, Containers and Clients sheet (normalized_sheets), written
+    column-wise as raw sheet XML (sheet_xml). cache=True reads the columns
+    from manifest_cache instead of parsing the JSON again.
+    Returns {sheet: rows}.
+    """
+    import manifest_cache
+    import sheet_xml
+
+    with instrument.stage("load"):
+        if cache:
+            columns = manifest_cache.load(json_path, cache_dir)
+        else:
+            columns = manifest_cache.load_uncached(json_path)
+
+    with instrument.stage("prepare"):
+        sheets = normalized_sheets(columns)
+
+    with instrument.stage("save"):
+        totals = sheet_xml.write_workbook(output_path, sheets)
+    for name, total in totals.items():
+        instrument.count(f"{name.lower()} rows", total)
+
+    print(f"Extraction finished.")
+    print("Rows per sheet: " + ", ".join(f"{name} {n}" for name, n in totals.items()))
+    print(f"Saved to: {output_path}")
+    return totals
+
 if __name__ == "__main__":
     # Ensure this matches your actual filename
     extract_to_excel_flattened('input.json', 'Manifest_Full_Detail.xlsx')
\ No newline at end of file
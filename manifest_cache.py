@@ -0,0 +1,290 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import filehash
+
+# Columnar cache of parsed manifests (input.json schema).
+#
+# The first load of a manifest parses it once (json_to_excel.iter_connaissements)
+# into four tables - escales, bls, roulants, conteneurs - stored column by
+# column as .npy files:
+#   - numbers as float64 (NaN when missing) or int64 when always present;
+#   - booleans as int8 (-1 when missing);
+#   - strings as int32 codes (-1 when missing) into a per-column table of
+#     the distinct values, so repeated clients/descriptions are stored once.
+# bls.escale, roulants.bl and conteneurs.bl are row numbers of the parent
+# table. Later loads memory-map the arrays instead of re-parsing the JSON.
+#
+# Entries are keyed by the sha256 of the file; an index of (path, size,
+# mtime) avoids re-hashing a file that has not been touched.
+
+FORMAT_VERSION = 1
+TABLES = ("escales", "bls", "roulants", "conteneurs")
+CHILDREN = ("roulants", "conteneurs")
+
+
+def default_cache_dir():
+    return os.environ.get("EPJ_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "epj", "manifests")
+
+
+class _TableBuilder:
+    """Collects the scalar fields of records column by column."""
+
+    def __init__(self):
+        self.columns = {}
+        self.rows = 0
+
+    def add(self, record, **extra):
+        values = {k: v for k, v in record.items() if not isinstance(v, (list, dict))}
+        values.update(extra)
+        for name, value in values.items():
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = [None] * self.rows
+            column.append(value)
+        self.rows += 1
+        for column in self.columns.values():
+            if len(column) < self.rows:
+                column.append(None)
+
+    def arrays(self):
+        """({array name: ndarray}, {column: kind}): one array per column, two for strings."""
+        arrays, kinds = {}, {}
+        for name, values in self.columns.items():
+            present = [v for v in values if v is not None]
+            numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present)
+            if present and all(isinstance(v, bool) for v in present):
+                arrays[name] = np.array([-1 if v is None else v for v in values], dtype=np.int8)
+                kinds[name] = "bool"
+            elif numeric and present and len(present) == len(values) and all(isinstance(v, int) for v in present):
+                arrays[name] = np.array(values, dtype=np.int64)
+                kinds[name] = "int"
+            elif numeric and present:
+                arrays[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+                kinds[name] = "float"
+            else:
+                codes = {}
+                arrays[f"{name}.codes"] = np.fromiter(
+                    (-1 if v is None else codes.setdefault(str(v), len(codes)) for v in values),
+                    dtype=np.int32, count=len(values),
+                )
+                arrays[f"{name}.values"] = np.array(list(codes), dtype=str)
+                kinds[name] = "str"
+        return arrays, kinds
+
+
+class Table:
+    """One cached table; columns are memory-mapped on first access."""
+
+    def __init__(self, directory, name, meta, arrays=None):
+        self.directory = directory
+        self.name = name
+        self.rows = meta["rows"]
+        self.kinds = meta["columns"]
+        self._arrays = arrays if arrays is not None else {}
+
+    def __len__(self):
+        return self.rows
+
+    def _load(self, suffix):
+        if suffix not in self._arrays:
+            path = os.path.join(self.directory, f"{self.name}.{suffix}.npy")
+            self._arrays[suffix] = np.load(path, mmap_mode="r")
+        return self._arrays[suffix]
+
+    def array(self, column):
+        """Numbers as they are stored; for string columns, the codes."""
+        if column not in self.kinds:
+            raise KeyError(f"{self.name} has no column {column}")
+        return self._load(f"{column}.codes" if self.kinds[column] == "str" else column)
+
+    def uniques(self, column):
+        """Distinct values of a string column (indexed by its codes)."""
+        return self._load(f"{column}.values")
+
+    def take(self, column, rows=None):
+        """
+        The column (or its `rows`, an index array) as a NumPy array of
+        Python values, None where missing: string codes are looked up in
+        one vectorized take.
+        """
+        kind = self.kinds.get(column)
+        count = self.rows if rows is None else len(rows)
+        if kind is None:
+            return np.full(count, None, dtype=object)
+        values = self.array(column)
+        if rows is not None:
+            values = np.asarray(values)[rows]
+        if kind == "str":
+            # code -1 picks the trailing None
+            lookup = np.append(self.uniques(column).astype(object), None)
+            return lookup[values]
+        values = np.asarray(values).astype(object)
+        if kind == "float":
+            values[np.isnan(values.astype(np.float64))] = None
+        elif kind == "bool":
+            values = np.array([None if v < 0 else bool(v) for v in values], dtype=object)
+        return values
+
+    def values(self, column):
+        """The column as a list of Python values (None when missing)."""
+        kind = self.kinds.get(column)
+        if kind is None:
+            return [None] * self.rows
+        if kind == "str":
+            uniques = self.uniques(column).tolist() + [None]
+            # code -1 picks the trailing None
+            return [uniques[c] for c in self.array(column).tolist()]
+        values = self.array(column).tolist()
+        if kind == "float":
+            return [None if v != v else v for v in values]
+        if kind == "bool":
+            return [None if v < 0 else bool(v) for v in values]
+        return values
+
+    def to_frame(self, columns=None):
+        """A pandas DataFrame, string columns as Categoricals built from the codes."""
+        import pandas as pd
+
+        data = {}
+        for column in columns or self.kinds:
+            if self.kinds.get(column) == "str":
+                data[column] = pd.Categorical.from_codes(np.asarray(self.array(column)), self.uniques(column))
+            elif column in self.kinds:
+                data[column] = np.asarray(self.array(column))
+            else:
+                data[column] = pd.Series([None] * self.rows, dtype=object)
+        return pd.DataFrame(data)
+
+
+class ManifestColumns:
+    def __init__(self, directory, meta=None, arrays=None):
+        self.directory = directory
+        if meta is None:
+            with open(os.path.join(directory, "columns.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        self.meta = meta
+        self.source = meta.get("source")
+        for name in TABLES:
+            table_arrays = None if arrays is None else arrays[name]
+            setattr(self, name, Table(directory, name, meta["tables"][name], table_arrays))
+
+    def child_offsets(self, child):
+        """offsets[i]:offsets[i + 1] are the rows of `child` belonging to BL i."""
+        return np.concatenate(([0], np.cumsum(self.child_counts(child))))
+
+    def child_parents(self, child):
+        """BL row of every row of `child` (roulants or conteneurs)."""
+        table = getattr(self, child)
+        if "bl" not in table.kinds:
+            return np.zeros(0, dtype=np.int64)
+        return np.asarray(table.array("bl"))
+
+    def child_counts(self, child):
+        """Number of `child` rows per BL."""
+        return np.bincount(self.child_parents(child), minlength=len(self.bls))
+
+
+def parse(json_path):
+    """
+    Parse a manifest into columns held in memory (nothing cached):
+    returns ({table: {array name: ndarray}}, meta).
+    """
+    import json_to_excel
+
+    builders = {name: _TableBuilder() for name in TABLES}
+    current = None
+    for escale, bl in json_to_excel.iter_connaissements(json_path):
+        if escale is not current:
+            current = escale
+            builders["escales"].add(escale)
+        bl_row = builders["bls"].rows
+        builders["bls"].add(bl, escale=builders["escales"].rows - 1)
+        for child in CHILDREN:
+            for item in bl.get(child) or []:
+                builders[child].add(item, bl=bl_row)
+
+    meta = {"format": FORMAT_VERSION, "tables": {}}
+    arrays = {}
+    for name, builder in builders.items():
+        arrays[name], columns = builder.arrays()
+        meta["tables"][name] = {"rows": builder.rows, "columns": columns}
+    return arrays, meta
+
+
+def build(json_path, directory):
+    """Parse a manifest into the columnar layout under `directory`."""
+    arrays, meta = parse(json_path)
+    for table, table_arrays in arrays.items():
+        for name, array in table_arrays.items():
+            np.save(os.path.join(directory, f"{table}.{name}.npy"), array)
+    return meta
+
+
+def load_uncached(json_path):
+    """ManifestColumns of a manifest parsed now, kept in memory only."""
+    arrays, meta = parse(json_path)
+    meta["source"] = {"path": os.path.abspath(json_path)}
+    return ManifestColumns(None, meta, arrays)
+
+
+def load(json_path, cache_dir=None, refresh=False):
+    """
+    Columns of a manifest, from the cache when the same file content was
+    loaded before, else parsed once and cached. Returns ManifestColumns.
+    """
+    cache_dir = cache_dir or default_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+    source = os.path.abspath(json_path)
+    st = os.stat(source)
+    index_path = os.path.join(cache_dir, "index.json")
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+    except (FileNotFoundError, ValueError):
+        index = {}
+
+    known = index.get(source)
+    if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+        digest = known["sha256"]
+    else:
+        digest = filehash.file_sha256(source)
+    directory = os.path.join(cache_dir, f"{digest[:32]}.v{FORMAT_VERSION}")
+
+    if refresh or not os.path.exists(os.path.join(directory, "columns.json")):
+        tmp = tempfile.mkdtemp(prefix=".build-", dir=cache_dir)
+        try:
+            meta = build(source, tmp)
+            meta["source"] = {"path": source, "sha256": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            with open(os.path.join(tmp, "columns.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=1)
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+            os.replace(tmp, directory)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    if index.get(source) != {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}:
+        index[source] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+        fd, tmp_index = tempfile.mkstemp(suffix=".json", dir=cache_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp_index, index_path)
+    return ManifestColumns(directory)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    for path in sys.argv[1:] or ["input.json"]:
+        start = time.perf_counter()
+        columns = load(path)
+        elapsed = time.perf_counter() - start
+        counts = ", ".join(f"{len(getattr(columns, t))} {t}" for t in TABLES)
+        print(f"{path}: {counts} in {elapsed * 1000:.1f} ms ({columns.directory})")
@@ -0,0 +1,318 @@
+import json
+import os
+import sqlite3
+import time
+
+import filehash
+import records
+
+# Local SQLite store of many manifests (input.json schema), for lookups
+# across calls without re-opening every file:
+#
+#   store = ManifestStore("manifests.sqlite")
+#   store.ingest("input.json")
+#   store.find_chassis("LGWEF4A58RH000001")      # which call a vehicle came in on
+#   store.find_bls(client="SAIB SAID SAREPLAST", since="2025")
+#   store.tonnage_by_client(since="2025")
+#
+# Tables: sources (one row per ingested file, by content hash), escales,
+# connaissements, roulants and conteneurs, with the columns of records.py
+# (keys outside them are kept as JSON in `extra`). num_bl, client_final
+# (case-insensitive), numero_chassis, numero_escale and imo_navire are
+# indexed. Files are ingested BL by BL with batched executemany inserts,
+# one transaction per file; ingesting a file again is a no-op, and a file
+# whose content changed replaces its previous rows.
+#
+# iter_connaissements() yields the same (escale, bl) pairs as
+# json_to_excel.iter_connaissements, so the flattening and bordereau tools
+# can read a selection of the store instead of a JSON file.
+
+BATCH_SIZE = 1000
+STORE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+TABLES = {
+    "escales": ("source_id", records.Escale),
+    "connaissements": ("escale_id", records.Connaissement),
+    "roulants": ("bl_id", records.Roulant),
+    "conteneurs": ("bl_id", records.Conteneur),
+}
+INDEXES = (
+    ("connaissements", "num_bl"),
+    ("connaissements", "client_final COLLATE NOCASE"),
+    ("connaissements", "escale_id"),
+    ("roulants", "numero_chassis"),
+    ("roulants", "bl_id"),
+    ("conteneurs", "numero_conteneur"),
+    ("conteneurs", "bl_id"),
+    ("escales", "numero_escale"),
+    ("escales", "imo_navire"),
+    ("escales", "source_id"),
+)
+
+
+def is_store(path):
+    return os.fspath(path).lower().endswith(STORE_SUFFIXES)
+
+
+def _row(record, record_id, parent_id):
+    extra = json.dumps(record.extra, ensure_ascii=False) if record.extra else None
+    return (record_id, parent_id, *(getattr(record, name) for name in record.FIELDS), extra)
+
+
+def _as_dict(columns, row):
+    """A row as the JSON object it came from: unset columns left out, extra merged back."""
+    data = {name: value for name, value in zip(columns, row) if value is not None}
+    extra = data.pop("extra", None)
+    if extra:
+        data.update(json.loads(extra))
+    return data
+
+
+class ManifestStore:
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            " id INTEGER PRIMARY KEY, path TEXT NOT NULL, sha256 TEXT NOT NULL UNIQUE,"
+            " size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, loaded_at REAL NOT NULL)"
+        )
+        for table, (parent, cls) in TABLES.items():
+            columns = ", ".join(cls.FIELDS)
+            self.db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                f"(id INTEGER PRIMARY KEY, {parent} INTEGER NOT NULL, {columns}, extra TEXT)"
+            )
+        for table, column in INDEXES:
+            name = f"{table}_{column.split()[0]}"
+            self.db.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Ingestion
+
+    def _next_id(self, table):
+        return self.db.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+    def _delete_source(self, source_id):
+        bls = "SELECT c.id FROM connaissements c JOIN escales e ON c.escale_id = e.id WHERE e.source_id = ?"
+        self.db.execute(f"DELETE FROM roulants WHERE bl_id IN ({bls})", (source_id,))
+        self.db.execute(f"DELETE FROM conteneurs WHERE bl_id IN ({bls})", (source_id,))
+        self.db.execute(
+            "DELETE FROM connaissements WHERE escale_id IN (SELECT id FROM escales WHERE source_id = ?)",
+            (source_id,),
+        )
+        self.db.execute("DELETE FROM escales WHERE source_id = ?", (source_id,))
+        self.db.execute("DELETE FROM sources WHERE id = ?", (source_id,))
+
+    def ingest(self, json_path, batch_size=BATCH_SIZE):
+        """
+        Load one manifest; returns {table: rows inserted} (empty when the
+        same content was already loaded).
+        """
+        path = os.path.abspath(json_path)
+        st = os.stat(path)
+        digest = filehash.file_sha256(path)
+        if self.db.execute("SELECT 1 FROM sources WHERE sha256 = ?", (digest,)).fetchone():
+            return {}
+
+        statements = {
+            table: f"INSERT INTO {table} VALUES ({', '.join('?' * (len(cls.FIELDS) + 3))})"
+            for table, (_, cls) in TABLES.items()
+        }
+        pending = {table: [] for table in TABLES}
+        counts = dict.fromkeys(TABLES, 0)
+
+        def add(table, row):
+            pending[table].append(row)
+            counts[table] += 1
+            if len(pending[table]) >= batch_size:
+                self.db.executemany(statements[table], pending[table])
+                pending[table].clear()
+
+        # One transaction per file: a failed ingest leaves nothing behind
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            for (old,) in self.db.execute("SELECT id FROM sources WHERE path = ?", (path,)).fetchall():
+                self._delete_source(old)
+            source_id = self.db.execute(
+                "INSERT INTO sources (path, sha256, size, mtime_ns, loaded_at) VALUES (?, ?, ?, ?, ?)",
+                (path, digest, st.st_size, st.st_mtime_ns, time.time()),
+            ).lastrowid
+            ids = {table: self._next_id(table) for table in TABLES}
+
+            escale = None
+            for bl in records.iter_records(path):
+                if bl.escale is not escale:
+                    escale = bl.escale
+                    escale_id = ids["escales"]
+                    ids["escales"] += 1
+                    add("escales", _row(escale, escale_id, source_id))
+                bl_id = ids["connaissements"]
+                ids["connaissements"] += 1
+                add("connaissements", _row(bl, bl_id, escale_id))
+                for child in ("roulants", "conteneurs"):
+                    for item in getattr(bl, child):
+                        add(child, _row(item, ids[child], bl_id))
+                        ids[child] += 1
+
+            for table, rows in pending.items():
+                if rows:
+                    self.db.executemany(statements[table], rows)
+        return counts
+
+    # Queries
+
+    def _query(self, sql, params=()):
+        cursor = self.db.execute(sql, params)
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    @staticmethod
+    def _where(numero_escale=None, client=None, since=None, until=None, imo=None, num_bl=None, source=None):
+        """
+        SQL conditions on escales e / connaissements c. since and until
+        compare date_manifeste as text, so "2025" or "2025-06-01" work
+        (until is exclusive); source is the path of an ingested file.
+        """
+        conditions, params = [], []
+        for sql, value in (
+            ("e.numero_escale = ?", numero_escale),
+            ("c.client_final = ? COLLATE NOCASE", client),
+            ("e.date_manifeste >= ?", since),
+            ("e.date_manifeste < ?", until),
+            ("e.imo_navire = ?", imo),
+            ("c.num_bl = ?", num_bl),
+            ("e.source_id IN (SELECT id FROM sources WHERE path = ?)", source and os.path.abspath(source)),
+        ):
+            if value is not None:
+                conditions.append(sql)
+                params.append(str(value))
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def find_chassis(self, numero_chassis):
+        """The call(s), BL and client each vehicle with this chassis number came with."""
+        return self._query(
+            "SELECT r.numero_chassis, r.marque, r.modele, r.type, c.num_bl, c.client_final,"
+            " e.numero_escale, e.nom_navire, e.imo_navire, e.date_manifeste, s.path AS source"
+            " FROM roulants r JOIN connaissements c ON r.bl_id = c.id"
+            " JOIN escales e ON c.escale_id = e.id JOIN sources s ON e.source_id = s.id"
+            " WHERE r.numero_chassis = ? ORDER BY e.date_manifeste",
+            (numero_chassis,),
+        )
+
+    def find_bls(self, **filters):
+        """BLs with their call; filters as in iter_connaissements."""
+        where, params = self._where(**filters)
+        return self._query(
+            "SELECT c.num_bl, c.client_final, c.description_marchandise, c.conditionnement,"
+            " c.nombre_colis, c.poids_brute, e.numero_escale, e.nom_navire, e.date_manifeste"
+            f" FROM connaissements c JOIN escales e ON c.escale_id = e.id{where}"
+            " ORDER BY e.date_manifeste, c.id",
+            params,
+        )
+
+    def tonnage_by_client(self, **filters):
+        """Number of BLs and total tons (poids_brute / 1000) per client, heaviest first."""
+        where, params = self._where(**filters)
+        return self._query(
+            "SELECT c.client_final, COUNT(*) AS bls, COUNT(DISTINCT e.id) AS escales,"
+            " COALESCE(SUM(c.poids_brute), 0) / 1000.0 AS tons"
+            f" FROM connaissements c JOIN escales e ON c.escale_id = e.id{where}"
+            " GROUP BY c.client_final ORDER BY tons DESC",
+            params,
+        )
+
+    def escales(self):
+        return self._query(
+            "SELECT e.numero_escale, e.nom_navire, e.imo_navire, e.date_manifeste, COUNT(c.id) AS bls,"
+            " s.path AS source FROM escales e JOIN sources s ON e.source_id = s.id"
+            " LEFT JOIN connaissements c ON c.escale_id = e.id GROUP BY e.id ORDER BY e.date_manifeste"
+        )
+
+    def iter_connaissements(self, **filters):
+        """
+        Yield (escale, bl) dicts like json_to_excel.iter_connaissements, for
+        the BLs matching numero_escale / client / since / until / imo /
+        num_bl / source; bl carries its "roulants" and "conteneurs" lists.
+        """
+        where, params = self._where(**filters)
+        join = " FROM connaissements c JOIN escales e ON c.escale_id = e.id" + where
+        bl_columns = ("id", "escale_id") + records.Connaissement.FIELDS + ("extra",)
+        bls = self.db.execute(f"SELECT {', '.join('c.' + n for n in bl_columns)}{join} ORDER BY c.id", params)
+
+        # Children come sorted by BL, so each one is a merge walk alongside the BLs
+        children = {}
+        for child in ("roulants", "conteneurs"):
+            columns = ("bl_id",) + TABLES[child][1].FIELDS + ("extra",)
+            cursor = self.db.execute(
+                f"SELECT {', '.join('x.' + n for n in columns)} FROM {child} x"
+                f" JOIN connaissements c ON x.bl_id = c.id JOIN escales e ON c.escale_id = e.id"
+                f"{where} ORDER BY x.bl_id, x.id",
+                params,
+            )
+            children[child] = (columns[1:], cursor, [next(cursor, None)])
+
+        escale_columns = ("id",) + records.Escale.FIELDS + ("extra",)
+        escale_id = escale = None
+        for row in bls:
+            bl_id = row[0]
+            if row[1] != escale_id:
+                escale_id = row[1]
+                header = self.db.execute(
+                    f"SELECT {', '.join(escale_columns)} FROM escales WHERE id = ?", (escale_id,)
+                ).fetchone()
+                escale = _as_dict(escale_columns[1:], header[1:])
+            bl = _as_dict(bl_columns[2:], row[2:])
+            for child, (columns, cursor, head) in children.items():
+                items = []
+                while head[0] is not None and head[0][0] == bl_id:
+                    items.append(_as_dict(columns, head[0][1:]))
+                    head[0] = next(cursor, None)
+                bl[child] = items
+            yield escale, bl
+
+
+def iter_connaissements(path, **filters):
+    """(escale, bl) pairs of a manifest .json, or of a store selected by `filters`."""
+    if is_store(path):
+        store = ManifestStore(path)
+        try:
+            yield from store.iter_connaissements(**filters)
+        finally:
+            store.close()
+    else:
+        if any(v is not None for v in filters.values()):
+            raise ValueError("filters only apply to a manifest store")
+        import json_to_excel
+
+        yield from json_to_excel.iter_connaissements(path)
+
+
+def ingest(store_path, json_paths, batch_size=BATCH_SIZE):
+    """Ingest several manifests into a store, printing one line per file."""
+    with ManifestStore(store_path) as store:
+        for json_path in json_paths:
+            start = time.perf_counter()
+            counts = store.ingest(json_path, batch_size)
+            if counts:
+                detail = ", ".join(f"{n} {table}" for table, n in counts.items())
+                print(f"{json_path}: {detail} in {time.perf_counter() - start:.2f} s")
+            else:
+                print(f"{json_path}: already in {store_path}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    ingest("manifests.sqlite", sys.argv[1:] or ["input.json"])
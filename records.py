@@ -0,0 +1,182 @@
+import sys
+
+# Compact record model of a manifest (input.json schema).
+#
+# json.load gives one dict per escale, BL, roulant and conteneur, each with
+# its own hash table of keys. These classes keep the same fields in
+# __slots__ (no per-object __dict__), and the loader interns the strings
+# that repeat from record to record (ports, conditionnement, clients,
+# descriptions, brands...) so each distinct value is stored once.
+#
+# Records answer get() like the dicts they replace, so flatten_bl_rows and
+# flatten_bl_typed (json_to_excel) take either. Missing fields are None;
+# keys outside FIELDS are kept in `extra` (None when there are none).
+# benchmarks/bench_records.py measures the memory per BL.
+
+
+class Record:
+    __slots__ = ("extra",)
+    FIELDS = ()
+    INTERNED = ()
+    CHILDREN = ()
+    KNOWN = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.KNOWN = frozenset(cls.FIELDS) | frozenset(cls.CHILDREN)
+
+    @classmethod
+    def from_dict(cls, data, strings=None):
+        """Build a record from a parsed JSON object; `strings` is the intern table."""
+        strings = {} if strings is None else strings
+        record = object.__new__(cls)
+        for name in cls.FIELDS:
+            value = data.get(name)
+            if name in cls.INTERNED and isinstance(value, str):
+                value = strings.setdefault(value, value)
+            setattr(record, name, value)
+        for name, child in cls.CHILDREN.items():
+            # An empty tuple is shared, so BLs without roulants cost nothing
+            items = data.get(name) or ()
+            setattr(record, name, tuple(child.from_dict(item, strings) for item in items))
+        unknown = data.keys() - cls.KNOWN
+        record.extra = {k: data[k] for k in data if k in unknown} if unknown else None
+        return record
+
+    def get(self, name, default=None):
+        if name in self.KNOWN:
+            value = getattr(self, name)
+        elif self.extra is not None:
+            value = self.extra.get(name)
+        else:
+            value = None
+        return default if value is None else value
+
+    def to_dict(self):
+        """The record as a plain dict (children as lists of dicts)."""
+        data = {name: getattr(self, name) for name in self.FIELDS}
+        for name in self.CHILDREN:
+            data[name] = [item.to_dict() for item in getattr(self, name)]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self):
+        key = getattr(self, self.FIELDS[0])
+        return f"{type(self).__name__}({self.FIELDS[0]}={key!r})"
+
+
+class Roulant(Record):
+    FIELDS = (
+        "matricule", "numero_chassis", "modele", "poids", "volume", "surface", "hauteur",
+        "type", "marque", "indicateur_frigorifique", "indicateur_dangereux", "classe",
+    )
+    INTERNED = frozenset((
+        "modele", "type", "marque", "indicateur_frigorifique", "indicateur_dangereux", "classe",
+    ))
+    CHILDREN = {}
+    __slots__ = FIELDS
+
+
+class Conteneur(Record):
+    FIELDS = (
+        "numero_conteneur", "type_conteneur", "taille", "poids", "numero_scelle",
+        "plein_vide", "indicateur_frigorifique", "indicateur_dangereux",
+    )
+    INTERNED = frozenset(("type_conteneur", "plein_vide", "indicateur_frigorifique", "indicateur_dangereux"))
+    CHILDREN = {}
+    __slots__ = FIELDS
+
+
+class Connaissement(Record):
+    FIELDS = (
+        "num_bl", "article", "sous_article", "port_chargement", "description_marchandise",
+        "conditionnement", "indicateur_dangereux", "nombre_colis", "nombre_tcs",
+        "nif_client_final", "client_final", "poids_brute", "volume_marchandise",
+        "adresse_client", "marque_roulant", "nombre_roulant",
+    )
+    INTERNED = frozenset((
+        "port_chargement", "description_marchandise", "conditionnement", "indicateur_dangereux",
+        "nif_client_final", "client_final", "adresse_client", "marque_roulant",
+    ))
+    CHILDREN = {"conteneurs": Conteneur, "roulants": Roulant}
+    __slots__ = FIELDS + tuple(CHILDREN) + ("escale",)
+
+    @classmethod
+    def from_dict(cls, data, strings=None, escale=None):
+        record = super().from_dict(data, strings)
+        record.escale = escale
+        return record
+
+
+class Escale(Record):
+    FIELDS = (
+        "numero_escale", "consignataire", "code_consignataire", "nom_navire", "imo_navire", "call_sign",
+        "num_voyage", "num_gros", "date_manifeste", "lieu_livraison", "manutentionnaire", "regime",
+        "type_manifeste",
+    )
+    INTERNED = frozenset((
+        "consignataire", "code_consignataire", "nom_navire", "imo_navire", "call_sign",
+        "lieu_livraison", "manutentionnaire", "regime", "type_manifeste",
+    ))
+    CHILDREN = {}
+    __slots__ = FIELDS + ("connaissements",)
+
+    @classmethod
+    def from_dict(cls, data, strings=None):
+        record = super().from_dict({k: v for k, v in data.items() if k != "connaissements"}, strings)
+        record.connaissements = [
+            Connaissement.from_dict(bl, strings, record) for bl in data.get("connaissements") or ()
+        ]
+        return record
+
+    def to_dict(self):
+        data = super().to_dict()
+        data["connaissements"] = [bl.to_dict() for bl in self.connaissements]
+        return data
+
+
+def iter_records(json_path, strings=None, max_escales=None):
+    """
+    Yield a Connaissement per BL of every escale (of the first `max_escales`
+    ones when set), read incrementally (json_to_excel.iter_connaissements);
+    bl.escale is the Escale record, shared by the BLs of the same escale.
+    """
+    import json_to_excel
+
+    strings = {} if strings is None else strings
+    current = None
+    escale = None
+    for header, bl in json_to_excel.iter_connaissements(json_path, max_escales=max_escales):
+        if header is not current:
+            current = header
+            escale = Escale.from_dict(header, strings)
+        yield Connaissement.from_dict(bl, strings, escale)
+
+
+def iter_first_escale(json_path):
+    """
+    The BLs of the first escale of the root array (none when it has no BL);
+    the rest of the file is not read.
+    """
+    return iter_records(json_path, max_escales=1)
+
+
+def load(json_path):
+    """
+    Every escale of a manifest as Escale records, with their BLs in
+    `connaissements`. Escales without any BL are left out.
+    """
+    escales = []
+    for bl in iter_records(json_path):
+        if not escales or escales[-1] is not bl.escale:
+            escales.append(bl.escale)
+        bl.escale.connaissements.append(bl)
+    return escales
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:] or ["input.json"]:
+        escales = load(path)
+        bls = sum(len(e.connaissements) for e in escales)
+        print(f"{path}: {len(escales)} escales, {bls} BLs")
@@ -0,0 +1,142 @@
+import hashlib
+import sqlite3
+import time
+
+import entry_xml
+import filehash
+
+# On-disk cache of rendered bordereau entries.
+#
+# Each entry's XML fragment (entry_xml.entry_xml) is stored under a hash of
+# the prepared row values, the commodity rules version, the template and
+# the emitter format, so re-running a corrected tally sheet only renders the
+# rows that changed. Fragments live in a single SQLite file; when it grows
+# past max_bytes the least recently used fragments are evicted.
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+BATCH_SIZE = 500
+
+
+def file_digest(path_or_file):
+    """sha256 of a template given as a path or a file-like object (None -> "default")."""
+    if path_or_file is None:
+        return "default"
+    return filehash.file_sha256(path_or_file)
+
+
+class RenderCache:
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS fragments ("
+            " key TEXT PRIMARY KEY, xml TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS fragments_last_used ON fragments (last_used)")
+        self.db.commit()
+
+    @staticmethod
+    def key(salt, values):
+        return hashlib.sha256("\x1f".join((salt,) + tuple(values)).encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Return {key: xml} for the cached keys and mark them as used."""
+        found = {}
+        keys = list(set(keys))
+        for i in range(0, len(keys), BATCH_SIZE):
+            chunk = keys[i:i + BATCH_SIZE]
+            marks = ",".join("?" * len(chunk))
+            found.update(self.db.execute(
+                f"SELECT key, xml FROM fragments WHERE key IN ({marks})", chunk
+            ))
+        if found:
+            now = time.time()
+            self.db.executemany(
+                "UPDATE fragments SET last_used = ? WHERE key = ?", [(now, k) for k in found]
+            )
+        return found
+
+    def put_many(self, fragments):
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO fragments (key, xml, size, last_used) VALUES (?, ?, ?, ?)",
+            [(k, xml, len(xml), now) for k, xml in fragments.items()],
+        )
+
+    def evict(self):
+        """Drop least recently used fragments until the cache fits in max_bytes."""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM fragments").fetchone()[0]
+        if total > self.max_bytes:
+            doomed = []
+            for key, size in self.db.execute("SELECT key, size FROM fragments ORDER BY last_used"):
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                total -= size
+            self.db.executemany("DELETE FROM fragments WHERE key = ?", doomed)
+            self.evicted += len(doomed)
+        self.db.commit()
+
+    def stats_line(self):
+        lookups = self.hits + self.misses
+        ratio = 100.0 * self.hits / lookups if lookups else 0.0
+        return (
+            f"Render cache: {self.hits}/{lookups} hits ({ratio:.1f}%), "
+            f"{self.misses} misses, {self.evicted} evicted"
+        )
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+def append_cached_entries(doc, entries, cache, template_key, render):
+    """
+    Append one entry per prepared tally.Entry, reusing cached fragments.
+    `render(entry, grid_w)` returns the XML of a row that is not cached.
+    """
+    import commodity_rules
+
+    grid_w = entry_xml.grid_width(doc)
+    salt = "|".join([
+        commodity_rules.default_classifier().version, template_key,
+        entry_xml.FORMAT_VERSION, str(grid_w),
+    ])
+
+    batch = []
+    count = 0
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= BATCH_SIZE:
+            count += _append_batch(doc, batch, cache, salt, grid_w, render)
+            batch = []
+    if batch:
+        count += _append_batch(doc, batch, cache, salt, grid_w, render)
+    cache.evict()
+    return count
+
+
+def _append_batch(doc, batch, cache, salt, grid_w, render):
+    keys = [cache.key(salt, entry) for entry in batch]
+    found = cache.get_many(keys)
+    rendered = {}
+    fragments = []
+    for key, entry in zip(keys, batch):
+        xml = found.get(key)
+        if xml is None:
+            xml = rendered.get(key)
+            if xml is None:
+                xml = rendered[key] = render(entry, grid_w)
+            cache.misses += 1
+        else:
+            cache.hits += 1
+        fragments.append(xml)
+    if rendered:
+        cache.put_many(rendered)
+    entry_xml.insert_fragments(doc, fragments)
+    return len(batch)
@@ -1,59 +1,223 @@
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+
 from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docx.text.paragraph import Paragraph
 import pandas as pd
 
-def replace_placeholders_in_paragraph(paragraph, replacements):
-    """
-    For a given paragraph, if its full text contains any placeholder key,
-    replace it with the target value, reconstructing runs.
-    """
-    full_text = paragraph.text
-    for placeholder, new_value in replacements.items():
-        if placeholder in full_text:
-            # Compute the replaced text
-            replaced_text = full_text.replace(placeholder, new_value)
-            # Remove all existing runs
-            # (Be careful: modifying runs while iterating is tricky; do reversed)
-            for run in reversed(paragraph.runs):
-                r = run._element
-                r.getparent().remove(r)
-            # Add a single new run with the replaced text
-            paragraph.add_run(replaced_text)
-            break  # we assume one replacement per paragraph; adjust if multiple
-    # Note: this loses run-level styling (bold, italic) inside replaced parts.
-    # If you need to preserve styling around the fields, a more granular approach is needed.
+import instrument
+from entry_xml import run_xml
+
+def compile_placeholders(placeholders):
+    """One regex for all placeholders, longest first so overlapping keys resolve to the longest."""
+    keys = sorted(placeholders, key=len, reverse=True)
+    return re.compile("|".join(re.escape(key) for key in keys))
+
+# Run content as paragraph.text reads it: text, tabs and line breaks (page
+# and column breaks read as "")
+W_T, W_TAB = qn("w:t"), qn("w:tab")
+RUN_TEXT = ("w:t", "w:tab", "w:br[not(@w:type) or @w:type='textWrapping']", "w:cr")
+TEXT_NODES = " | ".join(f"./w:r/{n} | ./w:hyperlink/w:r/{n}" for n in RUN_TEXT)
+
+def paragraph_text_nodes(p):
+    """The text, tab and break nodes of a paragraph element, in order (runs and hyperlink runs)."""
+    return p.xpath(TEXT_NODES)
+
+def node_text(node):
+    if node.tag == W_T:
+        return node.text or ""
+    return "\t" if node.tag == W_TAB else "\n"
+
+def paragraph_scan_text(p):
+    """The paragraph's text (same as paragraph.text) from paragraph_text_nodes."""
+    return "".join(node_text(n) for n in paragraph_text_nodes(p))
+
+def set_node_text(node, text):
+    """
+    Put `text` in place of a text node. A <w:t> just takes plain text; a
+    tab or break node, or text with tabs or line breaks, is replaced by the
+    <w:t>/<w:tab>/<w:br> sequence add_run writes for that text.
+    """
+    if node.tag == W_T and not any(c in text for c in "\t\r\n"):
+        node.text = text
+        if len(text.strip()) < len(text):
+            node.set(qn("xml:space"), "preserve")
+        return
+    for element in list(parse_xml(f"<w:p {nsdecls('w')}>{run_xml(text)}</w:p>")[0]):
+        node.addprevious(element)
+    node.getparent().remove(node)
+
+def replace_placeholders_in_paragraph(paragraph, replacements, pattern=None):
+    """
+    Replace every placeholder of `replacements` in one scan of the
+    paragraph's concatenated run text, keeping the runs and their styling:
+    the new text goes into the run where the placeholder starts and the rest
+    of the placeholder is cut out of the following runs. Tabs and line
+    breaks count as "\t" and "\n", as in paragraph.text.
+    """
+    if not replacements:
+        return
+    pattern = pattern or compile_placeholders(replacements)
+    nodes = paragraph_text_nodes(paragraph._p)
+    texts = [node_text(n) for n in nodes]
+    full_text = "".join(texts)
+    matches = list(pattern.finditer(full_text))
+    if not matches:
+        return
+
+    # owner[i] = index of the node holding character i, starts[n] = offset of node n
+    owner = [n for n, text in enumerate(texts) for _ in text]
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text)
+
+    # Right to left, so edits never shift the offsets still to be used
+    changed = set()
+    for m in reversed(matches):
+        start, end = m.span()
+        first, last = owner[start], owner[end - 1]
+        new_value = replacements.get(m.group(0), m.group(0))
+        head = texts[first][:start - starts[first]]
+        if first == last:
+            texts[first] = head + new_value + texts[first][end - starts[first]:]
+        else:
+            texts[first] = head + new_value
+            for n in range(first + 1, last):
+                texts[n] = ""
+            texts[last] = texts[last][end - starts[last]:]
+        changed.update(range(first, last + 1))
+
+    for n in changed:
+        set_node_text(nodes[n], texts[n])
+
+class TemplateFiller:
+    """
+    Parse a template once and produce each filled document from a copy of
+    its pristine body XML, instead of re-opening the .docx for every row.
+
+    The paragraphs that contain any of `placeholders` (body paragraphs and
+    the cells of body tables) are located once; filling a copy only touches
+    those paragraphs.
+    """
+
+    def __init__(self, template_path, placeholders):
+        self.doc = Document(template_path)
+        self.pristine = deepcopy(self.doc.element.body)
+        self.placeholders = list(placeholders)
+        self.pattern = compile_placeholders(self.placeholders)
+        self.index = [
+            i for i, p in enumerate(self._paragraphs(self.pristine))
+            if self.pattern.search(paragraph_scan_text(p))
+        ]
+
+    @staticmethod
+    def _paragraphs(body):
+        # Same scope as doc.paragraphs + doc.tables[*] cells, each cell once
+        return body.xpath("./w:p | ./w:tbl/w:tr/w:tc/w:p")
+
+    def fill(self, replacements):
+        """Return the template Document with a freshly filled body."""
+        body = deepcopy(self.pristine)
+        paragraphs = self._paragraphs(body)
+        for i in self.index:
+            replace_placeholders_in_paragraph(Paragraph(paragraphs[i], None), replacements, self.pattern)
+        # Move the children into the live body: doc.paragraphs etc. keep
+        # pointing at it
+        self.doc.element.body[:] = list(body)
+        return self.doc
+
+    def save(self, replacements, output_path):
+        self.fill(replacements).save(output_path)
+
+    def to_bytes(self, replacements):
+        buffer = io.BytesIO()
+        self.save(replacements, buffer)
+        return buffer.getvalue()
 
 def replace_in_docx_template(template_path, output_path, replacements):
     """
     Open an existing docx at template_path, replace all placeholder keys
     per the `replacements` dict, and save to output_path.
     """
-    doc = Document(template_path)
-    # Replace in normal paragraphs
-    for para in doc.paragraphs:
-        replace_placeholders_in_paragraph(para, replacements)
-    # Also replace in tables (cells) if template uses tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for para in cell.paragraphs:
-                    replace_placeholders_in_paragraph(para, replacements)
-    # Save the modified document
-    doc.save(output_path)
-
-def fill_from_excel_using_template(template_path, excel_path, output_prefix="filled"):
-    df = pd.read_excel(excel_path, engine="openpyxl")
-    for idx, row in df.iterrows():
-        # Build the placeholder → actual value mapping
-        replacements = {
-            "Receiver :": f"Receiver : {row.get('Client', '')}",
-            "commodity :": f"commodity : {row.get('Marchandise', '')}",
-            "Manifested Quantity :": f"Manifested Quantity: {row.get('nombre colis', '')}",
-            "tonnage :": f"tonnage: {row.get('Poids brute', '')}",
-            # Add more keys if your template uses different names
-        }
-        outname = f"{output_prefix}_{idx+1}.docx"
-        replace_in_docx_template(template_path, outname, replacements)
-        print(f"Generated {outname}")
+    TemplateFiller(template_path, replacements).save(replacements, output_path)
+
+def row_replacements(row):
+    # Build the placeholder → actual value mapping
+    return {
+        "Receiver :": f"Receiver : {row.get('Client', '')}",
+        "commodity :": f"commodity : {row.get('Marchandise', '')}",
+        "Manifested Quantity :": f"Manifested Quantity: {row.get('nombre colis', '')}",
+        "tonnage :": f"tonnage: {row.get('Poids brute', '')}",
+        # Add more keys if your template uses different names
+    }
+
+_worker_filler = None
+
+def _init_worker(template_path, placeholders):
+    # Each worker parses the template once
+    global _worker_filler
+    _worker_filler = TemplateFiller(template_path, placeholders)
+
+def _render_in_worker(replacements):
+    return _worker_filler.to_bytes(replacements)
+
+@instrument.pipeline("repbor", "bundle", "output_prefix")
+def fill_from_excel_using_template(template_path, excel_path, output_prefix="filled", workers=1, bundle=None):
+    """
+    One document per Excel row, named f"{output_prefix}_{n}.docx".
+
+    workers > 1 renders the rows over a process pool (template parsed once
+    per worker). bundle="out.zip" stores every document in that single
+    zip instead of writing one file each.
+    """
+    with instrument.stage("load"):
+        df = pd.read_excel(excel_path, engine="openpyxl")
+    with instrument.stage("prepare"):
+        jobs = [
+            (f"{output_prefix}_{idx+1}.docx", row_replacements(row))
+            for idx, row in df.iterrows()
+        ]
+    placeholders = list(row_replacements({}))
+    instrument.count("documents", len(jobs))
+
+    if workers and workers > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(template_path, placeholders),
+        )
+        chunksize = max(1, len(jobs) // (workers * 4))
+        rendered = pool.map(_render_in_worker, [r for _, r in jobs], chunksize=chunksize)
+    else:
+        pool = None
+        # The template is parsed once for the whole sheet
+        with instrument.stage("load"):
+            filler = TemplateFiller(template_path, placeholders)
+        rendered = (filler.to_bytes(r) for _, r in jobs)
+
+    try:
+        # Documents are rendered as they are written: "render" includes the writes
+        with instrument.stage("render"):
+            if bundle:
+                # .docx parts are already deflated: store them as-is
+                with zipfile.ZipFile(bundle, "w", compression=zipfile.ZIP_STORED) as zf:
+                    for (outname, _), data in zip(jobs, rendered):
+                        zf.writestr(os.path.basename(outname), data)
+                print(f"Generated {len(jobs)} documents in {bundle}")
+            else:
+                for (outname, _), data in zip(jobs, rendered):
+                    with open(outname, "wb") as f:
+                        f.write(data)
+                    print(f"Generated {outname}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
 if __name__ == "__main__":
     fill_from_excel_using_template("src.docx", "Book1.xlsx", output_prefix="output")
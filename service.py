@@ -0,0 +1,294 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlsplit
+
+import batch
+
+# Local HTTP rendering service (asyncio, standard library only).
+#
+#   POST /bordereau?template=template1.docx&engine=stamp   body: tally sheet (.xlsx)
+#        -> the bordereau (.docx)
+#   POST /flatten                                          body: manifest (input.json schema)
+#        -> the flattened workbook (.xlsx)
+#   GET  /health -> pool state as JSON
+#
+# Rendering runs in a warm process pool (batch.init_warm_worker). At most
+# `workers` jobs render at a time and at most `max_queue` more may wait;
+# beyond that requests get 503 with Retry-After instead of piling up.
+# Every response carries X-Queue-Ms, X-Render-Ms, X-Total-Ms and the same
+# values as a Server-Timing header.
+#
+# Service.handle() is the whole request handler, so tests and other Python
+# code can call it in-process (see InProcessClient) without opening a socket.
+
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+JSON_TYPE = "application/json"
+
+MAX_BODY = 64 * 1024 * 1024
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error",
+    503: "Service Unavailable", 504: "Gateway Timeout",
+}
+
+Response = namedtuple("Response", "status headers body")
+
+
+def render_upload(data, suffix, engine, template_name):
+    """Worker side: render one uploaded file; returns (batch result dict, output bytes)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, f"upload{suffix}")
+        with open(input_path, "wb") as f:
+            f.write(data)
+        result = batch.process_with_template(input_path, tmp, engine, template_name)
+        if result["error"]:
+            return result, b""
+        with open(result["output"], "rb") as f:
+            return result, f.read()
+
+
+def json_response(status, payload, headers=None):
+    return Response(status, dict(headers or {}, **{"Content-Type": JSON_TYPE}), json.dumps(payload).encode("utf-8"))
+
+
+class Service:
+    def __init__(self, templates=("template.docx", "template1.docx", "template2.docx"),
+                 workers=None, max_queue=8, timeout=120.0, engine="stamp"):
+        self.templates = [t for t in templates if os.path.isfile(t)]
+        self.template_names = [os.path.basename(t) for t in self.templates]
+        self.workers = workers or os.cpu_count()
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.engine = engine
+        self.pool = None
+        self.slots = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers, initializer=batch.init_warm_worker, initargs=(self.templates,),
+        )
+
+    async def start(self):
+        """Start (and warm) the worker pool."""
+        self.pool = self._new_pool()
+        self.slots = asyncio.Semaphore(self.workers)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, batch.ping) for _ in range(self.workers)))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    async def handle(self, method, target, headers, body):
+        """Answer one request; `headers` keys are lower-case."""
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path == "/health":
+            if method != "GET":
+                return json_response(405, {"error": "use GET"})
+            return json_response(200, {
+                "workers": self.workers, "in_flight": self.in_flight, "waiting": self.waiting,
+                "max_queue": self.max_queue, "served": self.served, "rejected": self.rejected,
+                "templates": self.template_names,
+            })
+        if url.path == "/bordereau":
+            suffix, content_type, default_name = ".xlsx", DOCX_TYPE, "bordereau.docx"
+        elif url.path == "/flatten":
+            suffix, content_type, default_name = ".json", XLSX_TYPE, "flattened.xlsx"
+        else:
+            return json_response(404, {"error": f"no route {url.path}"})
+        if method != "POST":
+            return json_response(405, {"error": "use POST"})
+        if not body:
+            return json_response(400, {"error": "empty body"})
+
+        engine = query.get("engine", self.engine)
+        if engine not in ("docx", "xml", "stamp"):
+            return json_response(400, {"error": f"unknown engine {engine}"})
+        template = query.get("template") or (self.template_names[0] if self.template_names else None)
+        if template is not None and template not in self.template_names:
+            return json_response(400, {"error": f"unknown template {template}", "templates": self.template_names})
+        return await self.render(body, suffix, engine, template, content_type, default_name)
+
+    async def render(self, body, suffix, engine, template, content_type, filename):
+        start = time.perf_counter()
+        # Backpressure: refuse rather than queue without bound
+        if self.in_flight + self.waiting >= self.workers + self.max_queue:
+            self.rejected += 1
+            return json_response(503, {"error": "busy, retry later"}, {"Retry-After": "1"})
+
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        queued = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        try:
+            future = pool.submit(render_upload, body, suffix, engine, template)
+        except Exception as exc:
+            # No job was started (broken pool, or closed while waiting)
+            self._release()
+            if isinstance(exc, BrokenProcessPool):
+                self._replace_pool(pool)
+            return json_response(503, {"error": f"cannot render now ({type(exc).__name__})"},
+                                 self.timing(start, queued, None))
+        # The slot is held until the job really ends: a timed-out job keeps
+        # its worker busy, so it keeps counting against workers/max_queue
+        future.add_done_callback(lambda _: self._release_threadsafe(loop))
+        try:
+            result, data = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            return json_response(504, {"error": f"rendering took more than {self.timeout} s"},
+                                 self.timing(start, queued, None))
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory): the next request gets a new pool
+            self._replace_pool(pool)
+            return json_response(503, {"error": "worker pool is broken"}, self.timing(start, queued, None))
+
+        timing = self.timing(start, queued, result["seconds"])
+        if result["error"]:
+            return json_response(400, {"error": result["error"]}, timing)
+        self.served += 1
+        headers = dict(timing, **{
+            "Content-Type": content_type,
+            "Content-Disposition": f'attachment; filename="{filename}"',
+        })
+        return Response(200, headers, data)
+
+    def _replace_pool(self, broken):
+        """Swap a broken pool for a new one (once, however many jobs saw it break)."""
+        if self.pool is not broken:
+            return
+        print("Worker pool broken, starting a new one")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.pool = self._new_pool()
+
+    def _release(self):
+        self.in_flight -= 1
+        self.slots.release()
+
+    def _release_threadsafe(self, loop):
+        # Done callbacks run in the executor's thread
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            pass  # loop already closed (shutting down)
+
+    @staticmethod
+    def timing(start, queued, render_seconds):
+        now = time.perf_counter()
+        queue_ms = (queued - start) * 1000
+        total_ms = (now - start) * 1000
+        headers = {"X-Queue-Ms": f"{queue_ms:.1f}", "X-Total-Ms": f"{total_ms:.1f}"}
+        server_timing = [f"queue;dur={queue_ms:.1f}"]
+        if render_seconds is not None:
+            headers["X-Render-Ms"] = f"{render_seconds * 1000:.1f}"
+            server_timing.append(f"render;dur={render_seconds * 1000:.1f}")
+        server_timing.append(f"total;dur={total_ms:.1f}")
+        headers["Server-Timing"] = ", ".join(server_timing)
+        return headers
+
+    async def serve_connection(self, reader, writer):
+        """HTTP/1.1 over one connection, one request per connection."""
+        try:
+            response = await self.read_and_handle(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as exc:
+            print(f"Error handling a request: {type(exc).__name__}: {exc}")
+            response = json_response(500, {"error": f"{type(exc).__name__}: {exc}"})
+        head = [f"HTTP/1.1 {response.status} {REASONS.get(response.status, '')}"]
+        headers = dict(response.headers, **{"Content-Length": str(len(response.body)), "Connection": "close"})
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def read_and_handle(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            return json_response(400, {"error": "headers too large"})
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            return json_response(400, {"error": "bad request line"})
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        body = b""
+        if method in ("POST", "PUT"):
+            if "content-length" not in headers:
+                return json_response(411, {"error": "Content-Length required"})
+            value = headers["content-length"]
+            if not (value.isascii() and value.isdigit()):
+                return json_response(400, {"error": "bad Content-Length"})
+            length = int(value)
+            if length > MAX_BODY:
+                return json_response(413, {"error": f"body larger than {MAX_BODY} bytes"})
+            body = await reader.readexactly(length)
+        return await self.handle(method, target, headers, body)
+
+
+class InProcessClient:
+    """Calls Service.handle directly: the same responses as over HTTP, no socket."""
+
+    def __init__(self, service):
+        self.service = service
+
+    async def get(self, path):
+        return await self.service.handle("GET", path, {}, b"")
+
+    async def post(self, path, body):
+        return await self.service.handle("POST", path, {"content-length": str(len(body))}, body)
+
+
+async def serve(host="127.0.0.1", port=8080, **options):
+    """Run the service until cancelled (Ctrl+C)."""
+    async with Service(**options) as service:
+        server = await asyncio.start_server(service.serve_connection, host, port)
+        print(
+            f"Serving on http://{host}:{port} with {service.workers} workers "
+            f"(queue {service.max_queue}), templates: {', '.join(service.template_names) or 'none'}"
+        )
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    import sys
+
+    import epj
+
+    # Same options as `epj serve`
+    sys.exit(epj.main(["serve", *sys.argv[1:]]))
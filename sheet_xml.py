@@ -0,0 +1,145 @@
+import math
+import numbers
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+# Raw-OOXML .xlsx writer for column data.
+#
+# openpyxl builds a cell object per value; here each column is turned into
+# cell XML with one lookup per distinct value (manifests repeat clients,
+# descriptions, types... on every row), rows are joined as text and the
+# sheets are deflated straight into the zip. Cells carry no reference
+# (r="A1"): they are positional, so an empty value is an empty <c/>.
+# Strings are inline, so no shared string table is needed.
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{sheets}</Types>'
+)
+SHEET_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>'
+)
+WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}<Relationship Id="rIdStyles" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/></Relationships>'
+)
+STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_TAIL = "</sheetData></worksheet>"
+ROWS_PER_WRITE = 5000
+
+# Characters XML 1.0 does not allow (openpyxl refuses them too)
+_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def cell_xml(value):
+    """One positional <c> for a Python value (None -> empty cell)."""
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, numbers.Integral):
+        return f"<c><v>{int(value)}</v></c>"
+    if isinstance(value, numbers.Real):
+        value = float(value)
+        return f"<c><v>{value!r}</v></c>" if math.isfinite(value) else "<c/>"
+    text = _ILLEGAL.sub("", str(value))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def column_cells(values):
+    """Cell XML of a column, rendering every distinct value once."""
+    # One cache per type, so 1, 1.0 and True stay different cells
+    caches = {}
+    cells = []
+    for value in values:
+        cache = caches.get(value.__class__)
+        if cache is None:
+            cache = caches[value.__class__] = {}
+        cell = cache.get(value)
+        if cell is None:
+            cell = cache[value] = cell_xml(value)
+        cells.append(cell)
+    return cells
+
+
+def sheet_rows(headers, columns):
+    """Yield the <row> elements of a sheet: the header row, then one per value."""
+    yield "<row>" + "".join(cell_xml(h) for h in headers) + "</row>"
+    for cells in zip(*(column_cells(c) for c in columns)):
+        yield "<row>" + "".join(cells) + "</row>"
+
+
+def write_workbook(path, sheets):
+    """
+    Write {sheet name: (headers, columns)} as an .xlsx, each column being a
+    sequence of Python values (str, int, float, bool or None), all of the
+    same length. Returns {sheet name: data rows}.
+    """
+    names = list(sheets)
+    counts = {}
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        types = "".join(SHEET_TYPE.format(n=i + 1) for i in range(len(names)))
+        zf.writestr("[Content_Types].xml", CONTENT_TYPES.format(sheets=types))
+        zf.writestr("_rels/.rels", ROOT_RELS)
+        zf.writestr("xl/workbook.xml", WORKBOOK.format(sheets="".join(
+            f'<sheet name="{escape(name[:31], {chr(34): "&quot;"})}" sheetId="{i + 1}" r:id="rId{i + 1}"/>' for i, name in enumerate(names)
+        )))
+        zf.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS.format(sheets="".join(
+            f'<Relationship Id="rId{i + 1}" '
+            f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{i + 1}.xml"/>' for i in range(len(names))
+        )))
+        zf.writestr("xl/styles.xml", STYLES)
+        for i, name in enumerate(names):
+            headers, columns = sheets[name]
+            counts[name] = len(columns[0]) if columns else 0
+            with zf.open(f"xl/worksheets/sheet{i + 1}.xml", "w") as f:
+                f.write(SHEET_HEAD.encode("utf-8"))
+                batch = []
+                for row in sheet_rows(headers, columns):
+                    batch.append(row)
+                    if len(batch) >= ROWS_PER_WRITE:
+                        f.write("".join(batch).encode("utf-8"))
+                        batch = []
+                f.write(("".join(batch) + SHEET_TAIL).encode("utf-8"))
+    return counts
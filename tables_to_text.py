@@ -0,0 +1,206 @@
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import etree
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+
+import instrument
+from entry_xml import run_xml
+
+# Python replacement for the ConvertAllTablesToText macro (macro_word.vba).
+#
+# Every <w:tbl> of word/document.xml is replaced in one pass by paragraphs:
+#   mode="tabs"   - like Word's ConvertToText(wdSeparateByTabs): one paragraph
+#                   per row, cells separated by a tab, runs and their
+#                   formatting kept;
+#   mode="padded" - brd-style fixed-width Courier New lines
+#                   (see brd.convert_and_delete_table).
+# The other parts of the package are copied through unchanged.
+
+DOCUMENT_PART = "word/document.xml"
+
+# Same estimate as brd.EMUS_PER_CHAR: a 10pt Courier New character
+EMUS_PER_CHAR = 70000
+EMUS_PER_TWIP = 635
+
+W_TBL, W_TR, W_TC, W_P, W_PPR = qn("w:tbl"), qn("w:tr"), qn("w:tc"), qn("w:p"), qn("w:pPr")
+W_GRIDCOL = qn("w:gridCol")
+W_R, W_T, W_TAB, W_BR, W_CR = qn("w:r"), qn("w:t"), qn("w:tab"), qn("w:br"), qn("w:cr")
+
+COURIER_10 = '<w:rFonts w:ascii="Courier New" w:hAnsi="Courier New"/><w:sz w:val="20"/>'
+
+
+def _fragment(xml):
+    return parse_xml(f"<w:p {nsdecls('w')}>{xml}</w:p>")
+
+
+def _new_paragraph(ppr=None):
+    p = _fragment("")
+    if ppr is not None:
+        p.append(ppr)
+    return p
+
+
+def _tab_run():
+    return _fragment("<w:r><w:tab/></w:r>")[0]
+
+
+def _row_to_tab_paragraphs(tr):
+    # Cells are joined by a tab; a cell's 2nd, 3rd... paragraphs start new
+    # paragraphs, as Word does.
+    paragraphs = []
+    current = None
+    for ci, tc in enumerate(tr.findall(W_TC)):
+        for pi, p in enumerate(tc.findall(W_P)):
+            if current is None or pi > 0:
+                if current is not None:
+                    paragraphs.append(current)
+                current = _new_paragraph(p.find(W_PPR))
+            if pi == 0 and ci > 0:
+                current.append(_tab_run())
+            for child in list(p):
+                if child.tag != W_PPR:
+                    current.append(child)
+    if current is not None:
+        paragraphs.append(current)
+    return paragraphs
+
+
+def _column_widths(tbl):
+    widths = []
+    grid = tbl.find(qn("w:tblGrid"))
+    for col in (grid.findall(W_GRIDCOL) if grid is not None else []):
+        width_emus = int(col.get(qn("w:w"), "0")) * EMUS_PER_TWIP
+        widths.append(max(int(width_emus / EMUS_PER_CHAR), 10))
+    return widths
+
+
+def _paragraph_text(p):
+    # Paragraph.text for the usual run content, without the proxy objects
+    parts = []
+    for r in p.iter(W_R):
+        for child in r:
+            if child.tag == W_T:
+                parts.append(child.text or "")
+            elif child.tag == W_TAB:
+                parts.append("\t")
+            elif child.tag in (W_BR, W_CR):
+                parts.append("\n")
+    return "".join(parts)
+
+
+def _row_to_padded_paragraphs(tr, widths):
+    padded = []
+    for i, tc in enumerate(tr.findall(W_TC)):
+        texts = (_paragraph_text(p).strip() for p in tc.findall(W_P))
+        content = "\n".join(text for text in texts if text)
+        width = widths[i] if i < len(widths) else 10
+        padded.append(f"{content:<{width}}"[:width])
+    text = "".join(padded)
+    if not text.strip():
+        return []
+    return [_fragment(run_xml(text, COURIER_10))]
+
+
+def convert_tables(root, mode="tabs"):
+    """Replace every table under `root` (a parsed document.xml) in place; returns the count."""
+    # Reverse document order: nested tables are converted before their parent
+    tables = list(root.iter(W_TBL))[::-1]
+    for tbl in tables:
+        widths = _column_widths(tbl) if mode == "padded" else None
+        paragraphs = []
+        for tr in tbl.findall(W_TR):
+            if mode == "padded":
+                paragraphs.extend(_row_to_padded_paragraphs(tr, widths))
+            else:
+                paragraphs.extend(_row_to_tab_paragraphs(tr))
+        if mode == "padded":
+            paragraphs.append(_new_paragraph())
+        for p in paragraphs:
+            tbl.addprevious(p)
+        tbl.getparent().remove(tbl)
+    return len(tables)
+
+
+@instrument.pipeline("tables_to_text", "output_path", "input_path")
+def convert_docx(input_path, output_path=None, mode="tabs"):
+    """
+    Convert all tables of a .docx to text. The zip is rewritten entry by
+    entry (streamed copy of every part but document.xml); output_path=None
+    rewrites the file in place. Returns the number of tables converted.
+    """
+    if mode not in ("tabs", "padded"):
+        raise ValueError(f"Unknown mode: {mode}")
+    output_path = output_path or input_path
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, tmp_path = tempfile.mkstemp(suffix=".docx", dir=out_dir)
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(input_path) as zin, zipfile.ZipFile(tmp_path, "w") as zout:
+            count = 0
+            for info in zin.infolist():
+                if info.filename == DOCUMENT_PART:
+                    with instrument.stage("load"):
+                        root = parse_xml(zin.read(info))
+                    with instrument.stage("post-process"):
+                        count = convert_tables(root, mode)
+                    with instrument.stage("save"):
+                        data = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+                        zout.writestr(info, data)
+                    instrument.count("tables", count)
+                else:
+                    with zin.open(info) as src, zout.open(info, "w") as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+        # mkstemp creates the file 0600; keep the permissions of the input
+        shutil.copymode(input_path, tmp_path)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return count
+
+
+def _convert_job(args):
+    input_path, output_path, mode = args
+    start = time.perf_counter()
+    try:
+        count = convert_docx(input_path, output_path, mode)
+        return {"input": input_path, "output": output_path or input_path, "tables": count,
+                "seconds": time.perf_counter() - start, "error": None}
+    except Exception as exc:
+        return {"input": input_path, "output": None, "tables": 0,
+                "seconds": time.perf_counter() - start, "error": f"{type(exc).__name__}: {exc}"}
+
+
+def convert_files(paths, mode="tabs", suffix="_text", in_place=False, workers=None):
+    """
+    Convert many documents over a process pool. Output is <name><suffix>.docx
+    next to each input unless in_place. A failing file does not stop the others.
+    """
+    jobs = []
+    for path in paths:
+        stem, ext = os.path.splitext(path)
+        jobs.append((path, None if in_place else f"{stem}{suffix}{ext}", mode))
+    if workers == 1 or len(jobs) <= 1:
+        results = [_convert_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_convert_job, jobs))
+    for r in results:
+        status = f"FAILED {r['error']}" if r["error"] else f"{r['tables']} tables -> {r['output']}"
+        print(f"{r['input']}: {r['seconds']:.2f} s {status}")
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    import epj
+
+    # Same options as `epj tables-to-text`
+    sys.exit(epj.main(["tables-to-text", *sys.argv[1:]]))
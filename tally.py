@@ -0,0 +1,189 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+# Preparation stage for the tally sheets (type, client, qte, poids, rec_qty).
+#
+# The whole frame is cleaned and formatted column-wise, then handed to the
+# renderers as plain tuples instead of one pandas Series per row.
+
+Entry = namedtuple("Entry", "client commodity qty_str tonnage_str rec_str")
+
+TALLY_COLUMNS = ("type", "client", "qte", "poids", "rec_qty")
+
+
+def _column(df, name, default):
+    if name in df.columns:
+        return df[name]
+    return pd.Series(default, index=df.index, dtype=object)
+
+
+def _text(series):
+    return series.fillna("").astype(str).str.strip()
+
+
+def _count(series):
+    return pd.to_numeric(series, errors="coerce").fillna(0).astype("int64").astype(str).str.zfill(2)
+
+
+def _tonnage(series, keep_zero_tonnage):
+    tonnage = pd.to_numeric(series, errors="coerce").fillna(0.0).astype(float).to_numpy()
+    formatted = np.char.mod("%.2f", tonnage)
+    # ".50 Mt" rather than "0.50 Mt" below one ton
+    small = tonnage < 1
+    if keep_zero_tonnage:
+        small &= tonnage > 0
+    return np.where(small, np.char.lstrip(formatted, "0"), formatted).tolist()
+
+
+def prepare_frame(df, upper_commodity=False, default_commodity="", keep_zero_tonnage=False):
+    """
+    Return one Entry per row of `df`, with every field already formatted:
+    quantities as "%02d", tonnage as "%.2f" (leading zero dropped below one
+    ton, except for exactly zero when keep_zero_tonnage), missing values as
+    empty/zero. Fully blank rows are skipped, as iter_sheet_rows does.
+    """
+    df = df.dropna(how="all")
+    client = _text(_column(df, "client", ""))
+    commodity = _text(_column(df, "type", ""))
+    if upper_commodity:
+        commodity = commodity.str.upper()
+    if default_commodity:
+        commodity = commodity.mask(commodity == "", default_commodity)
+
+    qty = _count(_column(df, "qte", 0))
+    rec = _count(_column(df, "rec_qty", 0))
+    tonnage = _tonnage(_column(df, "poids", 0.0), keep_zero_tonnage)
+
+    return list(map(Entry, client.tolist(), commodity.tolist(), qty.tolist(), tonnage, rec.tolist()))
+
+
+def _missing(value):
+    return value is None or value is pd.NA or (isinstance(value, float) and value != value)
+
+
+def cell_text(value):
+    """A sheet cell as stripped text, "" when missing (None, NaN, NA)."""
+    return "" if _missing(value) else str(value).strip()
+
+
+def _number(value, default):
+    if _missing(value):
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def prepare_row(row, upper_commodity=False, default_commodity="", keep_zero_tonnage=False):
+    """Single-row version of prepare_frame, for dict-like rows."""
+    client = cell_text(row.get("client"))
+    commodity = cell_text(row.get("type"))
+    if upper_commodity:
+        commodity = commodity.upper()
+    if not commodity:
+        commodity = default_commodity
+
+    qty = str(int(_number(row.get("qte"), 0))).zfill(2)
+    rec = str(int(_number(row.get("rec_qty"), 0))).zfill(2)
+
+    tonnage = _number(row.get("poids"), 0.0)
+    tonnage_str = "%.2f" % tonnage
+    if tonnage < 1 and (tonnage > 0 or not keep_zero_tonnage):
+        tonnage_str = tonnage_str.lstrip("0")
+
+    return Entry(client, commodity, qty, tonnage_str, rec)
+
+
+def iter_sheet_rows(input_excel, sheet_name=0, columns=TALLY_COLUMNS):
+    """
+    Stream the rows of one sheet as dicts, using openpyxl's read-only mode so
+    the workbook is never loaded as a whole. The first row is the header;
+    headers matching `columns` (case and surrounding spaces ignored) are
+    mapped to those names and other columns are dropped. columns=None keeps
+    every column under its header text. Missing cells are None. Fully
+    blank rows are skipped (pd.read_excel keeps them as all-NaN rows, which
+    prepare_frame drops).
+    """
+    wb = load_workbook(input_excel, read_only=True, data_only=True)
+    try:
+        if sheet_name is None or isinstance(sheet_name, int):
+            ws = wb.worksheets[sheet_name or 0]
+        else:
+            ws = wb[sheet_name]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+
+        wanted = None if columns is None else {c.lower(): c for c in columns}
+        mapping = []
+        for i, cell in enumerate(header):
+            name = "" if cell is None else str(cell).strip()
+            if wanted is None:
+                mapping.append((i, name))
+            elif name.lower() in wanted:
+                mapping.append((i, wanted[name.lower()]))
+
+        for values in rows:
+            if all(v is None for v in values):
+                continue
+            yield {name: values[i] if i < len(values) else None for i, name in mapping}
+    finally:
+        wb.close()
+
+
+def iter_entries(input_excel, sheet_name=0, **options):
+    """Streaming counterpart of prepare_frame(pd.read_excel(...)); see prepare_row for options."""
+    for row in iter_sheet_rows(input_excel, sheet_name):
+        yield prepare_row(row, **options)
+
+
+# Header of the BL number column in tally sheets, compared lower-case
+BL_COLUMNS = ("num_bl", "n° bl", "n°bl", "no bl", "n bl", "bl", "bl number")
+
+
+def received_by_bl(input_excel, sheet_name=0):
+    """
+    {num_bl: received quantity} from a tally sheet that has a BL number
+    column (N° BL, num_bl, ...) and rec_qty; quantities of repeated BLs add up.
+    """
+    received = {}
+    key = rec = None
+    for row in iter_sheet_rows(input_excel, sheet_name, columns=None):
+        if key is None:
+            names = {name.lower(): name for name in row}
+            key = next((names[c] for c in BL_COLUMNS if c in names), None)
+            rec = names.get("rec_qty")
+            if key is None or rec is None:
+                raise ValueError(f"{input_excel}: needs a BL number column ({', '.join(BL_COLUMNS)}) and rec_qty")
+        bl = row[key]
+        if _missing(bl):
+            continue
+        bl = str(bl).strip()
+        received[bl] = received.get(bl, 0) + int(_number(row[rec], 0))
+    return received
+
+
+def row_from_bl(bl, received=None):
+    """
+    The tally row of one manifest connaissement: description (or packing)
+    as type, client_final, nombre_colis and poids_brute converted from kg
+    to tons; rec_qty from `received` ({num_bl: qty}) when given.
+    """
+    poids_kg = _number(bl.get("poids_brute"), None)
+    num_bl = bl.get("num_bl")
+    return {
+        "type": bl.get("description_marchandise") or bl.get("conditionnement"),
+        "client": bl.get("client_final"),
+        "qte": bl.get("nombre_colis"),
+        "poids": poids_kg / 1000 if poids_kg is not None else None,
+        "rec_qty": (received or {}).get(str(num_bl).strip()) if num_bl is not None else None,
+    }
+
+
+def iter_manifest_entries(connaissements, received=None, **options):
+    """One Entry per connaissement (see row_from_bl and prepare_row for options)."""
+    for bl in connaissements:
+        yield prepare_row(row_from_bl(bl, received), **options)
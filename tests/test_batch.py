@@ -0,0 +1,37 @@
+import os
+import shutil
+import sys
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_output_paths_keep_unique_names():
+    paths = ["in/a.xlsx", "in/a.xlsm", "other/a.xlsx", "in/b.xlsx", "in/a.json"]
+    outputs = batch.output_paths(paths, "out")
+    assert outputs == {
+        "in/a.xlsx": os.path.join("out", "a_xlsx_bordereau.docx"),
+        "in/a.xlsm": os.path.join("out", "a_xlsm_bordereau.docx"),
+        "other/a.xlsx": os.path.join("out", "a_xlsx_2_bordereau.docx"),
+        "in/b.xlsx": os.path.join("out", "b_bordereau.docx"),
+        "in/a.json": os.path.join("out", "a_flattened.xlsx"),
+    }
+
+
+def test_run_batch_same_stem(tmp_path):
+    inbox = tmp_path / "in"
+    inbox.mkdir()
+    shutil.copy(os.path.join(ROOT, "source.xlsx"), inbox / "call.xlsx")
+    shutil.copy(os.path.join(ROOT, "source.xlsx"), inbox / "call.xlsm")
+    summary = batch.run_batch([str(inbox), str(inbox / "*.xlsx")], str(tmp_path / "out"),
+                              template_path=os.path.join(ROOT, "template.docx"), workers=2)
+    assert (summary["ok"], summary["failed"]) == (2, 0)
+    outputs = sorted(os.path.basename(r["output"]) for r in summary["results"])
+    assert outputs == ["call_xlsm_bordereau.docx", "call_xlsx_bordereau.docx"]
+    for r in summary["results"]:
+        with zipfile.ZipFile(r["output"]) as zf:
+            assert zf.testzip() is None
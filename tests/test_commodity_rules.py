@@ -0,0 +1,113 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import commodity_rules
+
+DAMAGED = ["Packaging damaged on board"]
+
+# describe(raw, "12") for one description per rule of commodity_rules.json
+CASES = [
+    ("BIG BAG CEMENT", "big_bags", "Big Bags",
+     ["BIG BAGS FOUND TORN ON BOARD", "BIG BAGS FOUND BROKEN ON BOARD", "EMPTY BAG ON BOARD"],
+     "12  Big Bags"),
+    ("PLYWOOD SHEETS", "panels", "PLYWOOD SHEETS",
+     ["Crates of PLYWOOD SHEETS Found Dismembered on board",
+      "Crates of PLYWOOD SHEETS wet on board (Packing and/or Contents)",
+      "Crates of PLYWOOD SHEETS moldy on board (Packing and/or Contents)"],
+     "12  Crates of PLYWOOD SHEETS"),
+    ("MDF BOARDS", "panels", "MDF BOARDS",
+     ["Crates of MDF BOARDS Found Dismembered on board",
+      "Crates of MDF BOARDS wet on board (Packing and/or Contents)",
+      "Crates of MDF BOARDS moldy on board (Packing and/or Contents)"],
+     "12  Crates of MDF BOARDS"),
+    ("CTP", "panels", "CTP",
+     ["Crates of CTP Found Dismembered on board",
+      "Crates of CTP wet on board (Packing and/or Contents)",
+      "Crates of CTP moldy on board (Packing and/or Contents)"],
+     "12  Crates of CTP"),
+    ("STEEL PIPES", "pipes", "Pipes", ["Pipes.", "Pipes Damaged on board"], "12  Pipes"),
+    ("H BEAMS", "beams", "Bundles of Beams",
+     ["Bundles of Beams.", "Bundles of Beams Found Dismembered on board"], "12  Bundles of Beams"),
+    ("FIL MACHINE 6MM", "fil_machine", "FIL MACHINE", ["RLX FOUND DISMEMBERED ON BOARD"], "12  FIL MACHINE"),
+    ("HOT ROLLED COILS", "coils", "Coils",
+     ["Coils Found Rusty on board", "Coils Packaging damaged on board"], "12"),
+    ("WHITE WOOD", "woods", "Bundles",
+     ["Bundles of WHITE WOOD Found Dismembered on board",
+      "Bundles of WHITE WOOD wet on board (Packing and/or Contents)",
+      "Bundles of WHITE WOOD moldy on board (Packing and/or Contents)"],
+     "12  Bundles of WHITE WOOD"),
+    ("SAWN BEECH WOOD", "woods", "Bundles",
+     ["Bundles of SAWN BEECH WOOD Found Dismembered on board",
+      "Bundles of SAWN BEECH WOOD wet on board (Packing and/or Contents)",
+      "Bundles of SAWN BEECH WOOD moldy on board (Packing and/or Contents)"],
+     "12  Bundles of SAWN BEECH WOOD"),
+    ("RED WOOD", "woods", "Bundles",
+     ["Bundles of RED WOOD Found Dismembered on board",
+      "Bundles of RED WOOD wet on board (Packing and/or Contents)",
+      "Bundles of RED WOOD moldy on board (Packing and/or Contents)"],
+     "12  Bundles of RED WOOD"),
+    ("GENERATOR UNIT", "units", "Units + Packages", ["Units", "Units Damaged on board"], "12  Units + Packages"),
+    ("SPARE PARTS PACKAGE", "units", "Units + Packages", ["Units", "Units Damaged on board"], "12  Units + Packages"),
+    # Several keywords: the earliest rule wins, wherever the keyword is
+    ("BIG BAG COIL", "big_bags", "Big Bags",
+     ["BIG BAGS FOUND TORN ON BOARD", "BIG BAGS FOUND BROKEN ON BOARD", "EMPTY BAG ON BOARD"],
+     "12  Big Bags"),
+    ("PLYWOOD PIPES", "panels", "PLYWOOD PIPES",
+     ["Crates of PLYWOOD PIPES Found Dismembered on board",
+      "Crates of PLYWOOD PIPES wet on board (Packing and/or Contents)",
+      "Crates of PLYWOOD PIPES moldy on board (Packing and/or Contents)"],
+     "12  Crates of PLYWOOD PIPES"),
+    ("COIL UNIT", "coils", "Coils",
+     ["Coils Found Rusty on board", "Coils Packaging damaged on board"], "12"),
+    ("UNIT OF STEEL PIPES", "pipes", "Pipes", ["Pipes.", "Pipes Damaged on board"], "12  Pipes"),
+    # No keyword, or no description at all
+    ("", "empty", "Units + Package", DAMAGED, "12  Units + Package"),
+    ("BAGS OF RICE", "fallback", "BAGS OF RICE", DAMAGED, "12  BAGS OF RICE"),
+    ("WOOD", "fallback", "WOOD", DAMAGED, "12  WOOD"),
+]
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return commodity_rules.load_rules()
+
+
+@pytest.mark.parametrize("raw, rule, commodity, received, total", CASES)
+def test_describe(classifier, raw, rule, commodity, received, total):
+    assert classifier.classify(raw).rule == rule
+    assert classifier.describe(raw, "12") == (commodity, received, total)
+
+
+def test_every_rule_is_covered(classifier):
+    names = {rule["name"] for rule in classifier.rules} | {"empty", "fallback"}
+    assert names == {case[1] for case in CASES}
+
+
+def test_templates_substitute_once(classifier):
+    # Braces in the description or the quantity are copied as they are
+    assert classifier.describe("{COMMODITY} {REC}", "{rec}") == (
+        "{COMMODITY} {REC}", DAMAGED, "{rec}  {COMMODITY} {REC}",
+    )
+    assert classifier.describe("PLYWOOD {raw}", "7") == (
+        "PLYWOOD {raw}",
+        ["Crates of PLYWOOD {raw} Found Dismembered on board",
+         "Crates of PLYWOOD {raw} wet on board (Packing and/or Contents)",
+         "Crates of PLYWOOD {raw} moldy on board (Packing and/or Contents)"],
+        "7  Crates of PLYWOOD {raw}",
+    )
+
+
+def test_custom_rules():
+    classifier = commodity_rules.CommodityClassifier({
+        "rules": [{"name": "drums", "keywords": ["DRUM"], "commodity": "Drums",
+                   "received": ["{raw} ({commodity})"], "total": "{commodity}: {rec} of {raw}"}],
+        "empty": {"name": "empty", "commodity": "-", "received": [], "total": "{rec}"},
+        "fallback": {"name": "fallback", "commodity": "{raw}", "received": [], "total": "{rec}"},
+    })
+    assert classifier.describe("OIL DRUMS", "3") == ("Drums", ["OIL DRUMS (Drums)"], "Drums: 3 of OIL DRUMS")
+    assert classifier.describe("", "0") == ("-", [], "0")
+    assert classifier.describe("CRATES", "5") == ("CRATES", [], "5")
@@ -0,0 +1,51 @@
+import os
+import sys
+import zipfile
+
+import pytest
+from openpyxl import Workbook
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import borderau2026
+
+ROWS = [
+    ["type", "client", "qte", "poids", "rec_qty"],
+    ["HOT ROLLED COILS", "ACME & Sons <Oran>", 12, 24.5, 12],
+    ["plywood \"marine\" 'grade A'", "O'Brien & Co", 3, 0.75, None],
+    [None, None, None, None, None],
+    ["BIG BAG CEMENT", None, None, 0, 2],
+    ["Tools & <parts>", "  padded client  ", 1, None, 1],
+    ["pipes", "tab\there", 4, 1.25, 4],
+    [None, "no type", 7, 3, None],
+    ["COIL UNIT", "line\nbreak", 2, 0.5, 2],
+]
+
+
+@pytest.fixture(scope="module")
+def sheet(tmp_path_factory):
+    wb = Workbook()
+    ws = wb.active
+    for row in ROWS:
+        ws.append(row)
+    path = tmp_path_factory.mktemp("entries") / "tally.xlsx"
+    wb.save(path)
+    return path
+
+
+def document_xml(sheet, tmp_path, engine, template, **options):
+    output = tmp_path / f"{engine}.docx"
+    borderau2026.excel_to_docx_custom(str(sheet), template_path=template, output_docx=str(output),
+                                      engine=engine, **options)
+    with zipfile.ZipFile(output) as zf:
+        return zf.read("word/document.xml")
+
+
+@pytest.mark.parametrize("template", [None, os.path.join(ROOT, "template.docx")], ids=["blank", "template"])
+def test_engines_write_the_same_document(sheet, tmp_path, template):
+    expected = document_xml(sheet, tmp_path, "docx", template)
+    assert b"ACME &amp; Sons &lt;Oran&gt;" in expected
+    assert document_xml(sheet, tmp_path, "xml", template) == expected
+    assert document_xml(sheet, tmp_path, "stamp", template) == expected
+    assert document_xml(sheet, tmp_path, "stamp", template, streaming=True) == expected
@@ -0,0 +1,36 @@
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_to_excel
+
+MANIFEST = [
+    {
+        "numero_escale": 2026001,
+        "nom_navire": "GRANDE TEMA",
+        "jauge": 41234.5,
+        "tirant_eau": 1.25e1,
+        "ecart": -0.5E-3,
+        "connaissements": [
+            {"num_bl": "BL1", "poids_brute": 12345.678, "volume_marchandise": 1.5e3, "nombre_colis": 12,
+             "roulants": [{"poids": 0.25, "volume": -3.75E-2, "hauteur": 10}]},
+            {"num_bl": "BL2", "poids_brute": 7, "volume_marchandise": 123456789.125, "nombre_colis": -40},
+        ],
+    },
+    {"numero_escale": 2026002, "jauge": 987.25, "connaissements": []},
+    {"numero_escale": 2026003, "connaissements": [{"num_bl": "BL3", "poids_brute": 99.5}]},
+]
+
+
+def test_pure_reader_every_chunk_size():
+    text = json.dumps(MANIFEST, separators=(",", ":"))
+    expected = [(escale["numero_escale"], escale.get("jauge"), bl) for escale in MANIFEST for bl in escale["connaissements"]]
+    for chunk_size in range(1, len(text) + 2):
+        got = [
+            (escale["numero_escale"], escale.get("jauge"), bl)
+            for escale, bl in json_to_excel._iter_connaissements_pure(io.StringIO(text), chunk_size)
+        ]
+        assert got == expected, f"chunk size {chunk_size}"
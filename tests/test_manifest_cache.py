@@ -0,0 +1,128 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import manifest_cache
+
+MANIFEST = [
+    {
+        "numero_escale": "E1", "nom_navire": "VENETIA", "imo_navire": 9497414,
+        "connaissements": [
+            {"num_bl": "BL1", "client_final": "ACME", "poids_brute": 1500.5, "nombre_colis": 3,
+             "frigo": True,
+             "roulants": [{"numero_chassis": "C1", "marque": "HOWO", "poids": 100},
+                          {"numero_chassis": "C2", "marque": "HOWO", "poids": None}],
+             "conteneurs": []},
+            {"num_bl": "BL2", "client_final": None, "poids_brute": None, "nombre_colis": 5,
+             "frigo": False, "roulants": [],
+             "conteneurs": [{"numero_conteneur": "MSKU1", "plein_vide": "P", "taille": 40}]},
+        ],
+    },
+    {"numero_escale": "E2", "nom_navire": "VENETIA", "connaissements": []},
+    {
+        "numero_escale": "E3", "nom_navire": "ALGOL", "imo_navire": 9100000,
+        "connaissements": [
+            {"num_bl": "BL3", "client_final": "ACME", "poids_brute": 20, "nombre_colis": 1,
+             "roulants": [{"numero_chassis": "C3", "marque": "CAT", "poids": 250}]},
+        ],
+    },
+]
+
+
+def write(path, manifest):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    write(path, MANIFEST)
+    return path
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    calls = []
+    build = manifest_cache.build
+
+    def counted(json_path, directory):
+        calls.append(json_path)
+        return build(json_path, directory)
+
+    monkeypatch.setattr(manifest_cache, "build", counted)
+    return calls
+
+
+def test_columns_round_trip(manifest, tmp_path):
+    columns = manifest_cache.load(manifest, str(tmp_path / "cache"))
+    # A second load maps the saved arrays
+    columns = manifest_cache.load(manifest, str(tmp_path / "cache"))
+    bls = columns.bls
+
+    assert len(columns.escales) == 2  # escales without BLs are not stored
+    assert bls.kinds["num_bl"] == "str"
+    assert bls.values("num_bl") == ["BL1", "BL2", "BL3"]
+    assert bls.values("client_final") == ["ACME", None, "ACME"]
+    assert np.asarray(bls.array("client_final")).tolist() == [0, -1, 0]
+    assert bls.uniques("client_final").tolist() == ["ACME"]
+    assert bls.take("client_final", np.array([2, 1])).tolist() == ["ACME", None]
+
+    assert bls.kinds["frigo"] == "bool"
+    assert bls.array("frigo").dtype == np.int8
+    assert bls.values("frigo") == [True, False, None]
+    assert bls.take("frigo").tolist() == [True, False, None]
+
+    assert bls.kinds["nombre_colis"] == "int"
+    assert bls.values("nombre_colis") == [3, 5, 1]
+    assert bls.kinds["poids_brute"] == "float"
+    assert bls.values("poids_brute") == [1500.5, None, 20.0]
+    assert bls.values("missing") == [None, None, None]
+    assert bls.values("escale") == [0, 0, 1]
+
+    assert columns.escales.values("imo_navire") == [9497414, 9100000]
+    assert columns.roulants.values("numero_chassis") == ["C1", "C2", "C3"]
+    assert columns.roulants.values("poids") == [100.0, None, 250.0]
+    assert columns.child_counts("roulants").tolist() == [2, 0, 1]
+    assert columns.child_offsets("roulants").tolist() == [0, 2, 2, 3]
+    assert columns.child_offsets("conteneurs").tolist() == [0, 0, 1, 1]
+
+    frame = bls.to_frame(["num_bl", "client_final", "nombre_colis"])
+    assert frame["num_bl"].tolist() == ["BL1", "BL2", "BL3"]
+    assert frame["nombre_colis"].tolist() == [3, 5, 1]
+
+
+def test_rebuilt_when_the_source_changes(manifest, tmp_path, builds):
+    cache_dir = str(tmp_path / "cache")
+    first = manifest_cache.load(manifest, cache_dir)
+    manifest_cache.load(manifest, cache_dir)
+    assert len(builds) == 1
+
+    # Touched but identical: re-hashed, the same entry is reused
+    st = os.stat(manifest)
+    os.utime(manifest, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert manifest_cache.load(manifest, cache_dir).directory == first.directory
+    assert len(builds) == 1
+
+    # New content (and size): a new entry
+    changed = json.loads(json.dumps(MANIFEST))
+    changed[0]["connaissements"][0]["num_bl"] = "BL1-BIS"
+    write(manifest, changed)
+    columns = manifest_cache.load(manifest, cache_dir)
+    assert len(builds) == 2
+    assert columns.directory != first.directory
+    assert columns.bls.values("num_bl") == ["BL1-BIS", "BL2", "BL3"]
+
+    # Same size, new mtime
+    changed[0]["connaissements"][0]["num_bl"] = "BL1-TER"
+    write(manifest, changed)
+    assert manifest_cache.load(manifest, cache_dir).bls.values("num_bl")[0] == "BL1-TER"
+    assert len(builds) == 3
+
+    manifest_cache.load(manifest, cache_dir, refresh=True)
+    assert len(builds) == 4
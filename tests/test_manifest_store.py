@@ -0,0 +1,86 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+import json_to_excel
+import manifest_store
+import synth
+
+
+def without_none(value):
+    """JSON value with the null members left out, as the store gives them back."""
+    if isinstance(value, dict):
+        return {k: without_none(v) for k, v in value.items() if v is not None and k != "connaissements"}
+    if isinstance(value, list):
+        return [without_none(v) for v in value]
+    return value
+
+
+@pytest.fixture(params=["input.json", "mixed"])
+def manifest(request, tmp_path):
+    path = str(tmp_path / "manifest.json")
+    if request.param == "mixed":
+        synth.write_mixed_manifest(path, 400)
+    else:
+        shutil.copy(os.path.join(ROOT, request.param), path)
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    with manifest_store.ManifestStore(str(tmp_path / "manifests.sqlite")) as store:
+        yield store
+
+
+def test_queries_match_the_manifest(manifest, store):
+    counts = store.ingest(manifest)
+    pairs = list(json_to_excel.iter_connaissements(manifest))
+    bls = [bl for _, bl in pairs]
+    assert counts["connaissements"] == len(bls)
+    assert counts["roulants"] == sum(len(bl.get("roulants") or []) for bl in bls)
+    assert counts["conteneurs"] == sum(len(bl.get("conteneurs") or []) for bl in bls)
+
+    stored = list(store.iter_connaissements())
+    assert [without_none(list(pair)) for pair in stored] == [without_none(list(pair)) for pair in pairs]
+
+    client = bls[0]["client_final"]
+    expected = [bl["num_bl"] for bl in bls if bl["client_final"].lower() == client.lower()]
+    assert [row["num_bl"] for row in store.find_bls(client=client.lower())] == expected
+    assert [bl["num_bl"] for _, bl in store.iter_connaissements(client=client)] == expected
+
+    tons = {}
+    for bl in bls:
+        tons[bl["client_final"]] = tons.get(bl["client_final"], 0) + (bl.get("poids_brute") or 0) / 1000
+    by_client = {row["client_final"]: row["tons"] for row in store.tonnage_by_client()}
+    assert by_client == pytest.approx(tons)
+
+    vehicles = [(r["numero_chassis"], bl["num_bl"]) for bl in bls for r in bl.get("roulants") or []]
+    assert vehicles
+    for chassis, num_bl in vehicles[:20]:
+        found = store.find_chassis(chassis)
+        assert num_bl in {row["num_bl"] for row in found}
+        assert {row["source"] for row in found} == {os.path.abspath(manifest)}
+
+
+def test_ingest_is_keyed_by_content(manifest, store, tmp_path):
+    counts = store.ingest(manifest)
+    assert counts["connaissements"] > 0
+    total = len(store.find_bls())
+
+    # Same content again, under the same path or another one: nothing to do
+    copy = str(tmp_path / "copy.json")
+    shutil.copy(manifest, copy)
+    assert store.ingest(manifest) == {}
+    assert store.ingest(copy) == {}
+    assert len(store.find_bls()) == total
+    assert len(store.escales()) == counts["escales"]
+
+    # New content under a known path replaces that file's rows
+    synth.write_mixed_manifest(manifest, 10)
+    assert store.ingest(manifest)["connaissements"] == 10
+    assert len(store.find_bls()) == 10
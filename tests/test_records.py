@@ -0,0 +1,57 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_to_excel
+import records
+
+
+@pytest.fixture(params=["ijson", "pure"])
+def parser(request, monkeypatch):
+    if request.param == "pure":
+        monkeypatch.setattr(json_to_excel, "ijson", None)
+    elif json_to_excel.ijson is None:
+        pytest.skip("ijson is not installed")
+    return request.param
+
+
+def write(tmp_path, manifest):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+    return str(path)
+
+
+def test_first_escale(tmp_path, parser):
+    path = write(tmp_path, [
+        {"numero_escale": 1, "connaissements": [{"num_bl": "A"}, {"num_bl": "B"}]},
+        {"numero_escale": 2, "connaissements": [{"num_bl": "C"}]},
+    ])
+    bls = list(records.iter_first_escale(path))
+    assert [bl.num_bl for bl in bls] == ["A", "B"]
+    assert {bl.escale.numero_escale for bl in bls} == {1}
+
+
+def test_first_escale_without_bls(tmp_path, parser):
+    # data[0] has no BL: nothing, not the BLs of the next escale
+    path = write(tmp_path, [
+        {"numero_escale": 1, "connaissements": []},
+        {"numero_escale": 2, "connaissements": [{"num_bl": "C"}]},
+    ])
+    assert list(records.iter_first_escale(path)) == []
+    assert [bl.num_bl for bl in records.iter_records(path)] == ["C"]
+
+
+def test_max_escales(tmp_path, parser):
+    path = write(tmp_path, [
+        {"numero_escale": 1, "connaissements": [{"num_bl": "A"}]},
+        {"numero_escale": 2},
+        {"numero_escale": 3, "connaissements": [{"num_bl": "C"}]},
+    ])
+    bls = lambda n: [bl["num_bl"] for _, bl in json_to_excel.iter_connaissements(path, max_escales=n)]
+    assert bls(None) == ["A", "C"]
+    assert bls(2) == ["A"]
+    assert bls(3) == ["A", "C"]
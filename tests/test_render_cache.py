@@ -0,0 +1,89 @@
+import itertools
+import os
+import sys
+import zipfile
+
+import pytest
+from openpyxl import Workbook
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import borderau2026
+import render_cache
+
+ROWS = [
+    ["type", "client", "qte", "poids", "rec_qty"],
+    ["HOT ROLLED COILS", "ACME & Sons", 12, 24.5, 12],
+    ["PLYWOOD", "O'Brien & Co", 3, 0.75, None],
+    ["BIG BAG CEMENT", "CIMENTS", 40, 50, 38],
+    ["TRUCKS", "ACME & Sons", 2, 30, 2],
+]
+
+
+def write_sheet(path, rows):
+    wb = Workbook()
+    ws = wb.active
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+    return str(path)
+
+
+def document_xml(path):
+    with zipfile.ZipFile(path) as zf:
+        return zf.read("word/document.xml")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    ticks = itertools.count(1)
+    monkeypatch.setattr(render_cache.time, "time", lambda: float(next(ticks)))
+
+
+def test_least_recently_used_evicted_first(tmp_path, clock):
+    cache = render_cache.RenderCache(str(tmp_path / "cache.sqlite"), max_bytes=30)
+    for key in "abcd":
+        cache.put_many({key: key * 10})
+    cache.get_many(["a"])  # a is now the most recently used
+    cache.evict()
+    keys = [k for (k,) in cache.db.execute("SELECT key FROM fragments ORDER BY key")]
+    assert keys == ["a", "c", "d"]
+    assert cache.evicted == 1
+
+    cache.max_bytes = 10
+    cache.evict()
+    assert cache.get_many("abcd") == {"a": "a" * 10}
+    assert cache.evicted == 3
+    cache.close()
+
+
+def test_cached_runs_are_identical(tmp_path):
+    sheet = write_sheet(tmp_path / "tally.xlsx", ROWS)
+    template = os.path.join(ROOT, "template.docx")
+    expected = tmp_path / "xml.docx"
+    borderau2026.excel_to_docx_custom(sheet, template_path=template, output_docx=str(expected), engine="xml")
+
+    cache = render_cache.RenderCache(str(tmp_path / "cache.sqlite"))
+    outputs = []
+    for run in range(2):
+        output = tmp_path / f"cached{run}.docx"
+        borderau2026.excel_to_docx_custom(sheet, template_path=template, output_docx=str(output), cache=cache)
+        outputs.append(document_xml(output))
+    assert (cache.hits, cache.misses) == (4, 4)
+    assert outputs[0] == outputs[1] == document_xml(expected)
+
+    # One corrected row: only that row is rendered again
+    rows = [list(row) for row in ROWS]
+    rows[3][4] = 40
+    sheet = write_sheet(tmp_path / "tally.xlsx", rows)
+    borderau2026.excel_to_docx_custom(sheet, template_path=template, output_docx=str(tmp_path / "fixed.docx"),
+                                      cache=cache)
+    assert (cache.hits, cache.misses) == (7, 5)
+
+    # Another template invalidates every fragment
+    other = os.path.join(ROOT, "template1.docx")
+    borderau2026.excel_to_docx_custom(sheet, template_path=other, output_docx=str(tmp_path / "other.docx"),
+                                      cache=cache)
+    assert (cache.hits, cache.misses) == (7, 9)
+    cache.close()
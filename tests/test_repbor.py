@@ -0,0 +1,97 @@
+import os
+import sys
+
+import pytest
+from docx import Document
+from docx.enum.text import WD_BREAK
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import repbor
+
+
+def paragraph(*runs):
+    """A paragraph with one run per (text, bold) pair."""
+    p = Document().add_paragraph()
+    for text, bold in runs:
+        p.add_run(text).bold = bold
+    return p
+
+
+def test_formatting_kept_across_runs():
+    p = paragraph(("Recei", True), ("ver :", False), (" | tonnage :", None), (" end", True))
+    repbor.replace_placeholders_in_paragraph(p, {"Receiver :": "Receiver : ACME", "tonnage :": "tonnage: 12"})
+    assert p.text == "Receiver : ACME | tonnage: 12 end"
+    assert [(r.text, r.bold) for r in p.runs] == [
+        ("Receiver : ACME", True), ("", False), (" | tonnage: 12", None), (" end", True),
+    ]
+
+
+def test_overlapping_placeholders_take_the_longest():
+    p = paragraph(("Manifested Quantity : and Quantity :", None))
+    repbor.replace_placeholders_in_paragraph(p, {"Quantity :": "Q", "Manifested Quantity :": "MQ"})
+    assert p.text == "MQ and Q"
+
+
+@pytest.mark.parametrize("runs, placeholder", [
+    ([("Receiver", True), ("\t", False), (":", False)], "Receiver\t:"),
+    ([("Receiver\n:", True), (" rest", False)], "Receiver\n:"),
+    ([("x\tReceiver :", True)], "Receiver :"),
+    ([("Receiver :", True), ("\t", None), ("tonnage :", None)], "tonnage :"),
+    ([("\tReceiver :", True)], "\tReceiver :"),
+])
+def test_tabs_and_breaks_match_paragraph_text(runs, placeholder):
+    p = paragraph(*runs)
+    expected = p.text.replace(placeholder, "NEW")
+    repbor.replace_placeholders_in_paragraph(p, {placeholder: "NEW"})
+    assert p.text == expected
+    assert p.runs[0].bold is True
+
+
+def test_replacement_with_tabs_and_breaks():
+    p = paragraph(("Receiver :", True), (" end", False))
+    repbor.replace_placeholders_in_paragraph(p, {"Receiver :": "Receiver :\tACME\nOran"})
+    assert p.text == "Receiver :\tACME\nOran end"
+    assert p.runs[0].bold is True
+    assert p.runs[0].text == "Receiver :\tACME\nOran"
+
+
+def test_page_break_is_not_text():
+    p = paragraph(("Receiver", None))
+    p.runs[0].add_break(WD_BREAK.PAGE)
+    p.add_run(" :")
+    assert p.text == "Receiver :"
+    repbor.replace_placeholders_in_paragraph(p, {"Receiver :": "NEW"})
+    assert p.text == "NEW"
+    assert p.runs[0]._r.xpath("w:br/@w:type") == ["page"]
+
+
+def test_merged_cell_replaced_once(tmp_path):
+    doc = Document()
+    table = doc.add_table(rows=2, cols=2)
+    merged = table.cell(0, 0).merge(table.cell(0, 1))
+    merged.text = "tonnage :"
+    table.cell(1, 0).text = "Receiver :"
+    doc.add_paragraph("tonnage : and Receiver :")
+    template = str(tmp_path / "template.docx")
+    doc.save(template)
+
+    # A value containing its own placeholder shows any second pass
+    replacements = {"tonnage :": "tonnage : 12", "Receiver :": "Receiver : ACME"}
+    output = str(tmp_path / "filled.docx")
+    repbor.replace_in_docx_template(template, output, replacements)
+    filled = Document(output)
+    assert filled.tables[0].cell(0, 0).text == "tonnage : 12"
+    assert filled.tables[0].cell(0, 1).text == "tonnage : 12"
+    assert filled.tables[0].cell(1, 0).text == "Receiver : ACME"
+    assert filled.paragraphs[-1].text == "tonnage : 12 and Receiver : ACME"
+
+
+def test_filler_copies_are_independent(tmp_path):
+    doc = Document()
+    doc.add_paragraph("Receiver :")
+    template = str(tmp_path / "template.docx")
+    doc.save(template)
+    filler = repbor.TemplateFiller(template, ["Receiver :"])
+    assert filler.fill({"Receiver :": "A"}).paragraphs[0].text == "A"
+    assert filler.fill({"Receiver :": "B"}).paragraphs[0].text == "B"
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import service
+
+TEMPLATES = [os.path.join(ROOT, name) for name in ("template.docx", "template1.docx")]
+TIMING = ("X-Queue-Ms", "X-Render-Ms", "X-Total-Ms", "Server-Timing")
+
+
+def read(name):
+    with open(os.path.join(ROOT, name), "rb") as f:
+        return f.read()
+
+
+def run(test, **options):
+    """Run `test(service, client)` against a started Service."""
+    async def main():
+        options.setdefault("workers", 1)
+        async with service.Service(templates=TEMPLATES, **options) as svc:
+            return await test(svc, service.InProcessClient(svc))
+    return asyncio.run(main())
+
+
+def test_render_with_timing_headers():
+    async def test(svc, client):
+        bordereau = await client.post("/bordereau?template=template1.docx&engine=xml", read("source.xlsx"))
+        flattened = await client.post("/flatten", read("input.json"))
+        return bordereau, flattened
+
+    bordereau, flattened = run(test)
+    for response, content_type in ((bordereau, service.DOCX_TYPE), (flattened, service.XLSX_TYPE)):
+        assert response.status == 200, response.body
+        assert response.headers["Content-Type"] == content_type
+        assert response.body.startswith(b"PK")
+        for name in TIMING:
+            assert name in response.headers
+        assert [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")] == [
+            "queue", "render", "total",
+        ]
+
+
+def test_busy_service_answers_503():
+    async def test(svc, client):
+        body = read("source.xlsx")
+        responses = await asyncio.gather(*(client.post("/bordereau", body) for _ in range(3)))
+        health = json.loads((await client.get("/health")).body)
+        return responses, health
+
+    responses, health = run(test, max_queue=1)
+    assert [r.status for r in responses] == [200, 200, 503]
+    assert responses[2].headers["Retry-After"] == "1"
+    assert health["served"] == 2 and health["rejected"] == 1
+
+
+def test_slow_render_answers_504():
+    async def test(svc, client):
+        response = await client.post("/bordereau", read("source.xlsx"))
+        # The worker is still busy: the slot is only released when it ends
+        busy = json.loads((await client.get("/health")).body)["in_flight"]
+        deadline = time.monotonic() + 30
+        while svc.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return response, busy, svc.in_flight
+
+    response, busy, after = run(test, timeout=0.001)
+    assert response.status == 504
+    assert "X-Queue-Ms" in response.headers and "X-Render-Ms" not in response.headers
+    assert (busy, after) == (1, 0)
+
+
+def test_bad_requests():
+    async def test(svc, client):
+        body = read("source.xlsx")
+        return [
+            await client.post("/bordereau?engine=pdf", body),
+            await client.post("/bordereau?template=missing.docx", body),
+            await client.post("/bordereau", b""),
+            await client.post("/render", body),
+            await client.get("/bordereau"),
+            await client.post("/health", body),
+        ]
+
+    statuses = [r.status for r in run(test)]
+    assert statuses == [400, 400, 400, 404, 405, 405]
+
+
+def test_broken_pool_is_replaced():
+    async def test(svc, client):
+        broken = svc.pool
+        for pid in list(broken._processes):
+            os.kill(pid, signal.SIGKILL)
+        await asyncio.sleep(0.5)
+        first = await client.post("/bordereau", read("source.xlsx"))
+        second = await client.post("/bordereau", read("source.xlsx"))
+        return first, second, svc.pool is broken, svc.in_flight
+
+    first, second, same_pool, in_flight = run(test)
+    assert first.status == 503
+    assert second.status == 200
+    assert not same_pool and in_flight == 0
+
+
+def test_handler_error_answers_500():
+    async def test(svc, client):
+        async def fail(*args):
+            raise RuntimeError("boom")
+
+        svc.handle = fail
+        server = await asyncio.start_server(svc.serve_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /health HTTP/1.1\r\n\r\n")
+        await writer.drain()
+        answer = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return answer
+
+    answer = run(test)
+    assert answer.startswith(b"HTTP/1.1 500 Internal Server Error\r\n")
+    assert answer.endswith(b'{"error": "RuntimeError: boom"}')
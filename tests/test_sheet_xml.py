@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_to_excel
+import sheet_xml
+
+
+def read_back(path):
+    wb = load_workbook(path)
+    return {ws.title: [list(row) for row in ws.iter_rows(values_only=True)] for ws in wb.worksheets}
+
+
+def test_cells_read_back(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    counts = sheet_xml.write_workbook(path, {
+        "Values": (["Text", "Int", "Float", "Bool"], [
+            ["A & B", "<tag>", "bell\x07 and\x1f nul\x00", "  spaced  ", None, 'say "hi"'],
+            [1, -2, 10**12, None, 0, 7],
+            [1.5, float("nan"), None, -0.25, float("inf"), 3.0],
+            [True, False, None, True, False, True],
+        ]),
+        "A sheet name longer than thirty-one characters": (["Only"], [[1]]),
+        "Empty": (["X", "Y"], [[], []]),
+    })
+    assert counts == {"Values": 6, "A sheet name longer than thirty-one characters": 1, "Empty": 0}
+
+    sheets = read_back(path)
+    assert list(sheets) == ["Values", "A sheet name longer than thirty", "Empty"]
+    assert sheets["Empty"] == [["X", "Y"]]
+    assert sheets["A sheet name longer than thirty"] == [["Only"], [1]]
+    rows = sheets["Values"]
+    assert rows[0] == ["Text", "Int", "Float", "Bool"]
+    assert rows[1:] == [
+        ["A & B", 1, 1.5, True],
+        ["<tag>", -2, None, False],
+        ["bell and nul", 10**12, None, None],
+        ["  spaced  ", None, -0.25, True],
+        [None, 0, None, False],
+        ['say "hi"', 7, 3, True],
+    ]
+    assert type(rows[1][1]) is int and type(rows[1][2]) is float and type(rows[1][3]) is bool
+
+
+MANIFEST = [{
+    "numero_escale": "E1", "nom_navire": "VENETIA",
+    "connaissements": [
+        {"num_bl": "BL1", "client_final": "SARL A&B <EXPORT>", "description_marchandise": "TRUCKS\x0b",
+         "nombre_colis": 2, "poids_brute": 12500,
+         "roulants": [{"type": "VEHICULE", "marque": "HOWO", "numero_chassis": "C1", "poids": 6250},
+                      {"type": "VEHICULE", "marque": "HOWO", "numero_chassis": "C2"}],
+         "conteneurs": []},
+        {"num_bl": "BL2", "client_final": "ACME", "nombre_colis": 1, "poids_brute": 20000,
+         "conteneurs": [{"numero_conteneur": "MSKU1", "taille": 40, "plein_vide": "P"}]},
+    ],
+}]
+
+
+def test_normalized_workbook(tmp_path):
+    json_path = str(tmp_path / "input.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(MANIFEST, f)
+    output = str(tmp_path / "sheets.xlsx")
+    totals = json_to_excel.extract_to_excel_normalized(json_path, output)
+    assert totals == {"BLs": 2, "Vehicles": 2, "Containers": 1, "Clients": 2}
+
+    sheets = read_back(output)
+    assert list(sheets) == ["BLs", "Vehicles", "Containers", "Clients"]
+    bls = sheets["BLs"]
+    assert bls[0] == [h for h, _, _ in json_to_excel.BL_SHEET] + ["Vehicles", "Containers"]
+    assert bls[1] == ["E1", "VENETIA", "BL1", "SARL A&B <EXPORT>", "TRUCKS", None, 2, 12.5, None, None, 2, 0]
+    assert bls[2][:4] == ["E1", "VENETIA", "BL2", "ACME"]
+    assert bls[2][-2:] == [0, 1]
+
+    vehicles = sheets["Vehicles"]
+    assert vehicles[0] == [h for h, _, _ in json_to_excel.VEHICLE_SHEET]
+    assert [row[6] for row in vehicles[1:]] == ["C1", "C2"]
+    assert [row[7] for row in vehicles[1:]] == [6250, None]
+    assert vehicles[1][1] == "SARL A&B <EXPORT>"
+
+    containers = sheets["Containers"]
+    assert containers[1][:3] == ["BL2", "ACME", "MSKU1"]
+    assert containers[1][4] == 40
+
+    assert sheets["Clients"] == [
+        json_to_excel.CLIENT_SHEET,
+        ["ACME", 1, 0, 1, 20],
+        ["SARL A&B <EXPORT>", 1, 2, 0, 12.5],
+    ]
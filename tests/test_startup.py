@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import bench_startup
+
+
+def test_every_subcommand_is_checked():
+    names = {args[0] for args in bench_startup.commands() if args}
+    assert {"render", "flatten", "ingest", "query", "fill", "tables-to-text", "watch", "serve"} <= names
+
+
+@pytest.mark.parametrize("args", bench_startup.commands(), ids=lambda args: " ".join(args) or "epj")
+def test_help_does_not_import_heavy_libraries(args):
+    modules, _ = bench_startup.import_profile(args)
+    assert "argparse" in modules
+    assert bench_startup.heavy_imports(modules) == []
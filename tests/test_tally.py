@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import boredereau
+import tally
+
+ROWS = [
+    ["type", "client", "qte", "poids", "rec_qty", "remarks"],
+    ["hot rolled coil", "ACME", 3, 1.5, 2, "ok"],
+    [None, None, None, None, None, None],
+    ["pipes", None, None, 0.4, None, None],
+    [None, " B ", None, None, None, None],
+    [None, None, None, None, None, "note only"],
+    [None, None, None, None, None, None],
+    [" plywood ", "C", "7", "abc", 1, None],
+    ["beams", "D", 12, 0, 12, None],
+    [None, None, None, None, None, None],
+]
+
+
+@pytest.fixture
+def sheet(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    for row in ROWS:
+        ws.append(row)
+    path = tmp_path / "tally.xlsx"
+    wb.save(path)
+    return path
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"upper_commodity": True},
+    {"default_commodity": "Units + Package"},
+    {"default_commodity": "Units + Package", "keep_zero_tonnage": True},
+])
+def test_streaming_matches_pandas(sheet, options):
+    frame = tally.prepare_frame(pd.read_excel(sheet, engine="openpyxl"), **options)
+    streamed = list(tally.iter_entries(sheet, **options))
+    assert streamed == frame
+    # Blank rows are skipped, the row holding only a remark is kept
+    assert len(streamed) == 6
+
+
+def test_missing_cells_render_empty(sheet):
+    rows = list(tally.iter_sheet_rows(sheet))
+    assert rows[1] == {"type": "pipes", "client": None, "qte": None, "poids": 0.4, "rec_qty": None}
+    assert tally.prepare_row(rows[1]) == tally.Entry("", "pipes", "00", ".40", "00")
+    assert tally.prepare_row(rows[2]) == tally.Entry("B", "", "00", ".00", "00")
+
+
+def test_boredereau_missing_cells():
+    streamed = {"Client": None, "Marchandise": "COILS", "nombre colis": None, "Poids brute": None}
+    frame = pd.Series({"Client": float("nan"), "Marchandise": "COILS", "nombre colis": float("nan"),
+                       "Poids brute": pd.NA})
+    lines = boredereau.format_lines(streamed)
+    assert lines == boredereau.format_lines(frame)
+    assert lines[1] == "Receiver :     Comodity : COILS"
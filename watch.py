@@ -0,0 +1,277 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import shutil
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import batch
+
+# Watch mode: a long-running process that renders every tally sheet or
+# manifest dropped into an inbox folder.
+#
+#   - new files are noticed through inotify (Linux) or, elsewhere, by
+#     scanning the folder every `poll_interval` seconds;
+#   - a file is processed once its size and mtime have not changed for
+#     `settle` seconds, so half-copied files are never read; a file that
+#     settles empty is failed without being rendered, and one that changes
+#     while it renders is queued again once the job ends;
+#   - the worker pool is started (and warmed) up front: every worker has the
+#     rendering modules imported and every template parsed once (each job
+#     renders on a copy of the parsed document);
+#   - each job prints its latency from arrival to output, and the input is
+#     moved to inbox/done or inbox/failed once processed.
+#
+# A tally sheet is rendered with the template whose name appears in the
+# file name ("call42_template2.xlsx" -> template2.docx), else the first one.
+
+DEFAULT_TEMPLATES = ("template.docx", "template1.docx", "template2.docx")
+
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+EVENT_HEADER = struct.Struct("iIII")
+
+class Inotify:
+    """Minimal inotify watch on one directory, through libc (no extra dependency)."""
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CREATE | IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+
+    def read(self, timeout):
+        """Names of the entries touched within `timeout` seconds (may repeat)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        names = []
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Polling:
+    """Fallback for platforms without inotify: report every entry of the folder."""
+
+    def __init__(self, path, interval=1.0):
+        self.path = path
+        self.interval = interval
+
+    def read(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        return os.listdir(self.path)
+
+    def close(self):
+        pass
+
+
+def template_for(input_path, template_names):
+    """Longest template name (without .docx) found in the input file name, else the first one."""
+    if not template_names:
+        return None
+    name = os.path.basename(input_path).lower()
+    stems = sorted(template_names, key=lambda t: len(os.path.splitext(t)[0]), reverse=True)
+    for template in stems:
+        if os.path.splitext(template)[0].lower() in name:
+            return template
+    return template_names[0]
+
+
+class Watcher:
+    def __init__(self, inbox, output_dir, templates=DEFAULT_TEMPLATES, workers=None,
+                 engine="stamp", settle=1.0, poll_interval=1.0, use_inotify=True, log_path=None):
+        self.inbox = os.path.abspath(inbox)
+        self.output_dir = output_dir
+        self.templates = [t for t in templates if os.path.isfile(t)]
+        self.template_names = [os.path.basename(t) for t in self.templates]
+        self.workers = workers or os.cpu_count()
+        self.engine = engine
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.log_path = log_path
+        self.pending = {}   # name -> {"first_seen", "last_change", "stat"}
+        self.running = {}   # future -> job dict
+        self.jobs = []
+
+    def _source(self):
+        if self.use_inotify and sys.platform.startswith("linux"):
+            try:
+                return Inotify(self.inbox)
+            except OSError as exc:
+                print(f"inotify unavailable ({exc}), polling every {self.poll_interval} s")
+        return Polling(self.inbox, self.poll_interval)
+
+    def _touch(self, name, now):
+        if not batch.accepts(name) or name in self.running_names():
+            return
+        # Only size/mtime changes (see _ready) restart the settle delay
+        self.pending.setdefault(name, {"first_seen": now, "last_change": now, "stat": None})
+
+    def running_names(self):
+        return {job["name"] for job in self.running.values()}
+
+    def _ready(self, now):
+        """Pending files whose size and mtime stayed the same for `settle` seconds (empty ones too)."""
+        ready = []
+        for name, entry in list(self.pending.items()):
+            try:
+                st = os.stat(os.path.join(self.inbox, name))
+            except FileNotFoundError:
+                # Renamed away or deleted before it settled
+                del self.pending[name]
+                continue
+            stat = (st.st_size, st.st_mtime_ns)
+            if stat != entry["stat"]:
+                entry["stat"] = stat
+                entry["last_change"] = now
+            elif now - entry["last_change"] >= self.settle:
+                ready.append(name)
+        return ready
+
+    def _submit(self, pool, name, now):
+        entry = self.pending.pop(name)
+        job = {"name": name, "first_seen": entry["first_seen"], "submitted": now, "stat": entry["stat"]}
+        if entry["stat"][0] == 0:
+            # Nothing was written (or the copy was aborted): no job to run
+            self._report(job, {"output": None, "seconds": 0.0, "error": "empty file"}, now)
+            return
+        path = os.path.join(self.inbox, name)
+        template = template_for(name, self.template_names)
+        future = pool.submit(batch.process_with_template, path, self.output_dir, self.engine, template)
+        self.running[future] = job
+
+    def _changed(self, job):
+        """True if the input was rewritten since the job was submitted."""
+        try:
+            st = os.stat(os.path.join(self.inbox, job["name"]))
+        except FileNotFoundError:
+            return False
+        return (st.st_size, st.st_mtime_ns) != job["stat"]
+
+    def _finish(self, future, job):
+        now = time.monotonic()
+        try:
+            result = future.result()
+        except Exception as exc:
+            result = {"output": None, "seconds": 0.0, "error": f"{type(exc).__name__}: {exc}"}
+        if self._changed(job):
+            # The output is from the previous content: render the new one
+            print(f"{job['name']}: changed while rendering, queued again")
+            self.pending[job["name"]] = {"first_seen": now, "last_change": now, "stat": None}
+            return
+        self._report(job, result, now)
+
+    def _report(self, job, result, now):
+        folder = os.path.join(self.inbox, "failed" if result["error"] else "done")
+        os.makedirs(folder, exist_ok=True)
+        source = os.path.join(self.inbox, job["name"])
+        if os.path.exists(source):
+            shutil.move(source, os.path.join(folder, job["name"]))
+
+        report = {
+            "input": job["name"],
+            "output": result["output"],
+            "error": result["error"],
+            "latency": now - job["first_seen"],
+            "settle": job["submitted"] - job["first_seen"],
+            "queue": max(now - job["submitted"] - result["seconds"], 0.0),
+            "render": result["seconds"],
+        }
+        self.jobs.append(report)
+        status = "FAILED " + result["error"].splitlines()[0] if result["error"] else f"-> {result['output']}"
+        print(
+            f"{job['name']}: {report['latency']:.2f} s from arrival "
+            f"(settle {report['settle']:.2f}, queue {report['queue']:.2f}, render {report['render']:.2f}) {status}"
+        )
+        if self.log_path:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(report) + "\n")
+
+    def run(self, max_jobs=None, idle_timeout=None):
+        """
+        Watch until interrupted (Ctrl+C), or until `max_jobs` files were
+        processed, or `idle_timeout` seconds passed with nothing to do.
+        Returns the list of job reports.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        source = self._source()
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=batch.init_warm_worker, initargs=(self.templates,),
+        )
+        try:
+            start = time.perf_counter()
+            # Start every worker now so the first file does not pay for it
+            for f in [pool.submit(batch.ping) for _ in range(self.workers)]:
+                f.result()
+            print(
+                f"Watching {self.inbox} ({type(source).__name__.lower()}), {self.workers} warm workers, "
+                f"templates: {', '.join(self.template_names) or 'none'} "
+                f"(ready in {time.perf_counter() - start:.2f} s)"
+            )
+
+            # Files already waiting in the inbox
+            now = time.monotonic()
+            for name in os.listdir(self.inbox):
+                self._touch(name, now)
+            idle_since = now
+
+            while max_jobs is None or len(self.jobs) < max_jobs:
+                busy = self.pending or self.running
+                timeout = min(self.settle, self.poll_interval) / 2 if busy else self.poll_interval
+                names = source.read(timeout)
+                now = time.monotonic()
+                for name in names:
+                    self._touch(name, now)
+                for name in self._ready(now):
+                    self._submit(pool, name, now)
+                for future in [f for f in self.running if f.done()]:
+                    self._finish(future, self.running.pop(future))
+
+                if self.pending or self.running:
+                    idle_since = now
+                elif idle_timeout is not None and now - idle_since >= idle_timeout:
+                    break
+        except KeyboardInterrupt:
+            print("Stopping")
+        finally:
+            source.close()
+            pool.shutdown(cancel_futures=True)
+        return self.jobs
+
+
+def watch(inbox, output_dir="output", **options):
+    """Run a Watcher on `inbox`; see Watcher for the options."""
+    return Watcher(inbox, output_dir, **options).run()
+
+
+if __name__ == "__main__":
+    import epj
+
+    # Same options as `epj watch`
+    sys.exit(epj.main(["watch", *sys.argv[1:]]))